@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark de serialização JSON das respostas da API
+
+Compara o provider padrão do Flask com o FastJSONProvider numa resposta
+de process_file com 10k produtos.
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+import numpy as np
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from json_provider import FastJSONProvider
+
+
+def build_payload(n_products: int = 10000) -> dict:
+    """Resposta sintética no formato de process_file"""
+    products = [
+        {
+            "name": f"205/55R16 91V PRODUTO {i}",
+            "brand": "LINGLONG",
+            "quantity": float(i % 40 + 1),
+            "unit_cost": round(35.5 + i * 0.01, 2),
+            "total": round((i % 40 + 1) * (35.5 + i * 0.01), 2)
+        }
+        for i in range(n_products)
+    ]
+    return {
+        "success": True,
+        "message": "Arquivo processado com sucesso",
+        "data": {
+            "products": products,
+            "summary": {"total_products": n_products, "currency": "USD"},
+            "processing_info": {
+                "total_rows_processed": np.int64(n_products),
+                "valid_products": np.int64(n_products),
+                "average_price": np.float64(123.45)
+            }
+        }
+    }
+
+
+def time_encode(provider, payload, repeat: int = 10) -> float:
+    """Menor tempo (ms) de provider.response(payload) entre as repetições"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        provider.response(payload)
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    app = Flask(__name__)
+    payload = build_payload()
+
+    default_provider = DefaultJSONProvider(app)
+    default_provider.default = FastJSONProvider.default  # numpy também no provider padrão
+    fast_provider = FastJSONProvider(app)
+
+    with app.app_context():
+        default_ms = time_encode(default_provider, payload)
+        fast_ms = time_encode(fast_provider, payload)
+
+    print(f"Produtos: {len(payload['data']['products'])}")
+    print(f"Flask padrão (json):     {default_ms:8.2f} ms")
+    print(f"FastJSONProvider ({fast_provider.backend}): {fast_ms:8.2f} ms")
+    print(f"Ganho: {default_ms / fast_ms:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
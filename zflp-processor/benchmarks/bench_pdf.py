@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Benchmark do custo fixo do PDFGenerator
+
+Mede a construção do gerador (estilos compartilhados no processo contra a
+folha de estilos montada a cada instância) e a renderização de um relatório
+pequeno, onde o custo fixo por relatório domina.
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from services.pdf_generator import PDFGenerator, build_report_styles
+
+
+def build_report(n_products: int = 5) -> dict:
+    """Relatório sintético no formato dos geradores"""
+    products = [
+        {
+            'produto': f'205/55R16 91V PRODUTO {i}',
+            'quantidade': i % 40 + 1,
+            'fob': round(35.5 + i * 0.01, 2),
+            'total': round((i % 40 + 1) * (35.5 + i * 0.01), 2)
+        }
+        for i in range(n_products)
+    ]
+    total_products = round(sum(p['total'] for p in products), 2)
+    return {
+        'metadata': {'filename': 'benchmark.xlsx', 'processed_at': '2025-06-05T10:00:00'},
+        'local_currency': 'BRL',
+        'summary': {'mercadoria': total_products, 'frete_seguro': 150.0, 'cif': total_products + 150.0,
+                    'custo_total': total_products + 550.0},
+        'products': products,
+        'costs': [
+            {'item': 'Frete Internacional', 'percentual': 0, 'valor': 150.0},
+            {'item': 'Despachante', 'percentual': 2.5, 'valor': 400.0}
+        ],
+        'totals': {'total_produtos': total_products, 'total_quantidade': sum(p['quantidade'] for p in products),
+                   'total_custos': 550.0, 'custo_total': total_products + 550.0}
+    }
+
+
+def time_per_call(func, repeat: int) -> float:
+    """Tempo médio (ms) por chamada"""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    data = build_report()
+    PDFGenerator().generate_pdf_bytes(data)  # aquecimento (imports, cache de estilos)
+
+    per_instance_ms = time_per_call(build_report_styles, 200)
+    construct_ms = time_per_call(PDFGenerator, 200)
+    render_ms = time_per_call(lambda: PDFGenerator().generate_pdf_bytes(data), 50)
+
+    print(f"Estilos montados por instância: {per_instance_ms * 1000:8.1f} µs")
+    print(f"PDFGenerator() (compartilhado): {construct_ms * 1000:8.1f} µs")
+    print(f"Relatório pequeno ({len(data['products'])} produtos): {render_ms:8.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Teste de carga: latência de /api/search-products com uploads pesados em paralelo
+
+Sobe o app com gunicorn.conf.py numa porta livre e mede a busca em duas fases:
+sozinha e com uploads de planilhas grandes em paralelo. Com o trabalho pesado
+no pool de processos (CPU_OFFLOAD=1), o p99 da busca deve ficar próximo do da
+fase sem carga; com CPU_OFFLOAD=0 o parsing disputa o GIL com as buscas.
+
+Uso:
+    python benchmarks/load_search_during_upload.py [--rows 20000] [--uploaders 2]
+    CPU_OFFLOAD=0 python benchmarks/load_search_during_upload.py   # comparação
+"""
+
+import os
+import json
+import time
+import argparse
+import threading
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import synthetic
+from loadgen import HttpClient, free_port, percentile, start_server, stop_server
+
+
+def search(base_url: str) -> float:
+    """Latência (ms) de uma busca"""
+    started = time.perf_counter()
+    with urllib.request.urlopen(f'{base_url}/api/search-products?q=205&limit=20', timeout=30) as response:
+        response.read()
+    return (time.perf_counter() - started) * 1000
+
+
+def run_searches(base_url: str, requests: int, concurrency: int) -> list:
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return sorted(pool.map(lambda _: search(base_url), range(requests)))
+
+
+def summarize(latencies: list) -> dict:
+    return {
+        'requests': len(latencies),
+        'p50_ms': round(percentile(latencies, 0.50), 2),
+        'p95_ms': round(percentile(latencies, 0.95), 2),
+        'p99_ms': round(percentile(latencies, 0.99), 2),
+        'max_ms': round(latencies[-1], 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--rows', type=int, default=20000, help='linhas da planilha enviada')
+    parser.add_argument('--uploaders', type=int, default=2, help='uploads simultâneos')
+    parser.add_argument('--searches', type=int, default=500, help='buscas por fase')
+    parser.add_argument('--concurrency', type=int, default=4, help='buscas simultâneas')
+    args = parser.parse_args()
+
+    workbook = synthetic.build_workbook(args.rows, messy=True)
+    port = free_port()
+    base_url = f'http://127.0.0.1:{port}'
+    server = start_server(port)
+
+    try:
+        run_searches(base_url, 50, args.concurrency)  # aquecimento
+        idle = run_searches(base_url, args.searches, args.concurrency)
+
+        stop = threading.Event()
+        uploads = []
+
+        def upload_loop():
+            client = HttpClient(base_url)
+            while not stop.is_set():
+                started = time.perf_counter()
+                status, _ = client.upload('/api/upload', 'carga.xlsx', workbook)
+                uploads.append((status, (time.perf_counter() - started) * 1000))
+            client.close()
+
+        uploaders = [threading.Thread(target=upload_loop) for _ in range(args.uploaders)]
+        for thread in uploaders:
+            thread.start()
+        time.sleep(0.5)  # deixar os uploads chegarem ao parsing
+        loaded = run_searches(base_url, args.searches, args.concurrency)
+        stop.set()
+        for thread in uploaders:
+            thread.join()
+    finally:
+        stop_server(server)
+
+    print(json.dumps({
+        'cpu_offload': os.environ.get('CPU_OFFLOAD', '1'),
+        'worker_class': os.environ.get('GUNICORN_WORKER_CLASS', 'gthread'),
+        'rows_per_upload': args.rows,
+        'search_idle': summarize(idle),
+        'search_during_uploads': summarize(loaded),
+        'uploads': {
+            'completed': len(uploads),
+            'errors': sum(1 for status, _ in uploads if status != 200),
+            'mean_ms': round(sum(ms for _, ms in uploads) / max(len(uploads), 1), 2)
+        }
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
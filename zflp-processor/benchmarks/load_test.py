@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Teste de carga com tráfego misto contra o app local
+
+Sobe o app com gunicorn.conf.py (ou usa --url) e simula, pelo tempo pedido:
+    busca         usuários digitando: /search-products a cada tecla, pausa entre buscas
+    upload        uploads periódicos de planilhas geradas (benchmarks/synthetic.py)
+    calculo       /calculate-costs com payloads grandes
+    sugestoes     /suggestions e /health de fundo
+
+Ao final mostra, por endpoint, vazão, percentis de latência e taxa de erro
+(status >= 400, corpo com {"success": false} ou falha de conexão); --json grava o mesmo relatório.
+A configuração dos workers vem do ambiente (WEB_CONCURRENCY,
+GUNICORN_THREADS, CPU_WORKERS, ...), como em produção.
+
+Uso:
+    python benchmarks/load_test.py --duration 60 --search-users 16 --uploaders 2
+    WEB_CONCURRENCY=4 python benchmarks/load_test.py --json carga.json
+"""
+
+import os
+import json
+import time
+import random
+import argparse
+import threading
+
+import synthetic
+from loadgen import HttpClient, LoadStats, free_port, start_server, stop_server, print_summary
+
+QUERIES = ('205/55R16', '185/65R15', 'pirelli', 'linglong', '225/45', 'michelin')
+SUGGESTION_TYPES = ('products', 'brands', 'fixed_costs', 'variable_costs', 'taxes')
+
+
+def search_user(base_url: str, stats: LoadStats, stop: threading.Event, seed: int):
+    """Digitação: uma busca por tecla a partir de 2 caracteres, 50-150 ms entre teclas"""
+    rng = random.Random(seed)
+    client = HttpClient(base_url)
+    while not stop.is_set():
+        query = rng.choice(QUERIES)
+        for length in range(2, len(query) + 1):
+            if stop.is_set():
+                break
+            stats.timed('GET /search-products', client.request, 'GET', '/api/search-products', None, None,
+                        {'q': query[:length], 'limit': 20})
+            stop.wait(rng.uniform(0.05, 0.15))
+        stop.wait(rng.uniform(0.5, 2.0))
+    client.close()
+
+
+def upload_user(base_url: str, stats: LoadStats, stop: threading.Event, workbook: bytes, interval: float):
+    client = HttpClient(base_url)
+    while not stop.is_set():
+        started = time.monotonic()
+        stats.timed('POST /upload', client.upload, '/api/upload', 'carga.xlsx', workbook)
+        stop.wait(max(0.0, interval - (time.monotonic() - started)))
+    client.close()
+
+
+def calculation_user(base_url: str, stats: LoadStats, stop: threading.Event, payload: dict, interval: float):
+    client = HttpClient(base_url)
+    while not stop.is_set():
+        started = time.monotonic()
+        stats.timed('POST /calculate-costs', client.post_json, '/api/calculate-costs', payload)
+        stop.wait(max(0.0, interval - (time.monotonic() - started)))
+    client.close()
+
+
+def background_user(base_url: str, stats: LoadStats, stop: threading.Event, seed: int):
+    rng = random.Random(seed)
+    client = HttpClient(base_url)
+    while not stop.is_set():
+        kind = rng.choice(SUGGESTION_TYPES)
+        stats.timed('GET /suggestions', client.request, 'GET', f'/api/suggestions/{kind}')
+        stats.timed('GET /health', client.request, 'GET', '/health')
+        stop.wait(rng.uniform(0.2, 1.0))
+    client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Teste de carga com tráfego misto')
+    parser.add_argument('--url', help='usar um servidor já em execução em vez de subir um local')
+    parser.add_argument('--duration', type=float, default=30, help='duração em segundos')
+    parser.add_argument('--search-users', type=int, default=8, help='usuários digitando buscas')
+    parser.add_argument('--uploaders', type=int, default=1, help='usuários enviando planilhas')
+    parser.add_argument('--upload-interval', type=float, default=5, help='segundos entre uploads por usuário')
+    parser.add_argument('--upload-rows', type=int, default=5000, help='linhas da planilha enviada')
+    parser.add_argument('--calc-users', type=int, default=1, help='usuários calculando custos')
+    parser.add_argument('--calc-interval', type=float, default=2, help='segundos entre cálculos por usuário')
+    parser.add_argument('--calc-rows', type=int, default=20000, help='produtos no payload de cálculo')
+    parser.add_argument('--background-users', type=int, default=2, help='usuários de sugestões/health')
+    parser.add_argument('--json', help='gravar o relatório em JSON')
+    args = parser.parse_args()
+
+    workbook = synthetic.build_workbook(args.upload_rows, messy=True)
+    payload = synthetic.build_cost_payload(args.calc_rows)
+
+    server = None
+    base_url = args.url
+    if not base_url:
+        port = free_port()
+        base_url = f'http://127.0.0.1:{port}'
+        server = start_server(port)
+
+    stats = LoadStats()
+    stop = threading.Event()
+    users = (
+        [threading.Thread(target=search_user, args=(base_url, stats, stop, n)) for n in range(args.search_users)]
+        + [threading.Thread(target=upload_user, args=(base_url, stats, stop, workbook, args.upload_interval))
+           for _ in range(args.uploaders)]
+        + [threading.Thread(target=calculation_user, args=(base_url, stats, stop, payload, args.calc_interval))
+           for _ in range(args.calc_users)]
+        + [threading.Thread(target=background_user, args=(base_url, stats, stop, 1000 + n))
+           for n in range(args.background_users)]
+    )
+
+    started = time.perf_counter()
+    try:
+        for user in users:
+            user.start()
+        stop.wait(args.duration)
+    finally:
+        stop.set()
+        for user in users:
+            user.join()
+        elapsed = time.perf_counter() - started
+        if server is not None:
+            stop_server(server)
+
+    report = stats.summary(elapsed)
+    print(f"Duração: {elapsed:.1f}s | workers: {os.environ.get('WEB_CONCURRENCY', 'padrão')} "
+          f"({os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')}) | {len(users)} usuários simulados\n")
+    print_summary(report)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as output:
+            json.dump({'duration_s': round(elapsed, 2), 'args': vars(args), 'endpoints': report}, output, indent=2)
+
+
+if __name__ == '__main__':
+    main()
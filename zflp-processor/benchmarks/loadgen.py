@@ -0,0 +1,184 @@
+"""
+Utilitários dos testes de carga: servidor local, cliente HTTP e estatísticas
+
+Só usa a biblioteca padrão; o app sobe com o mesmo gunicorn.conf.py de
+produção (Procfile), numa porta livre.
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import socket
+import threading
+import subprocess
+import http.client
+from collections import defaultdict
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int, env: Dict[str, str] = None, timeout: float = 30) -> subprocess.Popen:
+    """Subir gunicorn com gunicorn.conf.py e esperar /health responder"""
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py', 'src.main:app'],
+        cwd=ROOT, env=dict(os.environ, PORT=str(port), **(env or {})),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    client = HttpClient(f'http://127.0.0.1:{port}')
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if client.request('GET', '/health')[0] == 200:
+                return server
+        except OSError:
+            pass
+        time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError(f'gunicorn não respondeu em {timeout:.0f}s')
+
+
+def stop_server(server: subprocess.Popen):
+    server.terminate()
+    try:
+        server.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        server.kill()
+
+
+def multipart_body(field: str, filename: str, content: bytes, content_type: str = XLSX_MIMETYPE) -> Tuple[bytes, str]:
+    """Corpo multipart/form-data com um único arquivo: (corpo, Content-Type)"""
+    boundary = uuid.uuid4().hex
+    body = (
+        f'--{boundary}\r\n'
+        f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+        f'Content-Type: {content_type}\r\n\r\n'
+    ).encode() + content + f'\r\n--{boundary}--\r\n'.encode()
+    return body, f'multipart/form-data; boundary={boundary}'
+
+
+class HttpClient:
+    """Cliente HTTP/1.1 com conexão persistente (um por usuário simulado)"""
+
+    def __init__(self, base_url: str, timeout: float = 300):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.timeout = timeout
+        self._connection: Optional[http.client.HTTPConnection] = None
+
+    def request(self, method: str, path: str, body: bytes = None, headers: Dict[str, str] = None,
+                params: dict = None) -> Tuple[int, bytes]:
+        if params:
+            path = f'{path}?{urlencode(params)}'
+        if self._connection is None:
+            self._connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        try:
+            self._connection.request(method, path, body=body, headers=headers or {})
+            response = self._connection.getresponse()
+            return response.status, response.read()
+        except (OSError, http.client.HTTPException):
+            self.close()
+            raise
+
+    def post_json(self, path: str, payload) -> Tuple[int, bytes]:
+        return self.request('POST', path, json.dumps(payload).encode(), {'Content-Type': 'application/json'})
+
+    def upload(self, path: str, filename: str, content: bytes) -> Tuple[int, bytes]:
+        body, content_type = multipart_body('file', filename, content)
+        return self.request('POST', path, body, {'Content-Type': content_type})
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+def api_failed(body: bytes) -> bool:
+    """Resposta JSON com {"success": false}: a API devolve a maioria dos erros com HTTP 200"""
+    if not body or body[:1] != b'{' or b'"success"' not in body:
+        return False
+    try:
+        return json.loads(body).get('success') is False
+    except ValueError:
+        return False
+
+
+def percentile(sorted_values: list, p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+
+class LoadStats:
+    """Latências e status por endpoint, compartilhados entre as threads de carga"""
+
+    def __init__(self):
+        self._latencies = defaultdict(list)
+        self._statuses = defaultdict(lambda: defaultdict(int))
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, elapsed_ms: float, status):
+        with self._lock:
+            self._latencies[endpoint].append(elapsed_ms)
+            self._statuses[endpoint][str(status)] += 1
+
+    def timed(self, endpoint: str, func, *args):
+        """
+        Executar uma requisição registrando latência e status
+
+        Exceções contam como status = nome da exceção e respostas < 400 com
+        {"success": false} como "<status> success=false"; ambos entram como erro.
+        """
+        started = time.perf_counter()
+        try:
+            status, body = func(*args)
+        except Exception as e:
+            self.record(endpoint, (time.perf_counter() - started) * 1000, type(e).__name__)
+            return None, None
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if status < 400 and api_failed(body):
+            status = f'{status} success=false'
+        self.record(endpoint, elapsed_ms, status)
+        return status, body
+
+    def summary(self, elapsed: float) -> Dict[str, dict]:
+        with self._lock:
+            endpoints = {name: sorted(values) for name, values in self._latencies.items()}
+            statuses = {name: dict(counts) for name, counts in self._statuses.items()}
+
+        report = {}
+        for name, latencies in sorted(endpoints.items()):
+            errors = sum(count for status, count in statuses[name].items()
+                         if not status.isdigit() or int(status) >= 400)
+            report[name] = {
+                'requests': len(latencies),
+                'throughput_rps': round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+                'error_rate': round(errors / len(latencies), 4) if latencies else 0.0,
+                'statuses': statuses[name],
+                'p50_ms': round(percentile(latencies, 0.50), 2),
+                'p90_ms': round(percentile(latencies, 0.90), 2),
+                'p95_ms': round(percentile(latencies, 0.95), 2),
+                'p99_ms': round(percentile(latencies, 0.99), 2),
+                'max_ms': round(latencies[-1], 2) if latencies else 0.0
+            }
+        return report
+
+
+def print_summary(report: Dict[str, dict]):
+    print(f"{'endpoint':28s} {'req':>6s} {'req/s':>8s} {'erro%':>6s} {'p50':>8s} {'p95':>8s} {'p99':>8s} {'max':>8s}")
+    for name, row in report.items():
+        print(
+            f"{name:28s} {row['requests']:6d} {row['throughput_rps']:8.2f} {row['error_rate'] * 100:6.2f} "
+            f"{row['p50_ms']:8.1f} {row['p95_ms']:8.1f} {row['p99_ms']:8.1f} {row['max_ms']:8.1f}"
+        )
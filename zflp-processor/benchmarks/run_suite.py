@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Suíte de benchmarks dos pipelines de ingestão, custos e relatórios
+
+Mede, com dados sintéticos (benchmarks/synthetic.py):
+    process_file           planilhas de 1k/10k/100k linhas (limpa, formatos mistos, colunas extras)
+    detect_columns_robust  cabeçalhos normais e largos
+    /calculate-costs       payloads de 1k/10k/100k produtos (test client, sem servidor)
+    /search-products       buscas curtas e longas
+    ExcelGenerator         generate_excel_bytes
+    PDFGenerator           generate_pdf_bytes
+
+Os resultados (mediana, mínimo e média em ms por caso) são gravados em JSON;
+com --baseline, cada caso é comparado ao arquivo anterior e o script sai com
+código 1 se algum ficar mais lento que o limite (--threshold, padrão 15%).
+
+Uso:
+    python benchmarks/run_suite.py --output bench.json
+    python benchmarks/run_suite.py --sizes 1000,10000 --baseline bench.json
+    python benchmarks/run_suite.py --only process_file,pdf
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+os.environ.setdefault('LOG_LEVEL', 'ERROR')  # avisos por linha distorceriam os tempos
+os.environ.setdefault('CPU_OFFLOAD', '0')  # medir o trabalho no próprio processo
+
+import synthetic
+from main import create_app
+from services.excel_processor_robust import RobustExcelProcessor
+from services.excel_generator import ExcelGenerator
+from services.pdf_generator import PDFGenerator
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+WORKBOOK_VARIANTS = {
+    'clean': {},
+    'messy': {'messy': True},
+    'wide': {'wide': True}
+}
+
+
+def measure(func, repeat: int) -> dict:
+    """Executar func `repeat` vezes (após uma execução de aquecimento) e resumir em ms"""
+    func()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return {
+        'median_ms': round(statistics.median(samples), 3),
+        'min_ms': round(min(samples), 3),
+        'mean_ms': round(statistics.fmean(samples), 3),
+        'repeat': repeat
+    }
+
+
+def repeat_for(rows: int) -> int:
+    return 10 if rows <= 1000 else 3 if rows <= 10000 else 1
+
+
+def bench_process_file(sizes, workdir):
+    processor = RobustExcelProcessor()
+    for rows in sizes:
+        for variant, options in WORKBOOK_VARIANTS.items():
+            path = os.path.join(workdir, f'{variant}_{rows}.xlsx')
+            with open(path, 'wb') as output:
+                output.write(synthetic.build_workbook(rows, **options))
+
+            def run():
+                result = processor.process_file(path)
+                assert result['success'], result.get('error')
+
+            yield f'process_file[{variant}-{rows}]', measure(run, repeat_for(rows))
+
+
+def bench_detect_columns(sizes, workdir):
+    processor = RobustExcelProcessor()
+    for variant in ('clean', 'wide'):
+        df = processor.clean_dataframe(synthetic.build_dataframe(1000, **WORKBOOK_VARIANTS[variant]))
+        yield f'detect_columns_robust[{variant}]', measure(lambda: processor.detect_columns_robust(df), 50)
+
+
+def bench_calculate_costs(sizes, workdir):
+    client = create_app().test_client()
+    for rows in sizes:
+        payload = synthetic.build_cost_payload(rows)
+
+        def run():
+            response = client.post('/api/calculate-costs', json=payload)
+            assert response.status_code == 200 and response.json['success']
+
+        yield f'calculate_costs[{rows}]', measure(run, repeat_for(rows))
+
+
+def bench_search_products(sizes, workdir):
+    client = create_app().test_client()
+    for query in ('20', '205/55R16', 'pirelli'):
+        def run():
+            assert client.get('/api/search-products', query_string={'q': query, 'limit': 20}).status_code == 200
+
+        yield f'search_products[{query}]', measure(run, 200)
+
+
+def bench_excel(sizes, workdir):
+    for rows in sizes:
+        data = synthetic.build_report_data(rows)
+        yield f'excel_generator[{rows}]', measure(lambda: ExcelGenerator().generate_excel_bytes(data), repeat_for(rows))
+
+
+def bench_pdf(sizes, workdir):
+    for rows in sizes:
+        data = synthetic.build_report_data(rows)
+        yield f'pdf_generator[{rows}]', measure(lambda: PDFGenerator().generate_pdf_bytes(data), repeat_for(rows))
+
+
+BENCHMARKS = {
+    'process_file': bench_process_file,
+    'detect_columns': bench_detect_columns,
+    'calculate_costs': bench_calculate_costs,
+    'search_products': bench_search_products,
+    'excel': bench_excel,
+    'pdf': bench_pdf
+}
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Casos mais lentos que o baseline além do limite: (caso, baseline ms, atual ms, variação)"""
+    regressions = []
+    for case, current in results.items():
+        previous = baseline.get(case)
+        if not previous:
+            continue
+        change = current['median_ms'] / previous['median_ms'] - 1 if previous['median_ms'] else 0
+        marker = 'REGRESSÃO' if change > threshold else ''
+        print(f"{case:45s} {previous['median_ms']:10.2f} -> {current['median_ms']:10.2f} ms  {change:+7.1%} {marker}")
+        if change > threshold:
+            regressions.append((case, previous['median_ms'], current['median_ms'], change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Suíte de benchmarks do ZFLP Processor')
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)), help='linhas por caso (ex.: 1000,10000)')
+    parser.add_argument('--only', default='', help=f"grupos a executar ({', '.join(BENCHMARKS)})")
+    parser.add_argument('--output', default='benchmark_results.json', help='arquivo JSON de saída')
+    parser.add_argument('--baseline', help='JSON de uma execução anterior para comparação')
+    parser.add_argument('--threshold', type=float, default=0.15, help='aumento tolerado da mediana (0.15 = 15%%)')
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',') if size]
+    groups = [group for group in args.only.split(',') if group] or list(BENCHMARKS)
+    unknown = [group for group in groups if group not in BENCHMARKS]
+    if unknown:
+        parser.error(f"grupos desconhecidos: {', '.join(unknown)}")
+
+    results = {}
+    workdir = tempfile.mkdtemp(prefix='zflp-bench-')
+    try:
+        for group in groups:
+            for case, summary in BENCHMARKS[group](sizes, workdir):
+                results[case] = summary
+                print(f"{case:45s} {summary['median_ms']:10.2f} ms (min {summary['min_ms']:.2f}, n={summary['repeat']})")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'sizes': sizes
+        },
+        'results': results
+    }
+    with open(args.output, 'w', encoding='utf-8') as output:
+        json.dump(report, output, indent=2)
+    print(f"\nResultados gravados em {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as source:
+            baseline = json.load(source)['results']
+        print(f"\nComparação com {args.baseline} (limite {args.threshold:.0%}):")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} caso(s) acima do limite")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+"""
+Geradores de dados sintéticos para os benchmarks
+
+Planilhas de fornecedor (limpas, com números em formatos variados ou com
+muitas colunas extras), payloads de /calculate-costs e dados de relatório,
+todos determinísticos para que execuções diferentes sejam comparáveis.
+"""
+
+import io
+import random
+from typing import List
+
+import pandas as pd
+
+BRANDS = ('LINGLONG', 'PIRELLI', 'MICHELIN', 'BRIDGESTONE', 'GOODYEAR')
+SIZES = ('205/55R16 91V', '185/65R15 88H', '225/45R17 94W', '265/70R16 112T', '175/70R14 84T')
+
+# Mesmo valor escrito como aparece em planilhas reais de fornecedores
+MESSY_PRICE_FORMATS = (
+    lambda v: v,
+    lambda v: f'$ {v:,.2f}'.replace(',', 'X').replace('.', ',').replace('X', '.'),
+    lambda v: f'{v:,.2f}',
+    lambda v: f'US$ {v:.2f}'.replace('.', ','),
+    lambda v: f'  {v:.1f}  ',
+    lambda v: 'N/A',
+    lambda v: '',
+    lambda v: f'{v:.2f}.0.1',
+)
+MESSY_QUANTITY_FORMATS = (
+    lambda q: q,
+    lambda q: f'{q} pcs',
+    lambda q: f'{q},0',
+    lambda q: str(q),
+)
+
+
+def product_name(i: int) -> str:
+    return f'{SIZES[i % len(SIZES)]} PRODUTO {i}'
+
+
+def build_dataframe(rows: int, messy: bool = False, wide: bool = False, seed: int = 42) -> pd.DataFrame:
+    """
+    Planilha de produtos no formato de entrada de /upload
+
+    messy: preços e quantidades em formatos mistos (moeda, separadores, texto inválido)
+    wide: 40 colunas extras com cabeçalhos longos, com as colunas úteis no meio
+    """
+    rng = random.Random(seed)
+    quantities = [rng.randint(1, 40) for _ in range(rows)]
+    prices = [round(rng.uniform(20, 250), 2) for _ in range(rows)]
+
+    if messy:
+        quantities = [MESSY_QUANTITY_FORMATS[i % len(MESSY_QUANTITY_FORMATS)](q) for i, q in enumerate(quantities)]
+        prices = [MESSY_PRICE_FORMATS[i % len(MESSY_PRICE_FORMATS)](p) for i, p in enumerate(prices)]
+
+    columns = {
+        'Produto': [product_name(i) for i in range(rows)],
+        'Marca': [BRANDS[i % len(BRANDS)] for i in range(rows)],
+        'Quantidade': quantities,
+        'Valor Unitário FOB': prices
+    }
+
+    if not wide:
+        return pd.DataFrame(columns)
+
+    extra = {
+        f'Observação logística {n:02d} - informação complementar do embarque': [f'obs {n}-{i % 7}' for i in range(rows)]
+        for n in range(40)
+    }
+    names = list(extra)
+    ordered = {**{name: extra[name] for name in names[:20]}, **columns, **{name: extra[name] for name in names[20:]}}
+    return pd.DataFrame(ordered)
+
+
+def build_workbook(rows: int, messy: bool = False, wide: bool = False) -> bytes:
+    """Conteúdo .xlsx de build_dataframe"""
+    buffer = io.BytesIO()
+    build_dataframe(rows, messy, wide).to_excel(buffer, index=False)
+    return buffer.getvalue()
+
+
+def build_products(rows: int) -> List[dict]:
+    """Produtos no formato de resposta de /upload (entrada de /calculate-costs)"""
+    products = []
+    for i in range(rows):
+        quantity = i % 40 + 1
+        unit_cost = round(35.5 + (i % 500) * 0.37, 2)
+        products.append({
+            'name': product_name(i),
+            'brand': BRANDS[i % len(BRANDS)],
+            'quantity': quantity,
+            'unit_cost': unit_cost,
+            'total': round(quantity * unit_cost, 2)
+        })
+    return products
+
+
+def build_cost_payload(rows: int) -> dict:
+    """Payload de /calculate-costs com custos fixos, variáveis e tributos"""
+    return {
+        'products': build_products(rows),
+        'fixedCosts': [
+            {'activo': True, 'tipo': 'valor', 'descripcion': f'Custo fixo {n}', 'valor': 1000 + n * 50}
+            for n in range(10)
+        ],
+        'variableCosts': [
+            {'activo': True, 'tipo': 'porcentaje', 'base': 'CIF', 'descripcion': f'Custo variável {n}', 'valor': 0.5 + n * 0.1}
+            for n in range(10)
+        ],
+        'taxes': [
+            {'activo': True, 'tipo': 'porcentaje', 'base': 'CIF', 'descripcion': 'IVA', 'valor': 21},
+            {'activo': True, 'tipo': 'porcentaje', 'base': 'CIF', 'descripcion': 'Derechos', 'valor': 16}
+        ],
+        'freightValue': 4500,
+        'insurancePercentage': 1
+    }
+
+
+def build_report_data(rows: int) -> dict:
+    """Dados no formato dos geradores de relatório (ExcelGenerator/PDFGenerator)"""
+    products = [
+        {'produto': p['name'], 'marca': p['brand'], 'quantidade': p['quantity'], 'fob': p['unit_cost'], 'total': p['total']}
+        for p in build_products(rows)
+    ]
+    total_products = round(sum(p['total'] for p in products), 2)
+    costs = [{'item': f'Custo {n}', 'percentual': 2.5 if n % 2 else 0, 'valor': 500.0 + n} for n in range(15)]
+    total_costs = round(sum(c['valor'] for c in costs), 2)
+    return {
+        'metadata': {'filename': f'benchmark_{rows}.xlsx', 'processed_at': '2025-06-05T10:00:00'},
+        'local_currency': 'USD',
+        'summary': {'mercadoria': total_products, 'frete_seguro': 4545.0, 'cif': total_products + 4545.0,
+                    'custo_total': total_products + 4545.0 + total_costs},
+        'products': products,
+        'costs': costs,
+        'totals': {'total_produtos': total_products, 'total_quantidade': sum(p['quantidade'] for p in products),
+                   'total_custos': total_costs, 'custo_total': total_products + 4545.0 + total_costs}
+    }
@@ -0,0 +1,56 @@
+"""
+Configuração do gunicorn (Procfile: gunicorn --config gunicorn.conf.py src.main:app)
+
+Endpoints leves (busca, sugestões, health) são atendidos pelas threads do
+worker; leitura de planilhas e geração de relatórios rodam no pool de
+processos (services/worker_pool, CPU_WORKERS / CPU_OFFLOAD), então uma
+requisição pesada não segura o GIL do worker que atende as demais.
+
+Variáveis de ambiente:
+    PORT                   porta HTTP (padrão 8000)
+    WEB_CONCURRENCY        processos worker do gunicorn (padrão 1)
+    GUNICORN_WORKER_CLASS  gthread (padrão), sync, gevent ou eventlet
+    GUNICORN_THREADS       threads por worker com gthread (padrão 8)
+    GUNICORN_CONNECTIONS   conexões simultâneas por worker com gevent/eventlet (padrão 500)
+    GUNICORN_TIMEOUT       segundos até um worker travado ser reiniciado (padrão 120)
+    WARMUP                 aquecer cada worker antes de aceitar conexões (padrão 1)
+    CPU_WORKERS            processos do pool de CPU por worker (padrão: núcleos / WEB_CONCURRENCY)
+    UPLOAD_STORE_DIR       diretório dos uploads, compartilhado entre os workers
+
+Dimensionamento: cada worker do gunicorn tem o seu próprio pool de processos,
+então o host roda WEB_CONCURRENCY × CPU_WORKERS processos de CPU; o padrão de
+CPU_WORKERS divide os núcleos entre os workers para não passar disso. Um
+worker com várias threads já atende os endpoints leves (o trabalho pesado vai
+para o pool), por isso o padrão é 1 worker e a escala vem de GUNICORN_THREADS.
+Com mais workers, os uploads continuam visíveis a todos via UPLOAD_STORE_DIR
+(precisa ser um diretório local comum a eles); o cache de relatórios
+renderizados é de cada worker.
+
+Cada worker roda o warm-up (services/warmup) em post_worker_init, depois de
+carregar o app e antes de aceitar conexões: imports pesados, índice do
+catálogo, uma planilha sintética e o pool de processos. /ready mostra o
+resultado e a duração de cada etapa.
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+worker_connections = int(os.environ.get('GUNICORN_CONNECTIONS', 500))
+
+# Uploads grandes e relatórios longos podem passar de 30s (padrão do gunicorn)
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+graceful_timeout = 30
+keepalive = 5
+
+# Lido por services/warmup: o warm-up fica a cargo de post_worker_init (herdado pelos workers)
+os.environ['WARMUP_ON_WORKER_INIT'] = '1'
+
+
+def post_worker_init(worker):
+    # src/ já está no sys.path: o app (src.main) foi carregado antes deste hook
+    from services.warmup import warmup_state
+    warmup_state.run()
@@ -0,0 +1,120 @@
+import json
+import logging
+from decimal import Decimal
+from typing import Any
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy vem com pandas
+    np = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Opções do orjson usadas pelo caminho rápido; uma versão sem alguma delas
+# (requirements fixa 3.9.10, mas o ambiente pode ter outra) usa o json padrão
+ORJSON_REQUIRED_OPTIONS = (
+    "OPT_SERIALIZE_NUMPY", "OPT_NON_STR_KEYS", "OPT_PASSTHROUGH_DATETIME", "OPT_SORT_KEYS", "OPT_INDENT_2"
+)
+if orjson is not None and not all(hasattr(orjson, option) for option in ORJSON_REQUIRED_OPTIONS):
+    logger.warning(
+        "orjson %s sem as opções necessárias; usando json padrão", getattr(orjson, "__version__", "?")
+    )
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    """Serializar tipos extras (escalares/arrays numpy, Decimal) e delegar o resto ao Flask"""
+    if np is not None:
+        if isinstance(obj, np.generic):
+            return obj.item()
+        if isinstance(obj, np.ndarray):
+            return obj.tolist()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    return DefaultJSONProvider.default(obj)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Provider JSON da aplicação
+
+    Usa orjson quando instalado (numpy nativo, saída em bytes) e cai para o
+    json da biblioteca padrão caso contrário, com o mesmo tratamento de tipos.
+    A saída é UTF-8 nos dois caminhos (ensure_ascii=False); quem pedir
+    ensure_ascii=True explicitamente recebe o json padrão.
+
+    Na entrada, o orjson só é usado para JSON estrito: corpos com NaN/Infinity
+    (aceitos pelo json padrão e por clientes que serializam floats do Python)
+    são lidos pelo json padrão, como antes.
+    """
+
+    default = staticmethod(_default)
+
+    # Manter a ordem de inserção: ordenar chaves só custa tempo nas listas grandes
+    sort_keys = False
+
+    # orjson sempre gera UTF-8; o json padrão segue o mesmo formato
+    ensure_ascii = False
+
+    # Argumentos de json.dumps que o caminho rápido sabe reproduzir
+    _FAST_KWARGS = {"indent", "separators", "default", "ensure_ascii", "sort_keys"}
+
+    @property
+    def backend(self) -> str:
+        return "orjson" if orjson is not None else "json"
+
+    def _orjson_options(self, indent: Any = None, sort_keys: bool = None) -> int:
+        options = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys if sort_keys is None else sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumps_bytes(self, obj: Any, **kwargs: Any) -> bytes:
+        """Serializar diretamente para bytes UTF-8 (evita decode/encode no caminho rápido)"""
+        if orjson is not None and set(kwargs) <= self._FAST_KWARGS and not kwargs.get("ensure_ascii"):
+            try:
+                return orjson.dumps(
+                    obj,
+                    default=kwargs.get("default", self.default),
+                    option=self._orjson_options(kwargs.get("indent"), kwargs.get("sort_keys"))
+                )
+            except TypeError as e:
+                # Ex.: inteiros acima de 64 bits; o json padrão resolve
+                logger.debug("orjson falhou, usando json padrão: %s", e)
+        return super().dumps(obj, **kwargs).encode("utf-8")
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if orjson is None:
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj, **kwargs).decode("utf-8")
+
+    def loads(self, s: Any, **kwargs: Any) -> Any:
+        if orjson is not None and not kwargs:
+            try:
+                return orjson.loads(s)
+            except orjson.JSONDecodeError:
+                # NaN/Infinity e afins: o json padrão aceita (ou gera o erro de sempre)
+                pass
+        return json.loads(s, **kwargs)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        dump_args = {}
+
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            dump_args["indent"] = 2
+        else:
+            dump_args["separators"] = (",", ":")
+
+        return self._app.response_class(
+            self.dumps_bytes(obj, **dump_args) + b"\n", mimetype=self.mimetype
+        )
@@ -0,0 +1,206 @@
+"""
+Configuração central de logging
+
+Todos os módulos só fazem logging.getLogger(__name__); handlers e formato são
+definidos aqui, uma vez, por configure_logging() (chamado em create_app).
+
+Os registros vão para uma fila (DeferredFormatQueueHandler) e uma thread
+separada (QueueListener) formata e escreve em stderr, então a thread da
+requisição nunca espera por I/O de log nem gasta tempo serializando JSON.
+Em processos filhos (pool de processos, workers do gunicorn com preload) a
+fila e a thread são recriadas após o fork.
+
+Variáveis de ambiente:
+    LOG_LEVEL   nível mínimo (padrão INFO)
+    LOG_FORMAT  json (padrão) ou text
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
+import weakref
+import logging.handlers
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json').lower()
+
+# Atributos padrão de LogRecord; o que sobrar veio de `extra=` e entra no JSON
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'taskName'}
+
+# Limitadores ativos, para esvaziar os resumos pendentes no encerramento
+_rate_limiters: "weakref.WeakSet[LogRateLimiter]" = weakref.WeakSet()
+
+
+class JSONFormatter(logging.Formatter):
+    """Um objeto JSON por linha: horário, nível, logger, mensagem, campos extras e exceção"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'process': record.process,
+            'thread': record.threadName
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class LogRateLimiter:
+    """
+    Limitar mensagens repetitivas (ex.: um aviso por linha da planilha)
+
+    Aceita até `limit` mensagens por janela de `interval` segundos; as demais
+    são apenas contadas e resumidas numa única linha quando a janela termina
+    (um timer garante o resumo mesmo que nenhuma mensagem nova chegue) ou no
+    encerramento do logging (stop_logging).
+    """
+
+    def __init__(self, limit: int = 10, interval: float = 60.0):
+        self.limit = limit
+        self.interval = interval
+        self._window_started = time.monotonic()
+        self._emitted = 0
+        self._suppressed = 0
+        self._target: Optional[Tuple[logging.Logger, int]] = None
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+        _rate_limiters.add(self)
+
+    def log(self, logger: logging.Logger, level: int, msg: str, *args):
+        if not logger.isEnabledFor(level):
+            return
+
+        with self._lock:
+            summary = self._roll_window(time.monotonic())
+            emit = self._emitted < self.limit
+            if emit:
+                self._emitted += 1
+            else:
+                self._suppressed += 1
+                self._target = (logger, level)
+                self._schedule_flush()
+
+        if summary:
+            self._report(*summary)
+        if emit:
+            logger.log(level, msg, *args)
+
+    def flush(self):
+        """Emitir o resumo pendente (fim da janela ou encerramento)"""
+        with self._lock:
+            summary = self._roll_window(time.monotonic(), force=True)
+        if summary:
+            self._report(*summary)
+
+    def _roll_window(self, now: float, force: bool = False) -> Optional[Tuple[int, logging.Logger, int]]:
+        """Encerrar a janela vencida (ou, com force, só recolher o pendente); chamado com o lock"""
+        expired = now - self._window_started >= self.interval
+        if not expired and not force:
+            return None
+        summary = (self._suppressed, *self._target) if self._suppressed and self._target else None
+        self._suppressed, self._target = 0, None
+        if expired:
+            self._window_started, self._emitted = now, 0
+        return summary
+
+    def _schedule_flush(self):
+        # Um timer por janela; após um fork o timer do pai não existe no filho (is_alive False)
+        if self._timer is not None and self._timer.is_alive():
+            return
+        delay = max(0.0, self._window_started + self.interval - time.monotonic())
+        self._timer = threading.Timer(delay, self.flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _report(self, suppressed: int, logger: logging.Logger, level: int):
+        logger.log(level, "%d mensagens semelhantes suprimidas nos últimos %.0fs", suppressed, self.interval)
+
+
+class DeferredFormatQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler que não formata na thread de quem registra
+
+    O QueueHandler padrão monta a mensagem (e o traceback) em prepare(), no
+    thread da requisição, para o registro poder ser serializado; a fila aqui
+    é só em memória, então o registro segue intacto e toda a formatação
+    (mensagem, JSON, exceção) acontece na thread do QueueListener. Por isso
+    os argumentos de um log não devem ser alterados depois da chamada.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[logging.handlers.QueueHandler] = None
+_lock = threading.Lock()
+
+
+def _build_output_handler() -> logging.Handler:
+    handler = logging.StreamHandler(sys.stderr)
+    if LOG_FORMAT == 'text':
+        handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+    else:
+        handler.setFormatter(JSONFormatter())
+    return handler
+
+
+def _start_listener():
+    """Criar fila, QueueHandler no root e a thread que escreve os registros"""
+    global _listener, _queue_handler
+    root = logging.getLogger()
+    if _queue_handler is not None:
+        root.removeHandler(_queue_handler)
+
+    log_queue = queue.SimpleQueue()
+    _queue_handler = DeferredFormatQueueHandler(log_queue)
+    _listener = logging.handlers.QueueListener(log_queue, _build_output_handler(), respect_handler_level=True)
+    root.addHandler(_queue_handler)
+    _listener.start()
+
+
+def _restart_after_fork():
+    # A thread do listener não sobrevive ao fork; a fila antiga pode ter ficado travada
+    if _listener is not None:
+        _start_listener()
+
+
+def stop_logging():
+    """Emitir resumos pendentes, esvaziar a fila e parar a thread de escrita (ex.: no encerramento)"""
+    global _listener
+    for limiter in list(_rate_limiters):
+        limiter.flush()
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def configure_logging(level: str = None):
+    """Configurar o logging do processo (idempotente)"""
+    with _lock:
+        logging.getLogger().setLevel(level or LOG_LEVEL)
+        if _listener is not None:
+            return
+
+        # Substitui handlers instalados antes (ex.: logging.basicConfig de scripts)
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+
+        _start_listener()
+        os.register_at_fork(after_in_child=_restart_after_fork)
+        atexit.register(stop_logging)
@@ -5,15 +5,50 @@ import sys
 current_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(current_dir)
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
+from routes.upload import upload_bp
+from routes.export import export_bp
+from json_provider import FastJSONProvider
+from logging_config import configure_logging
+from request_metrics import install_request_metrics
+from request_profiler import install_request_profiler
+from request_limits import install_request_limits, install_admission_control
+from response_compression import install_response_compression
+from services.metrics import metrics, PROMETHEUS_MIMETYPE
+from services.warmup import WARMUP_ON_WORKER_INIT, warmup_state
 
 def create_app():
+    # Logging JSON assíncrono (fila + thread de escrita), configurado uma única vez
+    configure_logging()
+    
     app = Flask(__name__)
     
+    # Serialização JSON rápida (orjson quando disponível, tipos numpy nativos)
+    app.json = FastJSONProvider(app)
+    
     # Configurar CORS
     CORS(app, origins="*", methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"])
     
+    # Latência e tamanhos por rota (expostos em /metrics)
+    install_request_metrics(app)
+    
+    # gzip/brotli conforme Accept-Encoding (depois das métricas: elas medem o corpo comprimido)
+    install_response_compression(app)
+    
+    # Corpos grandes demais são recusados antes de serem lidos
+    install_request_limits(app)
+    
+    # /upload e /calculate-costs: concorrência limitada, fila curta e 503 rápido
+    install_admission_control(app)
+    
+    # Perfil sob demanda (cabeçalho X-Profile; só com PROFILING_ENABLED=1)
+    install_request_profiler(app)
+    
+    # Rotas da API (o frontend chama /api/*)
+    app.register_blueprint(upload_bp, url_prefix="/api")
+    app.register_blueprint(export_bp, url_prefix="/api")
+    
     @app.route("/")
     def home():
         return jsonify({
@@ -22,7 +57,11 @@ def create_app():
             "status": "online",
             "endpoints": {
                 "health": "/health",
-                "test": "/test"
+                "ready": "/ready",
+                "test": "/test",
+                "metrics": "/metrics",
+                "catalog": "/api/catalog",
+                "api": "/api"
             }
         })
     
@@ -34,6 +73,23 @@ def create_app():
             "version": "2.0"
         })
     
+    if not WARMUP_ON_WORKER_INIT:
+        # Sem o hook do gunicorn: aquecer em segundo plano a partir da primeira requisição
+        @app.before_request
+        def start_warmup():
+            if warmup_state.status == 'pending':
+                warmup_state.start_background()
+    
+    @app.route("/ready")
+    def ready():
+        # /health diz que o processo responde; /ready, que o warm-up terminou
+        state = warmup_state.snapshot()
+        return jsonify(state), 200 if state["ready"] else 503
+    
+    @app.route("/metrics")
+    def prometheus_metrics():
+        return Response(metrics.render(), content_type=PROMETHEUS_MIMETYPE)
+    
     @app.route("/test")
     def test():
         return jsonify({
@@ -48,4 +104,6 @@ app = create_app()
 
 if __name__ == "__main__":
     port = int(os.environ.get('PORT', 5001))
+    # Aquecer já na inicialização, sem esperar a primeira requisição
+    warmup_state.start_background()
     app.run(host="0.0.0.0", port=port, debug=False)
@@ -0,0 +1,81 @@
+import os
+
+from flask import Flask, g, request
+
+from services.admission import admission_controller
+from services.upload_limits import UPLOAD_MAX_BYTES
+from services.upload_stream import MULTIPART_OVERHEAD_BYTES
+from routes.upload import create_error_response
+
+# Tamanho máximo do corpo das demais requisições (JSON de /calculate-costs, lotes, ...)
+REQUEST_MAX_BYTES = int(os.environ.get('REQUEST_MAX_BYTES', 64 * 1024 * 1024))
+
+# Limites específicos por endpoint (nome do endpoint Flask -> bytes)
+ENDPOINT_MAX_BYTES = {
+    'upload.upload_file': UPLOAD_MAX_BYTES + MULTIPART_OVERHEAD_BYTES
+}
+
+# Endpoints pesados sujeitos ao controle de admissão; busca, sugestões e health ficam de fora.
+# /export/<tipo>/<upload_id> só disputa vaga quando o relatório não está em cache (na própria rota)
+ADMISSION_ENDPOINTS = frozenset({
+    'upload.upload_file',
+    'upload.calculate_costs',
+    'upload.calculate_costs_bulk',
+    'export.export_batch'
+})
+
+# Segundos sugeridos ao cliente no Retry-After de um 503
+ADMISSION_RETRY_AFTER = int(os.environ.get('ADMISSION_RETRY_AFTER', 5))
+
+
+def install_request_limits(app: Flask):
+    """
+    Recusar corpos grandes demais antes de qualquer leitura
+
+    Com Content-Length, a checagem acontece antes do handler (413 imediato).
+    Sem ele (chunked), MAX_CONTENT_LENGTH faz o Werkzeug interromper a leitura
+    assim que o limite é ultrapassado.
+    """
+    app.config['MAX_CONTENT_LENGTH'] = max(REQUEST_MAX_BYTES, *ENDPOINT_MAX_BYTES.values())
+
+    @app.before_request
+    def reject_oversized_request():
+        limit = ENDPOINT_MAX_BYTES.get(request.endpoint, REQUEST_MAX_BYTES)
+        if request.content_length is not None and request.content_length > limit:
+            return create_error_response(
+                f"Requisição muito grande. Máximo: {limit / 1024 / 1024:.1f}MB", "request_size"
+            ), 413
+
+
+def server_busy_response():
+    """503 com Retry-After para requisição pesada sem vaga no controle de admissão"""
+    response = create_error_response(
+        "Servidor ocupado processando outras planilhas. Tente novamente em instantes.",
+        "server_busy"
+    )
+    response.status_code = 503
+    response.headers['Retry-After'] = str(ADMISSION_RETRY_AFTER)
+    return response
+
+
+def install_admission_control(app: Flask):
+    """
+    Limitar requisições pesadas simultâneas (services/admission)
+
+    Sem vaga dentro do prazo, a resposta é 503 com Retry-After; a vaga é
+    liberada no teardown, depois que a resposta (inclusive em streaming) termina.
+    """
+
+    @app.before_request
+    def admit_heavy_request():
+        if request.endpoint not in ADMISSION_ENDPOINTS or request.method == "OPTIONS":
+            return None
+        if not admission_controller.acquire():
+            return server_busy_response()
+        g.admitted = True
+        return None
+
+    @app.teardown_request
+    def release_admission(_exc):
+        if g.pop('admitted', False):
+            admission_controller.release()
@@ -0,0 +1,80 @@
+import time
+from typing import Callable, Iterable, Iterator
+
+from flask import Flask, Response, g, request
+
+from services.metrics import HTTP_REQUESTS, HTTP_LATENCY, HTTP_REQUEST_SIZE, HTTP_RESPONSE_SIZE
+
+
+def _route_label() -> str:
+    """Regra da rota (ex.: /api/export/<report_type>/<upload_id>), nunca a URL concreta"""
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+
+class _CountingBody:
+    """
+    Repassar o corpo em streaming contando bytes; on_close recebe o total em close()
+
+    Classe com close() em vez de gerador com finally: o servidor WSGI sempre
+    chama close(), e um gerador abandonado seria finalizado pelo coletor de
+    lixo em qualquer ponto, inclusive com o lock de uma métrica já adquirido
+    na mesma thread (observe() travaria esperando por ele mesmo).
+    """
+
+    def __init__(self, body: Iterable[bytes], original: Iterable, on_close: Callable[[int], None]):
+        self._body = body
+        self._original = original
+        self._on_close = on_close
+        self._size = 0
+        self._closed = False
+
+    def __iter__(self) -> Iterator[bytes]:
+        for chunk in self._body:
+            self._size += len(chunk)
+            yield chunk
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            close = getattr(self._original, 'close', None)
+            if close is not None:
+                close()
+        finally:
+            self._on_close(self._size)
+
+
+def install_request_metrics(app: Flask):
+    """
+    Registrar latência, tamanho da requisição e da resposta por rota
+
+    Respostas com tamanho conhecido são registradas no after_request; nas em
+    streaming (NDJSON, ZIP) o corpo é embrulhado e a latência e o tamanho são
+    registrados quando o último byte sai.
+    """
+
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def record_request_metrics(response: Response):
+        started = g.pop('request_started', None)
+        if started is None:
+            return response
+
+        method, route, status = request.method, _route_label(), str(response.status_code)
+        HTTP_REQUESTS.inc(method, route, status)
+        HTTP_REQUEST_SIZE.observe(request.content_length or 0, method, route)
+
+        def finish(size: int):
+            HTTP_LATENCY.observe(time.perf_counter() - started, method, route)
+            HTTP_RESPONSE_SIZE.observe(size, method, route)
+
+        if response.is_streamed and not response.direct_passthrough:
+            original = response.response
+            response.response = _CountingBody(response.iter_encoded(), original, finish)
+        else:
+            finish(response.content_length or 0)
+        return response
@@ -0,0 +1,235 @@
+"""
+Perfilamento opcional por requisição
+
+Desativado por padrão. Com PROFILING_ENABLED=1, uma requisição com o cabeçalho
+`X-Profile: sample` (amostragem de pilhas) ou `X-Profile: cprofile`
+(determinístico) roda sob o profiler e o resultado é salvo em PROFILE_DIR
+com o id da requisição:
+
+    <id>.collapsed  pilhas no formato "a;b;c contagem" (flamegraph.pl, speedscope)
+    <id>.prof       pstats do cProfile (snakeviz, flameprof, pstats)
+
+O id vem do cabeçalho X-Request-ID (ou é gerado) e volta na resposta em
+X-Request-ID e X-Profile-Id. Limites para uso em produção:
+
+    PROFILING_TOKEN            se definido, X-Profile-Token precisa conferir
+    PROFILE_MAX_PER_MINUTE     perfis por minuto por processo (padrão 6)
+    PROFILE_MAX_CONCURRENT     perfis simultâneos por processo (padrão 1; cprofile é sempre 1)
+    PROFILE_SAMPLE_INTERVAL_MS intervalo da amostragem de pilhas (padrão 5)
+    PROFILE_KEEP               arquivos mantidos em PROFILE_DIR (padrão 200)
+
+Durante o perfil, o trabalho pesado (run_cpu_bound) roda na própria thread
+para aparecer no resultado. Em respostas em streaming só o handler é medido.
+"""
+
+import os
+import re
+import sys
+import time
+import uuid
+import cProfile
+import logging
+import tempfile
+import threading
+from collections import Counter, deque
+from typing import Optional
+
+from flask import Flask, Response, g, request
+
+from services.worker_pool import set_cpu_inline
+
+logger = logging.getLogger(__name__)
+
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', '0').lower() in ('1', 'true', 'yes')
+PROFILING_TOKEN = os.environ.get('PROFILING_TOKEN', '')
+PROFILE_DIR = os.environ.get('PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'zflp-profiles'))
+PROFILE_MAX_PER_MINUTE = int(os.environ.get('PROFILE_MAX_PER_MINUTE', 6))
+PROFILE_MAX_CONCURRENT = int(os.environ.get('PROFILE_MAX_CONCURRENT', 1))
+PROFILE_SAMPLE_INTERVAL = float(os.environ.get('PROFILE_SAMPLE_INTERVAL_MS', 5)) / 1000
+PROFILE_KEEP = int(os.environ.get('PROFILE_KEEP', 200))
+
+PROFILE_MODES = ('sample', 'cprofile')
+_REQUEST_ID_PATTERN = re.compile(r'^[A-Za-z0-9_.-]{1,64}$')
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Amostrar periodicamente a pilha de uma thread e acumular pilhas colapsadas"""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def dump(self, path: str):
+        with open(path, 'w', encoding='utf-8') as output:
+            for stack, count in self.stacks.most_common():
+                output.write(f"{stack} {count}\n")
+
+
+class ProfileSession:
+    """Perfil de uma requisição: inicia o profiler escolhido e grava o arquivo ao final"""
+
+    def __init__(self, request_id: str, mode: str):
+        self.request_id = request_id
+        self.mode = mode
+        self._profiler = None
+
+    def start(self):
+        set_cpu_inline(True)
+        if self.mode == 'cprofile':
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        else:
+            self._profiler = StackSampler(threading.get_ident(), PROFILE_SAMPLE_INTERVAL)
+            self._profiler.start()
+
+    def finish(self) -> str:
+        set_cpu_inline(False)
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        if self.mode == 'cprofile':
+            self._profiler.disable()
+            path = os.path.join(PROFILE_DIR, f"{self.request_id}.prof")
+            self._profiler.dump_stats(path)
+        else:
+            self._profiler.stop()
+            path = os.path.join(PROFILE_DIR, f"{self.request_id}.collapsed")
+            self._profiler.dump(path)
+        return path
+
+
+class ProfileLimiter:
+    """
+    Limite de perfis por minuto e simultâneos (por processo)
+
+    O cProfile fica limitado a um por vez independentemente de max_concurrent:
+    a partir do Python 3.12 só um profiler determinístico pode estar ativo no
+    processo (sys.monitoring), e um segundo enable() levantaria ValueError.
+    """
+
+    def __init__(self, max_per_minute: int, max_concurrent: int):
+        self.max_per_minute = max_per_minute
+        self.max_concurrent = max_concurrent
+        self._started = deque()
+        self._active = 0
+        self._active_cprofile = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, mode: str = 'sample') -> bool:
+        now = time.monotonic()
+        with self._lock:
+            while self._started and now - self._started[0] > 60:
+                self._started.popleft()
+            if len(self._started) >= self.max_per_minute or self._active >= self.max_concurrent:
+                return False
+            if mode == 'cprofile' and self._active_cprofile:
+                return False
+            self._started.append(now)
+            self._active += 1
+            if mode == 'cprofile':
+                self._active_cprofile += 1
+            return True
+
+    def release(self, mode: str = 'sample'):
+        with self._lock:
+            self._active -= 1
+            if mode == 'cprofile':
+                self._active_cprofile -= 1
+
+
+profile_limiter = ProfileLimiter(PROFILE_MAX_PER_MINUTE, PROFILE_MAX_CONCURRENT)
+
+
+def _prune_profiles():
+    """Manter apenas os PROFILE_KEEP arquivos mais recentes"""
+    try:
+        entries = sorted(
+            (entry for entry in os.scandir(PROFILE_DIR) if entry.is_file()),
+            key=lambda entry: entry.stat().st_mtime
+        )
+        for entry in entries[:-PROFILE_KEEP or None]:
+            os.remove(entry.path)
+    except OSError as e:
+        logger.warning("Falha ao limpar perfis antigos: %s", e)
+
+
+def _request_id() -> str:
+    request_id = request.headers.get('X-Request-ID', '')
+    return request_id if _REQUEST_ID_PATTERN.match(request_id) else uuid.uuid4().hex
+
+
+def _requested_mode() -> Optional[str]:
+    mode = request.headers.get('X-Profile', '').strip().lower()
+    if not mode:
+        return None
+    if mode in ('1', 'true'):
+        return 'sample'
+    return mode if mode in PROFILE_MODES else None
+
+
+def install_request_profiler(app: Flask):
+    """Registrar os hooks de perfilamento (sem efeito se PROFILING_ENABLED não estiver ativo)"""
+    if not PROFILING_ENABLED:
+        return
+
+    @app.before_request
+    def start_profile():
+        mode = _requested_mode()
+        if mode is None:
+            return
+        if PROFILING_TOKEN and request.headers.get('X-Profile-Token') != PROFILING_TOKEN:
+            return
+        if not profile_limiter.acquire(mode):
+            g.profile_skipped = True
+            return
+
+        session = ProfileSession(_request_id(), mode)
+        session.start()
+        g.profile_session = session
+
+    @app.after_request
+    def add_profile_headers(response: Response):
+        session = g.get('profile_session')
+        if session is not None:
+            response.headers['X-Request-ID'] = session.request_id
+            response.headers['X-Profile-Id'] = session.request_id
+        elif g.get('profile_skipped'):
+            response.headers['X-Profile-Skipped'] = 'rate-limited'
+        return response
+
+    @app.teardown_request
+    def finish_profile(_exc):
+        session = g.pop('profile_session', None)
+        if session is None:
+            return
+        try:
+            path = session.finish()
+            logger.info("Perfil da requisição %s salvo em %s", session.request_id, path)
+            _prune_profiles()
+        except Exception as e:
+            logger.error("Falha ao salvar perfil da requisição %s: %s", session.request_id, e)
+        finally:
+            profile_limiter.release(session.mode)
@@ -0,0 +1,48 @@
+from flask import Flask, Response, request
+
+from services.compression import COMPRESSION_MIN_BYTES, choose_encoding, compress, is_compressible
+
+
+def install_response_compression(app: Flask):
+    """
+    Comprimir respostas com gzip (ou brotli, se instalado) conforme o Accept-Encoding
+
+    Só entram corpos completos de tipos textuais a partir de COMPRESSION_MIN_BYTES;
+    respostas em streaming, arquivos binários e corpos já comprimidos (ex.:
+    sugestões pré-comprimidas) passam intactos. Deve ser instalado depois de
+    install_request_metrics, para que as métricas vejam o tamanho comprimido.
+    """
+
+    @app.after_request
+    def compress_response(response: Response):
+        if (
+            request.method == 'HEAD'
+            or response.status_code < 200
+            or response.status_code in (204, 304)
+            or response.direct_passthrough
+            or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or not is_compressible(response.mimetype)
+        ):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        if (response.content_length or 0) < COMPRESSION_MIN_BYTES:
+            return response
+
+        encoding = choose_encoding(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        body = response.get_data()
+        compressed = compress(body, encoding)
+        if len(compressed) >= len(body):
+            return response
+
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        if response.headers.get('ETag'):
+            # A validação forte vale para a representação sem compressão
+            etag, _ = response.get_etag()
+            response.set_etag(etag, weak=True)
+        return response
@@ -0,0 +1,263 @@
+from flask import Blueprint, Response, current_app, request, jsonify, send_file, stream_with_context
+from werkzeug.utils import secure_filename
+import io
+import os
+import time
+import logging
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from concurrent.futures.process import BrokenProcessPool
+from services.upload_store import upload_store
+from services.report_cache import report_cache
+from services.report_service import (
+    REPORT_TYPES,
+    build_report_data,
+    report_data_hash,
+    render_report,
+    render_report_job,
+    stream_zip
+)
+from services.admission import admission_controller
+from services.worker_pool import CPU_WORKERS, reset_process_pool, run_cpu_bound, submit_cpu_bound
+from services.report_prerender import report_prerenderer, PRERENDER_WAIT_SECONDS
+from routes.upload import log_request, create_error_response
+from request_limits import server_busy_response
+
+logger = logging.getLogger(__name__)
+
+export_bp = Blueprint("export", __name__)
+
+BATCH_MAX_JOBS = int(os.environ.get('EXPORT_BATCH_MAX_JOBS', 500))
+
+# Relatórios de um lote no pool ao mesmo tempo; os demais são enviados conforme
+# estes terminam, para um lote grande não enfileirar tudo na frente de /upload
+BATCH_MAX_IN_FLIGHT = int(os.environ.get('EXPORT_BATCH_MAX_IN_FLIGHT', CPU_WORKERS))
+
+@export_bp.route("/export/<report_type>/<upload_id>", methods=["GET"])
+def export_report(report_type, upload_id):
+    """Exportar relatório (Excel/PDF) de um upload processado, com cache"""
+    try:
+        log_request("export", {"report_type": report_type, "upload_id": upload_id})
+
+        if report_type not in REPORT_TYPES:
+            return create_error_response(
+                f"Tipo de relatório inválido. Use: {', '.join(REPORT_TYPES)}", "invalid_type"
+            ), 400
+
+        record = upload_store.get(upload_id)
+        if record is None:
+            return create_error_response("Upload não encontrado ou expirado", "upload_lookup"), 404
+
+        data = build_report_data(record)
+        currency = request.args.get('currency')
+        if currency:
+            data['report_currency'] = currency.upper()
+
+        cache_key = (upload_id, report_type, report_data_hash(data))
+        entry = report_cache.get(cache_key)
+
+        if entry is None:
+            # Pré-renderização em andamento para este upload: aguardar em vez de gerar de novo
+            entry = report_prerenderer.wait(cache_key, PRERENDER_WAIT_SECONDS)
+
+        if entry is None:
+            # Geração sob demanda disputa vaga com /upload e /calculate-costs (downloads em cache, não)
+            if not admission_controller.acquire():
+                return server_busy_response()
+            started = time.perf_counter()
+            try:
+                entry = report_cache.put(cache_key, run_cpu_bound(render_report, report_type, data))
+            finally:
+                admission_controller.release()
+            logger.info(
+                "Relatório %s gerado para %s em %.0f ms (%d bytes)",
+                report_type, upload_id, (time.perf_counter() - started) * 1000, entry.size
+            )
+
+        spec = REPORT_TYPES[report_type]
+        return send_file(
+            io.BytesIO(entry.content),
+            mimetype=spec['mimetype'],
+            as_attachment=True,
+            download_name=spec['download_name'],
+            etag=entry.etag,
+            last_modified=entry.created_at,
+            conditional=True,
+            max_age=0
+        )
+
+    except Exception as e:
+        logger.error("Erro na exportação: %s", e)
+        return create_error_response(
+            f"Erro ao gerar relatório: {str(e)}",
+            "export_error"
+        ), 500
+
+def resolve_batch_job(index, job):
+    """
+    Preparar um job do lote: (id, tipo, dados, chave de cache) ou registro de erro
+
+    Os dados do upload são lidos aqui, no processo da requisição, e seguem
+    prontos para o pool: os processos do pool não consultam o upload_store.
+    """
+    if not isinstance(job, dict):
+        return None, {"index": index, "id": index, "success": False,
+                      "error": "Job deve ser um objeto JSON", "stage": "json_validation"}
+
+    job_id = job.get('id', job.get('uploadId', index))
+    report_type = job.get('type', 'pdf')
+    error = {"index": index, "id": job_id, "type": report_type, "success": False}
+
+    if report_type not in REPORT_TYPES:
+        return None, dict(error, error=f"Tipo de relatório inválido. Use: {', '.join(REPORT_TYPES)}",
+                          stage="invalid_type")
+
+    upload_id = job.get('uploadId')
+    if upload_id:
+        record = upload_store.get(upload_id)
+        if record is None:
+            return None, dict(error, error="Upload não encontrado ou expirado", stage="upload_lookup")
+        data = build_report_data(record)
+    elif isinstance(job.get('data'), dict):
+        data = dict(job['data'])
+    else:
+        return None, dict(error, error="Informe uploadId ou data", stage="data_validation")
+
+    if job.get('currency'):
+        data['report_currency'] = str(job['currency']).upper()
+
+    cache_key = (upload_id, report_type, report_data_hash(data)) if upload_id else None
+    return (job_id, report_type, data, cache_key), None
+
+def batch_entry_name(job_id, report_type, used_names):
+    """Nome do arquivo do job dentro do ZIP (uma pasta por job)"""
+    folder = secure_filename(str(job_id)) or 'job'
+    name = f"{folder}/{REPORT_TYPES[report_type]['download_name']}"
+    suffix = 2
+    while name in used_names:
+        name = f"{folder}-{suffix}/{REPORT_TYPES[report_type]['download_name']}"
+        suffix += 1
+    used_names.add(name)
+    return name
+
+@export_bp.route("/export/batch", methods=["POST", "OPTIONS"])
+def export_batch():
+    """Gerar vários relatórios em paralelo e enviá-los em um ZIP montado em streaming"""
+    try:
+        log_request("export_batch")
+
+        if request.method == "OPTIONS":
+            return jsonify({"success": True}), 200
+
+        jobs = request.get_json(silent=True)
+        if isinstance(jobs, dict):
+            jobs = jobs.get('jobs')
+        if not isinstance(jobs, list) or not jobs:
+            return create_error_response(
+                "Envie uma lista de jobs ({\"type\", \"uploadId\" ou \"data\"})", "json_validation"
+            )
+
+        if len(jobs) > BATCH_MAX_JOBS:
+            return create_error_response(
+                f"Lote muito grande. Máximo: {BATCH_MAX_JOBS} relatórios", "data_validation"
+            ), 413
+
+        pending = []
+        ready = []
+        for index, job in enumerate(jobs):
+            resolved, error = resolve_batch_job(index, job)
+            if error:
+                ready.append(error)
+                continue
+
+            job_id, report_type, data, cache_key = resolved
+            entry = report_cache.get(cache_key) if cache_key else None
+            if entry is not None:
+                ready.append({
+                    "index": index, "id": job_id, "type": report_type, "success": True,
+                    "content": entry.content, "size": entry.size, "elapsed_ms": 0.0, "cached": True
+                })
+                continue
+
+            pending.append((index, job_id, report_type, data, cache_key))
+
+        dumps = current_app.json.dumps
+
+        def results():
+            yield from ready
+
+            jobs_to_submit = iter(pending)
+            futures = {}
+
+            def submit_next():
+                job = next(jobs_to_submit, None)
+                if job is None:
+                    return
+                index, job_id, report_type, data, cache_key = job
+                try:
+                    future = submit_cpu_bound(render_report_job, index, job_id, report_type, data)
+                except Exception as e:
+                    # Pool quebrado ao enviar: o job falha como se tivesse falhado no worker
+                    future = Future()
+                    future.set_exception(e)
+                futures[future] = (index, job_id, report_type, cache_key)
+
+            for _ in range(max(1, BATCH_MAX_IN_FLIGHT)):
+                submit_next()
+
+            # Relatórios entram no ZIP na ordem em que terminam
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    item = finish_job(future, *futures.pop(future))
+                    submit_next()
+                    yield item
+
+        def finish_job(future, index, job_id, report_type, cache_key):
+            """Resultado de um job do pool (falha do worker vira registro de erro) e cache"""
+            try:
+                item = future.result()
+            except Exception as e:
+                if isinstance(e, BrokenProcessPool):
+                    reset_process_pool()
+                item = {
+                    "index": index, "id": job_id, "type": report_type, "success": False,
+                    "error": f"Falha no worker: {str(e)}", "stage": "worker_error"
+                }
+            if item["success"] and cache_key:
+                report_cache.put(cache_key, item["content"])
+            return item
+
+        def entries():
+            started = time.perf_counter()
+            manifest = []
+            used_names = set()
+            for item in results():
+                content = item.pop("content", None)
+                if item["success"]:
+                    item["file"] = batch_entry_name(item["id"], item["type"], used_names)
+                    yield item["file"], content
+                manifest.append(item)
+
+            manifest.sort(key=lambda item: item["index"])
+            failed = sum(1 for item in manifest if not item["success"])
+            summary = {
+                "total": len(jobs),
+                "succeeded": len(jobs) - failed,
+                "failed": failed,
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 2)
+            }
+            logger.info("Lote de relatórios concluído: %d jobs, %d com erro", len(jobs), failed)
+            yield "manifest.json", dumps({"summary": summary, "jobs": manifest})
+
+        return Response(
+            stream_with_context(stream_zip(entries())),
+            mimetype="application/zip",
+            headers={"Content-Disposition": "attachment; filename=relatorios_zflp.zip"}
+        )
+
+    except Exception as e:
+        logger.error("Erro no lote de relatórios: %s", e)
+        return create_error_response(
+            f"Erro ao gerar lote de relatórios: {str(e)}",
+            "export_error"
+        ), 500
@@ -1,11 +1,32 @@
-from flask import Blueprint, request, jsonify
-from werkzeug.utils import secure_filename
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
 import os
+import time
+import shutil
 import tempfile
 import json
 import logging
+from concurrent.futures import as_completed
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
-from services.excel_processor_robust import robust_processor
+from services.excel_processor_robust import process_file
+from services.cost_calculator import calculate_landed_costs, calculate_shipment, CostCalculationError
+from services.worker_pool import reset_process_pool, run_cpu_bound, submit_cpu_bound
+from services.upload_store import upload_store
+from services.upload_stream import receive_upload, UploadRejected
+from services.metrics import StageTimer, record_stage_timings
+from services.compression import PrecompressedBody
+from services.catalog import product_catalog
+from services.warmup import warmup_state
+from services.report_prerender import report_prerenderer
+from services.columnar import (
+    COLUMNAR_MIMETYPE,
+    MSGPACK_MIMETYPE,
+    ARROW_MIMETYPE,
+    available_binary_mimetypes,
+    to_columnar,
+    encode_msgpack,
+    encode_arrow
+)
 from database_argentina import (
     PNEU_DATABASE_REAL, 
     MARCAS_REAIS,
@@ -16,15 +37,24 @@ from database_argentina import (
     NCM_PNEUS
 )
 
-# Configurar logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 upload_bp = Blueprint("upload", __name__)
 
+NDJSON_MIMETYPES = ("application/x-ndjson", "application/jsonl")
+BULK_MAX_SHIPMENTS = int(os.environ.get('BULK_MAX_SHIPMENTS', 1000))
+
+SUGGESTIONS = {
+    'products': PNEU_DATABASE_REAL[:50],  # Primeiros 50
+    'brands': MARCAS_REAIS,
+    'fixed_costs': CUSTOS_FIXOS_ARGENTINA,
+    'variable_costs': CUSTOS_VARIAVEIS_ARGENTINA,
+    'taxes': [tax['nome'] for tax in TRIBUTOS_ARGENTINA]
+}
+
 def log_request(endpoint: str, data: dict = None):
-    """Log detalhado de requisições"""
-    logger.info(f"[{datetime.now()}] {endpoint} - Data: {data}")
+    """Log detalhado de requisições (horário vem do próprio registro)"""
+    logger.info("%s - Data: %s", endpoint, data, extra={"endpoint": endpoint})
 
 def create_error_response(error_msg: str, stage: str = "unknown", details: dict = None):
     """Criar resposta de erro padronizada"""
@@ -37,18 +67,129 @@ def create_error_response(error_msg: str, stage: str = "unknown", details: dict
     if details:
         response["details"] = details
     
-    logger.error(f"Erro em {stage}: {error_msg}")
+    logger.error("Erro em %s: %s", stage, error_msg)
     return jsonify(response)
 
-def create_success_response(data: dict, message: str = "Sucesso"):
-    """Criar resposta de sucesso padronizada"""
-    response = {
+def build_success_payload(data: dict, message: str = "Sucesso") -> dict:
+    """Montar envelope de sucesso padronizado"""
+    return {
         "success": True,
         "message": message,
         "data": data,
         "timestamp": datetime.now().isoformat()
     }
-    return jsonify(response)
+
+def create_success_response(data: dict, message: str = "Sucesso"):
+    """Criar resposta de sucesso padronizada"""
+    return jsonify(build_success_payload(data, message))
+
+def build_static_payload(data: dict, message: str = "Sucesso") -> PrecompressedBody:
+    """Serializar e comprimir uma única vez uma resposta de sucesso que não muda"""
+    body = json.dumps(build_success_payload(data, message), ensure_ascii=False, separators=(",", ":"))
+    return PrecompressedBody(body.encode("utf-8") + b"\n")
+
+def create_static_response(payload: PrecompressedBody):
+    """Responder com a variante pré-comprimida aceita pelo cliente (ou o corpo original)"""
+    encoding, body = payload.select(request.accept_encodings)
+    response = Response(body, mimetype="application/json")
+    if encoding is not None:
+        response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    response.set_etag(payload.etag, weak=encoding is not None)
+    return response.make_conditional(request)
+
+def negotiate_table_format() -> str:
+    """Escolher formato da tabela pelo cabeçalho Accept (padrão: JSON)"""
+    offers = ["application/json", *NDJSON_MIMETYPES, COLUMNAR_MIMETYPE, *available_binary_mimetypes()]
+    best = request.accept_mimetypes.best_match(offers)
+    if best in NDJSON_MIMETYPES:
+        return "ndjson"
+    return {
+        COLUMNAR_MIMETYPE: "columnar",
+        MSGPACK_MIMETYPE: "msgpack",
+        ARROW_MIMETYPE: "arrow"
+    }.get(best, "json")
+
+def create_table_response(data: dict, rows_path: tuple, row_type: str, summary: dict,
+                          header: dict = None, message: str = "Sucesso"):
+    """
+    Criar resposta para resultados com tabela (produtos ou rateio) no formato negociado
+    
+    rows_path indica onde a lista de linhas está em `data`, ex.: ("calculation", "rateio").
+    """
+    response = build_table_response(data, rows_path, row_type, summary, header, message)
+    response.vary.add("Accept")
+    return response
+
+def build_table_response(data: dict, rows_path: tuple, row_type: str, summary: dict,
+                         header: dict = None, message: str = "Sucesso"):
+    """Serializar resultado com tabela no formato escolhido por negotiate_table_format"""
+    table_format = negotiate_table_format()
+    
+    parent = data
+    for key in rows_path[:-1]:
+        parent = parent[key]
+    rows = parent[rows_path[-1]]
+    
+    if table_format == "json":
+        return create_success_response(data, message)
+    
+    if table_format == "ndjson":
+        return create_streaming_response(rows, row_type, summary, header, message)
+    
+    columnar = to_columnar(rows)
+    
+    if table_format == "arrow":
+        # Metadados levam o envelope sem as linhas
+        envelope = build_success_payload({"summary": summary, **(header or {})}, message)
+        envelope["row_type"] = row_type
+        body = encode_arrow(columnar, {"zflp": current_app.json.dumps(envelope)})
+        return Response(body, mimetype=ARROW_MIMETYPE)
+    
+    # Substituir a lista de linhas pela versão colunar sem alterar `data`
+    columnar_data = dict(data)
+    target = columnar_data
+    for key in rows_path[:-1]:
+        target[key] = dict(target[key])
+        target = target[key]
+    target[rows_path[-1]] = columnar
+    payload = build_success_payload(columnar_data, message)
+    
+    if table_format == "msgpack":
+        return Response(encode_msgpack(payload, default=current_app.json.default), mimetype=MSGPACK_MIMETYPE)
+    
+    return current_app.response_class(
+        current_app.json.dumps(payload) + "\n", mimetype=COLUMNAR_MIMETYPE
+    )
+
+def create_streaming_response(rows: list, row_type: str, summary: dict,
+                              header: dict = None, message: str = "Sucesso"):
+    """
+    Criar resposta NDJSON em streaming: cabeçalho, uma linha por item e resumo
+    
+    Cada linha é serializada sob demanda, sem montar o corpo inteiro em memória.
+    """
+    dumps = current_app.json.dumps
+    
+    def generate():
+        head = {
+            "type": "header",
+            "success": True,
+            "message": message,
+            "timestamp": datetime.now().isoformat(),
+            "row_type": row_type,
+            "count": len(rows)
+        }
+        if header:
+            head.update(header)
+        yield dumps(head) + "\n"
+        
+        for row in rows:
+            yield dumps({"type": row_type, **row}) + "\n"
+        
+        yield dumps({"type": "summary", "summary": summary}) + "\n"
+    
+    return Response(generate(), mimetype="application/x-ndjson")
 
 @upload_bp.route("/upload", methods=["POST", "OPTIONS"])
 def upload_file():
@@ -59,35 +200,41 @@ def upload_file():
         if request.method == "OPTIONS":
             return jsonify({"success": True}), 200
         
-        if 'file' not in request.files:
+        boundary = request.mimetype_params.get('boundary')
+        if request.mimetype != 'multipart/form-data' or not boundary:
             return create_error_response("Nenhum arquivo enviado", "file_validation")
         
-        file = request.files["file"]
-        
-        if file.filename == '':
-            return create_error_response("Nenhum arquivo selecionado", "file_validation")
-        
-        if not file.filename.lower().endswith(('.xlsx', '.xls')):
-            return create_error_response(
-                "Formato de arquivo inválido. Use .xlsx ou .xls", 
-                "file_format"
-            )
-        
-        filename = secure_filename(file.filename)
+        # Arquivo lido em blocos direto do corpo: formato, assinatura e tamanho
+        # são verificados durante a recepção, antes de gravar o arquivo inteiro
         temp_dir = tempfile.mkdtemp()
-        file_path = os.path.join(temp_dir, filename)
-        file.save(file_path)
-        
-        result = robust_processor.process_file(file_path)
-        
-        # Limpar arquivo temporário
-        os.remove(file_path)
-        os.rmdir(temp_dir)
+        try:
+            try:
+                file_path, filename = receive_upload(request.stream, boundary, temp_dir)
+            except UploadRejected as e:
+                return create_error_response(str(e), e.stage), e.status
+            
+            # Leitura e limpeza da planilha no pool de processos (não bloqueia as demais requisições)
+            result = run_cpu_bound(process_file, file_path)
+        finally:
+            # Limpar diretório temporário em qualquer saída (recusa, erro de leitura ou do pool)
+            shutil.rmtree(temp_dir, ignore_errors=True)
+        
+        record_stage_timings('process_file', result.pop('stage_timings', {}))
+        
+        if result.get('success'):
+            # Guardar resultado para exportações posteriores (/api/export/<tipo>/<upload_id>)
+            result['upload_id'] = upload_store.save(result, filename)
+            report_prerenderer.schedule(result['upload_id'])
+            return create_table_response(
+                result, ("products",), "product", result['summary'],
+                header={"processing_info": result['processing_info']},
+                message="Arquivo processado com sucesso"
+            )
         
         return create_success_response(result, "Arquivo processado com sucesso")
         
     except Exception as e:
-        logger.error(f"Erro crítico no upload: {e}")
+        logger.error("Erro crítico no upload: %s", e)
         return create_error_response(
             f"Erro crítico no servidor: {str(e)}", 
             "server_error"
@@ -127,7 +274,7 @@ def manual_entry():
                 processed_products.append(processed)
                 total_value += processed['total']
             except (ValueError, TypeError) as e:
-                logger.warning(f"Erro ao processar produto: {product} - {e}")
+                logger.warning("Erro ao processar produto: %s - %s", product, e)
                 continue
         
         result = {
@@ -138,11 +285,15 @@ def manual_entry():
                 "currency": "USD"
             }
         }
+        result["upload_id"] = upload_store.save(result, "entrada_manual")
         
-        return create_success_response(result, "Produtos processados com sucesso")
+        return create_table_response(
+            result, ("products",), "product", result['summary'],
+            message="Produtos processados com sucesso"
+        )
         
     except Exception as e:
-        logger.error(f"Erro na entrada manual: {e}")
+        logger.error("Erro na entrada manual: %s", e)
         return create_error_response(
             f"Erro no servidor: {str(e)}", 
             "server_error"
@@ -161,135 +312,164 @@ def calculate_costs():
         if not data:
             return create_error_response("Dados não fornecidos", "json_validation")
         
-        # Extrair dados
-        products = data.get('products', [])
-        fixed_costs = data.get('fixedCosts', [])
-        variable_costs = data.get('variableCosts', [])
-        taxes = data.get('taxes', [])
-        freight_value = float(data.get('freightValue', 0))
-        insurance_percentage = float(data.get('insurancePercentage', 0))
-        
-        if not products:
-            return create_error_response("Lista de produtos vazia", "data_validation")
-        
-        # Calcular valores base
-        total_products = sum(float(p.get('total', 0)) for p in products)
-        insurance_value = total_products * insurance_percentage / 100
-        cif_value = total_products + freight_value + insurance_value
-        
-        # Calcular custos fixos
-        total_fixed = 0
-        for cost in fixed_costs:
-            if cost.get('activo', False):
-                if cost.get('tipo') == 'porcentaje':
-                    base = cif_value if cost.get('base') == 'CIF' else total_products
-                    total_fixed += base * float(cost.get('valor', 0)) / 100
-                else:
-                    total_fixed += float(cost.get('valor', 0))
-        
-        # Calcular custos variáveis
-        total_variable = 0
-        for cost in variable_costs:
-            if cost.get('activo', False):
-                if cost.get('tipo') == 'porcentaje':
-                    base = cif_value if cost.get('base') == 'CIF' else total_products
-                    total_variable += base * float(cost.get('valor', 0)) / 100
-                else:
-                    total_variable += float(cost.get('valor', 0))
-        
-        # Calcular tributos
-        total_taxes = 0
-        for tax in taxes:
-            if tax.get('activo', False):
-                if tax.get('tipo') == 'porcentaje':
-                    base = cif_value if tax.get('base') == 'CIF' else total_products
-                    total_taxes += base * float(tax.get('valor', 0)) / 100
-                else:
-                    total_taxes += float(tax.get('valor', 0))
-        
-        # Custo total
-        total_cost = total_products + freight_value + insurance_value + total_fixed + total_variable + total_taxes
-        
-        # Pro-rateio
-        rateio = []
-        for product in products:
-            try:
-                product_value = float(product.get('total', 0))
-                participation = product_value / total_products if total_products > 0 else 0
-                allocated_cost = total_cost * participation
-                quantity = float(product.get('quantity', product.get('quantidade', 1)))
-                unit_cost = allocated_cost / quantity if quantity > 0 else 0
-                
-                rateio.append({
-                    'name': product.get('name', product.get('produto', '')),
-                    'brand': product.get('brand', product.get('marca', '')),
-                    'quantity': quantity,
-                    'unit_cost_original': float(product.get('unit_cost', product.get('valorFornecedor', 0))),
-                    'value_original': product_value,
-                    'participation': round(participation * 100, 2),
-                    'allocated_cost': round(allocated_cost, 2),
-                    'unit_cost_final': round(unit_cost, 2)
-                })
-            except (ValueError, TypeError):
-                continue
-        
-        result = {
-            "calculation": {
-                "total_products": round(total_products, 2),
-                "freight_value": round(freight_value, 2),
-                "insurance_percentage": insurance_percentage,
-                "insurance_value": round(insurance_value, 2),
-                "cif_value": round(cif_value, 2),
-                "total_fixed": round(total_fixed, 2),
-                "total_variable": round(total_variable, 2),
-                "total_taxes": round(total_taxes, 2),
-                "total_cost": round(total_cost, 2),
-                "rateio": rateio
-            }
-        }
-        
-        logger.info(f"Cálculo concluído. Custo total: ${total_cost:.2f}")
-        
-        return create_success_response(
-            result,
-            "Cálculo de custos realizado com sucesso!"
+        timer = StageTimer('calculate_costs')
+        try:
+            result = calculate_landed_costs(data, timer)
+        except CostCalculationError as e:
+            return create_error_response(str(e), e.stage)
+        finally:
+            timer.record()
+        
+        logger.info("Cálculo concluído. Custo total: $%.2f", result['calculation']['total_cost'])
+        
+        # Associar cálculo ao upload para que os relatórios incluam os custos
+        upload_id = data.get('uploadId')
+        if upload_id:
+            result['upload_id'] = upload_id
+            if upload_store.attach_calculation(upload_id, result['calculation']):
+                report_prerenderer.schedule(upload_id)
+            else:
+                logger.warning("Upload %s não encontrado para associar cálculo", upload_id)
+        
+        calculation = result['calculation']
+        return create_table_response(
+            result, ("calculation", "rateio"), "rateio",
+            {key: value for key, value in calculation.items() if key != 'rateio'},
+            message="Cálculo de custos realizado com sucesso!"
         )
         
     except Exception as e:
-        logger.error(f"Erro crítico no cálculo de custos: {e}")
+        logger.error("Erro crítico no cálculo de custos: %s", e)
         return create_error_response(
             f"Erro crítico no servidor: {str(e)}", 
             "server_error"
         ), 500
 
-@upload_bp.route("/suggestions/<suggestion_type>", methods=["GET"])
-def get_suggestions(suggestion_type):
-    """Obter sugestões por tipo"""
+def parse_bulk_shipments():
+    """Extrair embarques do corpo (lista JSON, {"shipments": [...]} ou NDJSON)"""
+    if request.mimetype in NDJSON_MIMETYPES:
+        shipments = []
+        for line in request.get_data(as_text=True).splitlines():
+            if not line.strip():
+                continue
+            try:
+                shipments.append(json.loads(line))
+            except ValueError as e:
+                # Linha inválida vira erro do próprio embarque, não do lote
+                shipments.append(ValueError(f"JSON inválido: {e}"))
+        return shipments
+    
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('shipments')
+    return data if isinstance(data, list) else None
+
+@upload_bp.route("/calculate-costs/bulk", methods=["POST", "OPTIONS"])
+def calculate_costs_bulk():
+    """Calcular custos de vários embarques em paralelo, com resposta NDJSON em streaming"""
     try:
-        suggestions_map = {
-            'products': PNEU_DATABASE_REAL[:50],  # Primeiros 50
-            'brands': MARCAS_REAIS,
-            'fixed_costs': [cost['nome'] for cost in CUSTOS_FIXOS_ARGENTINA],
-            'variable_costs': [cost['nome'] for cost in CUSTOS_VARIAVEIS_ARGENTINA],
-            'taxes': [tax['nome'] for tax in TRIBUTOS_ARGENTINA]
-        }
+        log_request("calculate_costs_bulk")
         
-        if suggestion_type not in suggestions_map:
-            return create_error_response("Tipo de sugestão inválido", "invalid_type")
+        if request.method == "OPTIONS":
+            return jsonify({"success": True}), 200
         
-        return create_success_response({
-            "suggestions": suggestions_map[suggestion_type],
-            "type": suggestion_type,
-            "count": len(suggestions_map[suggestion_type])
-        })
+        shipments = parse_bulk_shipments()
+        if not shipments:
+            return create_error_response(
+                "Envie uma lista de embarques (JSON ou NDJSON)", "json_validation"
+            )
+        
+        if len(shipments) > BULK_MAX_SHIPMENTS:
+            return create_error_response(
+                f"Lote muito grande. Máximo: {BULK_MAX_SHIPMENTS} embarques", "data_validation"
+            ), 413
+        
+        futures = {}
+        parse_errors = []
+        for index, shipment in enumerate(shipments):
+            if isinstance(shipment, ValueError):
+                parse_errors.append({
+                    "index": index, "id": index, "success": False,
+                    "error": str(shipment), "stage": "json_validation"
+                })
+            else:
+                futures[submit_cpu_bound(calculate_shipment, index, shipment)] = index
+        
+        dumps = current_app.json.dumps
+        
+        def generate():
+            started = time.perf_counter()
+            failed = len(parse_errors)
+            for item in parse_errors:
+                yield dumps(item) + "\n"
+            
+            # Resultados são enviados na ordem em que terminam
+            for future in as_completed(futures):
+                try:
+                    item = future.result()
+                except Exception as e:
+                    if isinstance(e, BrokenProcessPool):
+                        reset_process_pool()
+                    item = {
+                        "index": futures[future], "id": futures[future], "success": False,
+                        "error": f"Falha no worker: {str(e)}", "stage": "worker_error"
+                    }
+                if not item["success"]:
+                    failed += 1
+                yield dumps(item) + "\n"
+            
+            summary = {
+                "summary": {
+                    "total": len(shipments),
+                    "succeeded": len(shipments) - failed,
+                    "failed": failed,
+                    "elapsed_ms": round((time.perf_counter() - started) * 1000, 2)
+                }
+            }
+            logger.info("Lote concluído: %d embarques, %d com erro", len(shipments), failed)
+            yield dumps(summary) + "\n"
+        
+        return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
         
     except Exception as e:
-        logger.error(f"Erro ao obter sugestões: {e}")
+        logger.error("Erro crítico no cálculo em lote: %s", e)
         return create_error_response(
-            f"Erro no servidor: {str(e)}", 
+            f"Erro crítico no servidor: {str(e)}", 
             "server_error"
         ), 500
 
+# Sugestões e catálogo são estáticos: comprimidos uma vez por worker, na importação
+STATIC_SUGGESTIONS = {
+    suggestion_type: build_static_payload({
+        "suggestions": suggestions,
+        "type": suggestion_type,
+        "count": len(suggestions)
+    })
+    for suggestion_type, suggestions in SUGGESTIONS.items()
+}
+STATIC_CATALOG = build_static_payload({
+    "products": PNEU_DATABASE_REAL,
+    "brands": MARCAS_REAIS,
+    "applications": APLICACOES_REAIS,
+    "fixed_costs": CUSTOS_FIXOS_ARGENTINA,
+    "variable_costs": CUSTOS_VARIAVEIS_ARGENTINA,
+    "taxes": TRIBUTOS_ARGENTINA,
+    "ncm": NCM_PNEUS
+}, "Catálogo de referência")
+
+@upload_bp.route("/suggestions/<suggestion_type>", methods=["GET"])
+def get_suggestions(suggestion_type):
+    """Obter sugestões por tipo (corpo pré-comprimido na importação do módulo)"""
+    payload = STATIC_SUGGESTIONS.get(suggestion_type)
+    if payload is None:
+        return create_error_response("Tipo de sugestão inválido", "invalid_type")
+    return create_static_response(payload)
+
+@upload_bp.route("/catalog", methods=["GET"])
+def get_catalog():
+    """Catálogo de referência completo (produtos, marcas, aplicações, custos, tributos e NCM)"""
+    return create_static_response(STATIC_CATALOG)
+
 @upload_bp.route("/search-products", methods=["GET"])
 def search_products():
     """Buscar produtos por termo"""
@@ -304,11 +484,7 @@ def search_products():
                 "query": query
             })
         
-        query_lower = query.lower()
-        filtered_products = [
-            product for product in PNEU_DATABASE_REAL 
-            if query_lower in product.lower()
-        ]
+        filtered_products = product_catalog.search(query)
         
         limited_products = filtered_products[:limit]
         
@@ -320,7 +496,7 @@ def search_products():
         })
         
     except Exception as e:
-        logger.error(f"Erro na busca de produtos: {e}")
+        logger.error("Erro na busca de produtos: %s", e)
         return create_error_response(
             f"Erro no servidor: {str(e)}", 
             "server_error"
@@ -333,5 +509,6 @@ def health_check():
         "status": "healthy",
         "database_products": len(PNEU_DATABASE_REAL),
         "database_brands": len(MARCAS_REAIS),
+        "ready": warmup_state.ready,
         "version": "2.0-robust"
     }, "API funcionando corretamente")
@@ -0,0 +1,102 @@
+import os
+import time
+import logging
+import threading
+
+from services.metrics import metrics
+from services.worker_pool import CPU_WORKERS
+
+logger = logging.getLogger(__name__)
+
+ADMISSION_IN_FLIGHT = metrics.gauge(
+    'zflp_admission_in_flight', 'Requisições pesadas em execução neste processo'
+)
+ADMISSION_QUEUE_DEPTH = metrics.gauge(
+    'zflp_admission_queue_depth', 'Requisições pesadas aguardando vaga neste processo'
+)
+ADMISSION_REJECTED = metrics.counter(
+    'zflp_admission_rejected_total', 'Requisições pesadas recusadas com 503', ('reason',)
+)
+ADMISSION_WAIT = metrics.histogram(
+    'zflp_admission_wait_seconds', 'Tempo de espera na fila de admissão',
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+
+
+class AdmissionController:
+    """
+    Controle de admissão para endpoints pesados (por processo)
+
+    Até `max_concurrent` requisições executam ao mesmo tempo; outras
+    `max_queue` esperam no máximo `max_wait` segundos por uma vaga. Com a
+    fila cheia ou o prazo estourado a requisição é recusada na hora, em vez
+    de todas disputarem CPU e estourarem o timeout juntas.
+    """
+
+    def __init__(self, max_concurrent: int, max_queue: int, max_wait: float):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self._in_flight = 0
+        self._waiting = 0
+        self._condition = threading.Condition()
+        self._publish()
+
+    def acquire(self) -> bool:
+        """Ocupar uma vaga; False se a requisição deve ser recusada"""
+        with self._condition:
+            if self._in_flight < self.max_concurrent and self._waiting == 0:
+                self._in_flight += 1
+                self._publish()
+                return True
+
+            if self._waiting >= self.max_queue:
+                ADMISSION_REJECTED.inc('queue_full')
+                return False
+
+            started = time.monotonic()
+            deadline = started + self.max_wait
+            self._waiting += 1
+            self._publish()
+            try:
+                while self._in_flight >= self.max_concurrent:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or not self._condition.wait(remaining):
+                        if self._in_flight < self.max_concurrent:
+                            break
+                        ADMISSION_REJECTED.inc('timeout')
+                        return False
+                self._in_flight += 1
+                ADMISSION_WAIT.observe(time.monotonic() - started)
+                return True
+            finally:
+                self._waiting -= 1
+                self._publish()
+
+    def release(self):
+        with self._condition:
+            self._in_flight -= 1
+            self._publish()
+            self._condition.notify()
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {
+                "in_flight": self._in_flight,
+                "queued": self._waiting,
+                "max_concurrent": self.max_concurrent,
+                "max_queue": self.max_queue,
+                "max_wait_seconds": self.max_wait
+            }
+
+    def _publish(self):
+        ADMISSION_IN_FLIGHT.set(self._in_flight)
+        ADMISSION_QUEUE_DEPTH.set(self._waiting)
+
+
+# Instância global: /upload e /calculate-costs disputam os mesmos núcleos
+admission_controller = AdmissionController(
+    max_concurrent=int(os.environ.get('ADMISSION_MAX_CONCURRENT', CPU_WORKERS)),
+    max_queue=int(os.environ.get('ADMISSION_MAX_QUEUE', CPU_WORKERS * 2)),
+    max_wait=float(os.environ.get('ADMISSION_MAX_WAIT', 5))
+)
@@ -0,0 +1,39 @@
+import threading
+from typing import List, Optional, Sequence
+
+from database_argentina import PNEU_DATABASE_REAL
+
+
+class ProductCatalog:
+    """
+    Catálogo de produtos de referência com índice de busca
+
+    Os nomes em minúsculas são calculados uma única vez (no warm-up do worker
+    ou na primeira busca), em vez de a cada produto em cada requisição.
+    """
+
+    def __init__(self, products: Sequence[str]):
+        self.products = list(products)
+        self._lowered: Optional[List[str]] = None
+        self._lock = threading.Lock()
+
+    def build(self) -> int:
+        """Montar o índice (idempotente); retorna o número de produtos indexados"""
+        with self._lock:
+            if self._lowered is None:
+                self._lowered = [product.lower() for product in self.products]
+        return len(self._lowered)
+
+    def search(self, query: str) -> List[str]:
+        """Produtos cujo nome contém query (sem diferenciar maiúsculas), na ordem do catálogo"""
+        if self._lowered is None:
+            self.build()
+        query_lower = query.lower()
+        return [
+            product for product, lowered in zip(self.products, self._lowered)
+            if query_lower in lowered
+        ]
+
+
+# Instância global do catálogo (base estática, compartilhada pelas threads do worker)
+product_catalog = ProductCatalog(PNEU_DATABASE_REAL)
@@ -0,0 +1,88 @@
+import logging
+from typing import Dict, List, Any, Callable, Optional
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+# Tipos de resposta suportados para tabelas de produtos
+COLUMNAR_MIMETYPE = "application/vnd.zflp.columnar+json"
+MSGPACK_MIMETYPE = "application/x-msgpack"
+ARROW_MIMETYPE = "application/vnd.apache.arrow.stream"
+
+
+def available_binary_mimetypes() -> List[str]:
+    """Formatos binários cujas bibliotecas estão instaladas"""
+    mimetypes = []
+    if msgpack is not None:
+        mimetypes.append(MSGPACK_MIMETYPE)
+    if pa is not None:
+        mimetypes.append(ARROW_MIMETYPE)
+    return mimetypes
+
+
+def to_columnar(rows: List[Dict[str, Any]], columns: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Converter lista de registros em formato colunar
+
+    {"columns": [...], "data": {"coluna": [valores...]}} - cada nome de campo
+    aparece uma única vez em vez de uma vez por linha.
+    """
+    if columns is None:
+        columns = []
+        seen = set()
+        for row in rows:
+            for key in row:
+                if key not in seen:
+                    seen.add(key)
+                    columns.append(key)
+
+    return {
+        "columns": columns,
+        "data": {column: [row.get(column) for row in rows] for column in columns}
+    }
+
+
+def encode_msgpack(obj: Any, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+    """Serializar resposta em MessagePack"""
+    if msgpack is None:
+        raise RuntimeError("msgpack não está instalado")
+    return msgpack.packb(obj, default=default, use_bin_type=True)
+
+
+def _arrow_column(values: List[Any]):
+    """Coluna Arrow com o tipo inferido; tipos misturados (texto/None/número) viram texto"""
+    try:
+        return pa.array(values)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Colunas de planilhas processadas podem misturar str, None e float na mesma coluna
+        return pa.array([None if value is None else str(value) for value in values], type=pa.string())
+
+
+def encode_arrow(columnar: Dict[str, Any], metadata: Optional[Dict[str, str]] = None) -> bytes:
+    """
+    Serializar tabela colunar em Arrow IPC (stream)
+
+    O restante da resposta (resumo, mensagem) segue como metadados do schema.
+    Colunas que o Arrow não consegue tipar (valores de tipos diferentes) são
+    enviadas como texto, com None preservado como nulo.
+    """
+    if pa is None:
+        raise RuntimeError("pyarrow não está instalado")
+
+    table = pa.table({column: _arrow_column(columnar["data"][column]) for column in columnar["columns"]})
+    if metadata:
+        table = table.replace_schema_metadata(metadata)
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
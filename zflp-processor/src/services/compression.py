@@ -0,0 +1,82 @@
+import os
+import gzip
+import hashlib
+from typing import Dict, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Respostas menores que isso saem sem compressão (ex.: /health)
+COMPRESSION_MIN_BYTES = int(os.environ.get('COMPRESSION_MIN_BYTES', 1024))
+
+# Níveis das respostas dinâmicas: comprimidas a cada requisição, no thread do request
+GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', 5))
+BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', 4))
+
+# Corpos estáticos são comprimidos uma única vez, então vale o nível máximo
+STATIC_GZIP_LEVEL = 9
+STATIC_BROTLI_QUALITY = 11
+
+# Tipos que comprimem bem; planilhas, PDFs, ZIPs e Arrow já são binários compactos
+COMPRESSIBLE_MIMETYPES = frozenset({
+    'application/json',
+    'application/x-ndjson',
+    'application/jsonl',
+    'application/vnd.zflp.columnar+json',
+    'application/x-msgpack',
+    'application/javascript',
+    'application/xml'
+})
+
+
+def available_encodings() -> Tuple[str, ...]:
+    """Codificações suportadas, em ordem de preferência (brotli só se instalado)"""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def is_compressible(mimetype: Optional[str]) -> bool:
+    if not mimetype:
+        return False
+    return mimetype.startswith('text/') or mimetype in COMPRESSIBLE_MIMETYPES or mimetype.endswith('+json')
+
+
+def choose_encoding(accept_encodings) -> Optional[str]:
+    """Melhor codificação aceita pelo cliente (Accept do werkzeug), ou None"""
+    return accept_encodings.best_match(available_encodings())
+
+
+def compress(body: bytes, encoding: str, static: bool = False) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=STATIC_BROTLI_QUALITY if static else BROTLI_QUALITY)
+    if encoding == 'gzip':
+        # mtime fixo: mesmo corpo, mesmos bytes (ETag estável entre workers)
+        return gzip.compress(body, compresslevel=STATIC_GZIP_LEVEL if static else GZIP_LEVEL, mtime=0)
+    raise ValueError(f"Codificação não suportada: {encoding}")
+
+
+class PrecompressedBody:
+    """
+    Corpo estático comprimido uma única vez em todas as codificações disponíveis
+
+    Usado para sugestões e catálogo de referência: a cada requisição só resta
+    escolher a variante pelo Accept-Encoding, sem custo de CPU.
+    """
+
+    def __init__(self, body: bytes):
+        self.identity = body
+        self.etag = hashlib.sha1(body).hexdigest()
+        self.variants: Dict[str, bytes] = {}
+        if len(body) >= COMPRESSION_MIN_BYTES:
+            for encoding in available_encodings():
+                compressed = compress(body, encoding, static=True)
+                if len(compressed) < len(body):
+                    self.variants[encoding] = compressed
+
+    def select(self, accept_encodings) -> Tuple[Optional[str], bytes]:
+        """(codificação ou None, corpo) para o Accept-Encoding do cliente"""
+        encoding = accept_encodings.best_match(tuple(self.variants))
+        if encoding is None:
+            return None, self.identity
+        return encoding, self.variants[encoding]
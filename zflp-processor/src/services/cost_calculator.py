@@ -0,0 +1,187 @@
+import time
+import logging
+from typing import Dict, List, Any, Optional
+
+from services.currency_converter import CurrencyConverter, FXRateError
+from services.metrics import StageTimer
+
+logger = logging.getLogger(__name__)
+
+
+class CostCalculationError(ValueError):
+    """Erro de validação no cálculo de custos"""
+
+    def __init__(self, message: str, stage: str = "data_validation"):
+        super().__init__(message)
+        self.stage = stage
+
+
+def cost_breakdown(costs: List[Dict[str, Any]], group: str, cif_value: float, total_products: float,
+                   fx_factor: float = 1.0) -> List[Dict[str, Any]]:
+    """Valor de cada custo ativo (percentuais sobre CIF/FOB, valores absolutos convertidos pela taxa)"""
+    items = []
+    for cost in costs:
+        if cost.get('activo', False):
+            if cost.get('tipo') == 'porcentaje':
+                base = cif_value if cost.get('base') == 'CIF' else total_products
+                percentage = float(cost.get('valor', 0))
+                value = base * percentage / 100
+            else:
+                percentage = 0
+                value = float(cost.get('valor', 0)) * fx_factor
+            items.append({
+                'group': group,
+                'description': cost.get('descripcion', ''),
+                'percentage': percentage,
+                'value': value
+            })
+    return items
+
+
+def calculate_landed_costs(data: Dict[str, Any], timer: Optional[StageTimer] = None) -> Dict[str, Any]:
+    """
+    Calcular pro-rateio de custos com CIF/FOB para um embarque
+
+    Args:
+        data: Payload no formato de /calculate-costs
+        timer: Cronômetro que recebe os tempos das etapas (validate, fx, costs, rateio)
+
+    Returns:
+        Dicionário {"calculation": {...}}
+
+    Raises:
+        CostCalculationError: dados inválidos ou câmbio indisponível
+    """
+    timer = timer or StageTimer('calculate_costs')
+
+    with timer.stage('validate'):
+        # Extrair dados
+        products = data.get('products', [])
+        fixed_costs = data.get('fixedCosts', [])
+        variable_costs = data.get('variableCosts', [])
+        taxes = data.get('taxes', [])
+        freight_value = float(data.get('freightValue', 0))
+        insurance_percentage = float(data.get('insurancePercentage', 0))
+
+        if not products:
+            raise CostCalculationError("Lista de produtos vazia", "data_validation")
+
+    with timer.stage('fx'):
+        # Moedas: produtos/frete em US$ (FOB), custos absolutos na moeda local
+        currency = str(data.get('currency', 'USD')).upper()
+        products_currency = str(data.get('productsCurrency', 'USD')).upper()
+        costs_currency = str(data.get('costsCurrency', currency)).upper()
+        fx_date = data.get('fxDate')
+
+        products_factor = 1.0
+        costs_factor = 1.0
+        fx_info = None
+        if products_currency != currency or costs_currency != currency:
+            try:
+                converter = CurrencyConverter()
+                products_factor = converter.factor(products_currency, currency, fx_date)
+                costs_factor = converter.factor(costs_currency, currency, fx_date)
+                rate_date, _ = converter.table.rates_for(fx_date)
+            except FXRateError as e:
+                raise CostCalculationError(str(e), "currency_conversion")
+
+            # Conversão vetorizada das colunas monetárias dos produtos
+            products = converter.convert_records(
+                products, ['total', 'unit_cost', 'valorFornecedor'], products_currency, currency, fx_date
+            )
+            freight_value *= products_factor
+            fx_info = {
+                "date": rate_date.isoformat(),
+                "products_rate": products_factor,
+                "costs_rate": costs_factor,
+                "products_currency": products_currency,
+                "costs_currency": costs_currency
+            }
+
+    with timer.stage('costs'):
+        # Calcular valores base
+        total_products = sum(float(p.get('total', 0)) for p in products)
+        insurance_value = total_products * insurance_percentage / 100
+        cif_value = total_products + freight_value + insurance_value
+
+        # Calcular custos fixos, variáveis e tributos
+        fixed_items = cost_breakdown(fixed_costs, 'fixed', cif_value, total_products, costs_factor)
+        variable_items = cost_breakdown(variable_costs, 'variable', cif_value, total_products, costs_factor)
+        tax_items = cost_breakdown(taxes, 'taxes', cif_value, total_products, costs_factor)
+        total_fixed = sum(item['value'] for item in fixed_items)
+        total_variable = sum(item['value'] for item in variable_items)
+        total_taxes = sum(item['value'] for item in tax_items)
+
+        # Custo total
+        total_cost = total_products + freight_value + insurance_value + total_fixed + total_variable + total_taxes
+
+    with timer.stage('rateio'):
+        # Pro-rateio
+        rateio = []
+        for product in products:
+            try:
+                product_value = float(product.get('total', 0))
+                participation = product_value / total_products if total_products > 0 else 0
+                allocated_cost = total_cost * participation
+                quantity = float(product.get('quantity', product.get('quantidade', 1)))
+                unit_cost = allocated_cost / quantity if quantity > 0 else 0
+
+                rateio.append({
+                    'name': product.get('name', product.get('produto', '')),
+                    'brand': product.get('brand', product.get('marca', '')),
+                    'quantity': quantity,
+                    'unit_cost_original': float(product.get('unit_cost', product.get('valorFornecedor', 0))),
+                    'value_original': product_value,
+                    'participation': round(participation * 100, 2),
+                    'allocated_cost': round(allocated_cost, 2),
+                    'unit_cost_final': round(unit_cost, 2)
+                })
+            except (ValueError, TypeError):
+                continue
+
+    result = {
+        "calculation": {
+            "total_products": round(total_products, 2),
+            "freight_value": round(freight_value, 2),
+            "insurance_percentage": insurance_percentage,
+            "insurance_value": round(insurance_value, 2),
+            "cif_value": round(cif_value, 2),
+            "total_fixed": round(total_fixed, 2),
+            "total_variable": round(total_variable, 2),
+            "total_taxes": round(total_taxes, 2),
+            "total_cost": round(total_cost, 2),
+            "currency": currency,
+            "cost_items": [
+                dict(item, value=round(item['value'], 2)) for item in fixed_items + variable_items + tax_items
+            ],
+            "rateio": rateio
+        }
+    }
+    if fx_info:
+        result["calculation"]["fx"] = fx_info
+
+    return result
+
+
+def calculate_shipment(index: int, shipment: Any) -> Dict[str, Any]:
+    """
+    Calcular um embarque de um lote (executado no pool de processos)
+
+    Nunca levanta exceção: erros viram um registro com success=False,
+    para que um embarque inválido não derrube o lote inteiro.
+    """
+    started = time.perf_counter()
+    shipment_id = shipment.get('id', index) if isinstance(shipment, dict) else index
+    item = {"index": index, "id": shipment_id}
+
+    try:
+        if not isinstance(shipment, dict):
+            raise CostCalculationError("Embarque deve ser um objeto JSON", "json_validation")
+        item.update({"success": True, "data": calculate_landed_costs(shipment)})
+    except CostCalculationError as e:
+        item.update({"success": False, "error": str(e), "stage": e.stage})
+    except Exception as e:
+        item.update({"success": False, "error": f"Erro no cálculo: {str(e)}", "stage": "server_error"})
+
+    item["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return item
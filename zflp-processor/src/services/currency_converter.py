@@ -0,0 +1,261 @@
+import json
+import os
+import time
+import logging
+import threading
+from bisect import bisect_right
+from datetime import date, datetime
+from typing import Dict, List, Any, Optional, Sequence, Tuple, Union
+from urllib.request import urlopen
+
+import numpy as np
+
+from services.excel_processor_robust import safe_float
+
+logger = logging.getLogger(__name__)
+
+# Tabela local padrão (pode ser substituída por FX_RATES_FILE ou FX_RATES_URL)
+DEFAULT_RATES_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'fx_rates.json'
+)
+
+# Tempo de vida do cache quando a tabela vem de um endpoint
+URL_CACHE_TTL = int(os.environ.get('FX_RATES_TTL', 3600))
+
+CURRENCY_SYMBOLS = {
+    'USD': '$',
+    'BRL': 'R$',
+    'ARS': 'AR$'
+}
+
+# Campos monetários dos relatórios expressos na moeda local
+REPORT_SUMMARY_FIELDS = ['mercadoria', 'frete_seguro', 'cif', 'custo_total']
+REPORT_TOTALS_FIELDS = ['total_custos', 'custo_total']
+
+DateLike = Union[str, date, datetime, None]
+
+
+class FXRateError(ValueError):
+    """Erro de cotação (moeda ou data sem taxa disponível)"""
+
+
+def parse_rate_date(value: DateLike) -> Optional[date]:
+    """Normalizar data da cotação (None = cotação mais recente)"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return datetime.fromisoformat(str(value).strip()[:10]).date()
+    except ValueError:
+        raise FXRateError(f"Data de câmbio inválida: {value}")
+
+
+class FXRateTable:
+    """
+    Tabela de câmbio com cotações por data
+
+    Todas as taxas são expressas em unidades da moeda por 1 unidade da moeda base;
+    taxas cruzadas (ex.: BRL -> ARS) são derivadas da base.
+    """
+
+    def __init__(self, base: str, rates_by_date: Dict[DateLike, Dict[str, float]], source: str = ''):
+        self.base = base.upper()
+        self.source = source
+        self._rates = {}
+        for rate_date, rates in rates_by_date.items():
+            day = parse_rate_date(rate_date)
+            normalized = {currency.upper(): float(rate) for currency, rate in rates.items()}
+            normalized[self.base] = 1.0
+            self._rates[day] = normalized
+        self.dates = sorted(self._rates)
+
+        if not self.dates:
+            raise FXRateError("Tabela de câmbio vazia")
+
+    @classmethod
+    def from_dict(cls, payload: Dict[str, Any], source: str = '') -> 'FXRateTable':
+        """Criar tabela a partir do formato JSON {"base": ..., "rates": {data: {moeda: taxa}}}"""
+        if 'rates' not in payload:
+            raise FXRateError("Tabela de câmbio sem campo 'rates'")
+        return cls(payload.get('base', 'USD'), payload['rates'], source=source)
+
+    @property
+    def currencies(self) -> List[str]:
+        return sorted({currency for rates in self._rates.values() for currency in rates})
+
+    def rates_for(self, on_date: DateLike = None) -> Tuple[date, Dict[str, float]]:
+        """Cotações vigentes na data (última cotação publicada até a data)"""
+        day = parse_rate_date(on_date)
+        if day is None:
+            rate_date = self.dates[-1]
+        else:
+            index = bisect_right(self.dates, day)
+            if index == 0:
+                raise FXRateError(f"Sem cotação disponível para {day.isoformat()}")
+            rate_date = self.dates[index - 1]
+        return rate_date, self._rates[rate_date]
+
+    def rate(self, from_currency: str, to_currency: str, on_date: DateLike = None) -> float:
+        """Taxa para converter 1 unidade de from_currency em to_currency"""
+        from_currency = from_currency.upper()
+        to_currency = to_currency.upper()
+        if from_currency == to_currency:
+            return 1.0
+
+        rate_date, rates = self.rates_for(on_date)
+        for currency in (from_currency, to_currency):
+            if currency not in rates:
+                raise FXRateError(f"Moeda sem cotação em {rate_date.isoformat()}: {currency}")
+
+        return rates[to_currency] / rates[from_currency]
+
+
+_table_cache: Dict[str, Tuple[float, FXRateTable]] = {}
+_cache_lock = threading.Lock()
+
+
+def _default_source() -> str:
+    return os.environ.get('FX_RATES_URL') or os.environ.get('FX_RATES_FILE') or DEFAULT_RATES_FILE
+
+
+def _read_source(source: str) -> Dict[str, Any]:
+    if source.startswith(('http://', 'https://')):
+        with urlopen(source, timeout=10) as response:
+            return json.loads(response.read().decode('utf-8'))
+    with open(source, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_fx_table(source: Optional[str] = None) -> FXRateTable:
+    """
+    Carregar tabela de câmbio com cache em memória
+
+    Arquivos são recarregados apenas quando o mtime muda; endpoints após URL_CACHE_TTL segundos.
+    """
+    source = source or _default_source()
+    is_url = source.startswith(('http://', 'https://'))
+
+    try:
+        stamp = time.monotonic() if is_url else os.path.getmtime(source)
+    except OSError:
+        raise FXRateError(f"Tabela de câmbio não encontrada: {source}")
+
+    with _cache_lock:
+        cached = _table_cache.get(source)
+        if cached:
+            cached_stamp, table = cached
+            if (is_url and stamp - cached_stamp < URL_CACHE_TTL) or (not is_url and stamp == cached_stamp):
+                return table
+
+        try:
+            table = FXRateTable.from_dict(_read_source(source), source=source)
+        except FXRateError:
+            raise
+        except Exception as e:
+            raise FXRateError(f"Erro ao carregar tabela de câmbio: {str(e)}")
+
+        _table_cache[source] = (stamp, table)
+        logger.info("Tabela de câmbio carregada de %s (%d datas)", source, len(table.dates))
+        return table
+
+
+def clear_fx_cache():
+    """Descartar tabelas em cache (próxima leitura recarrega a fonte)"""
+    with _cache_lock:
+        _table_cache.clear()
+
+
+class CurrencyConverter:
+    """
+    Conversor de moedas vetorizado
+
+    A taxa é resolvida uma única vez por conversão e aplicada à coluna inteira,
+    nunca célula a célula.
+    """
+
+    def __init__(self, table: Optional[FXRateTable] = None):
+        self.table = table or load_fx_table()
+
+    def factor(self, from_currency: str, to_currency: str, on_date: DateLike = None) -> float:
+        return self.table.rate(from_currency, to_currency, on_date)
+
+    def convert_values(self, values: Sequence[Any], from_currency: str, to_currency: str,
+                       on_date: DateLike = None) -> np.ndarray:
+        """Converter uma coluna de valores de uma vez"""
+        column = np.asarray(values, dtype=float)
+        factor = self.factor(from_currency, to_currency, on_date)
+        return column if factor == 1.0 else column * factor
+
+    def convert_records(self, records: List[Dict[str, Any]], fields: List[str], from_currency: str,
+                        to_currency: str, on_date: DateLike = None,
+                        decimals: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Converter campos monetários de uma lista de registros
+
+        Cada campo é tratado como uma coluna; registros sem o campo permanecem sem ele.
+        Valores em texto ("US$ 10,50", "n/a") passam por safe_float, como no
+        ReportModel: uma linha ruim não derruba a conversão das demais.
+        Retorna cópias rasas dos registros.
+        """
+        converted = [dict(record) for record in records]
+        factor = self.factor(from_currency, to_currency, on_date)
+        if factor == 1.0 or not converted:
+            return converted
+
+        for field in fields:
+            positions = [i for i, record in enumerate(converted) if field in record]
+            if not positions:
+                continue
+            column = np.fromiter((safe_float(converted[i][field]) for i in positions),
+                                 dtype=float, count=len(positions)) * factor
+            if decimals is not None:
+                column = np.round(column, decimals)
+            for i, value in zip(positions, column.tolist()):
+                converted[i][field] = value
+
+        return converted
+
+
+def currency_symbol(currency: str) -> str:
+    """Símbolo usado nos relatórios para a moeda"""
+    return CURRENCY_SYMBOLS.get(currency.upper(), currency.upper())
+
+
+def convert_report_data(data: Dict[str, Any], target_currency: str,
+                        converter: Optional[CurrencyConverter] = None,
+                        on_date: DateLike = None) -> Dict[str, Any]:
+    """
+    Converter valores em moeda local de um relatório (custos, resumo e totais)
+
+    Produtos permanecem em US$ (FOB). Retorna uma cópia com 'local_currency' atualizada.
+    """
+    local_currency = str(data.get('local_currency', 'BRL')).upper()
+    target_currency = target_currency.upper()
+    if local_currency == target_currency:
+        return data
+
+    converter = converter or CurrencyConverter()
+    on_date = on_date or data.get('fx_date')
+    factor = converter.factor(local_currency, target_currency, on_date)
+
+    converted = dict(data)
+    converted['local_currency'] = target_currency
+
+    if data.get('costs'):
+        converted['costs'] = converter.convert_records(
+            data['costs'], ['valor'], local_currency, target_currency, on_date, decimals=2
+        )
+
+    for section, fields in (('summary', REPORT_SUMMARY_FIELDS), ('totals', REPORT_TOTALS_FIELDS)):
+        values = data.get(section)
+        if not values:
+            continue
+        converted[section] = dict(values)
+        for field in fields:
+            if field in values:
+                converted[section][field] = round(float(values[field]) * factor, 2)
+
+    return converted
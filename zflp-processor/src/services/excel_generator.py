@@ -1,586 +1,601 @@
+import io
 import xlsxwriter
-from typing import Dict, List, Any
+from typing import Dict, List, Any, BinaryIO, Optional, Tuple, Union
 import os
 from datetime import datetime
+from functools import lru_cache
+from services.report_model import ReportModel, as_report_model, format_quantity
+
+# A partir deste número de produtos as linhas são gravadas em modo constant_memory
+CONSTANT_MEMORY_ROWS = int(os.environ.get('EXCEL_CONSTANT_MEMORY_ROWS', 5000))
+
+# Cabeçalhos e formatos por coluna das tabelas de produtos e custos
+PRODUCT_HEADERS = ('Produto', 'Quantidade', 'FOB (US$)', 'Total (US$)')
+PRODUCT_COLUMN_FORMATS = ('data', 'number', 'currency_usd')
+PRODUCT_TOTAL_FORMULA = '=B{n}*C{n}'
+COST_COLUMN_FORMATS = ('data', 'percent', 'currency_local')
+
+# Formato do valor de cada linha dos totais consolidados
+TOTALS_VALUE_FORMATS = {
+    'total_produtos': 'currency_usd',
+    'total_custos': 'currency_local',
+    'custo_total': 'final_total'
+}
+
+# Formato numérico da moeda local; {symbol} é resolvido por relatório
+LOCAL_CURRENCY_NUM_FORMAT = '"{symbol}" #,##0.00'
+
+# Especificação dos formatos das células, declarada uma única vez por processo
+FORMAT_SPECS = {
+    # Formato para títulos
+    'title': {
+        'bold': True,
+        'font_size': 14,
+        'align': 'center',
+        'valign': 'vcenter',
+        'bg_color': '#1e40af',
+        'font_color': 'white',
+        'border': 1
+    },
+    # Formato para subtítulos
+    'subtitle': {
+        'bold': True,
+        'font_size': 12,
+        'align': 'left',
+        'valign': 'vcenter',
+        'bg_color': '#64748b',
+        'font_color': 'white',
+        'border': 1
+    },
+    # Formato para cabeçalhos de tabela
+    'header': {
+        'bold': True,
+        'font_size': 10,
+        'align': 'center',
+        'valign': 'vcenter',
+        'bg_color': '#e2e8f0',
+        'border': 1
+    },
+    # Formato para dados normais
+    'data': {
+        'font_size': 10,
+        'align': 'left',
+        'valign': 'vcenter',
+        'border': 1
+    },
+    # Formato para números
+    'number': {
+        'font_size': 10,
+        'align': 'right',
+        'valign': 'vcenter',
+        'num_format': '#,##0.00',
+        'border': 1
+    },
+    # Formato para moeda local (custos)
+    'currency_local': {
+        'font_size': 10,
+        'align': 'right',
+        'valign': 'vcenter',
+        'num_format': LOCAL_CURRENCY_NUM_FORMAT,
+        'border': 1
+    },
+    # Formato para moeda americana
+    'currency_usd': {
+        'font_size': 10,
+        'align': 'right',
+        'valign': 'vcenter',
+        'num_format': '$ #,##0.00',
+        'border': 1
+    },
+    # Formato para percentual
+    'percent': {
+        'font_size': 10,
+        'align': 'right',
+        'valign': 'vcenter',
+        'num_format': '0.0000%',
+        'border': 1
+    },
+    # Formato para totais
+    'total': {
+        'bold': True,
+        'font_size': 10,
+        'align': 'right',
+        'valign': 'vcenter',
+        'bg_color': '#fef3c7',
+        'border': 2
+    },
+    # Formato para total final
+    'final_total': {
+        'bold': True,
+        'font_size': 12,
+        'align': 'right',
+        'valign': 'vcenter',
+        'bg_color': '#fbbf24',
+        'border': 2,
+        'num_format': LOCAL_CURRENCY_NUM_FORMAT
+    }
+}
+
+
+@lru_cache(maxsize=None)
+def compile_format_specs(symbol: str) -> Dict[str, Dict[str, Any]]:
+    """Especificações finais para uma moeda local (resolvidas uma vez por símbolo)"""
+    compiled = {}
+    for name, spec in FORMAT_SPECS.items():
+        if spec.get('num_format') == LOCAL_CURRENCY_NUM_FORMAT:
+            spec = dict(spec, num_format=LOCAL_CURRENCY_NUM_FORMAT.format(symbol=symbol))
+        compiled[name] = spec
+    return compiled
+
+
+class ReportContext:
+    """Estado de uma renderização (workbook, planilha e formatos), criado a cada relatório"""
+    
+    __slots__ = ('workbook', 'worksheet', 'formats', 'local_symbol')
+    
+    def __init__(self, workbook: xlsxwriter.Workbook, worksheet, local_symbol: str):
+        self.workbook = workbook
+        self.worksheet = worksheet
+        self.local_symbol = local_symbol
+        # Todos os formatos registrados de uma vez a partir da especificação compilada
+        self.formats = {
+            name: workbook.add_format(spec) for name, spec in compile_format_specs(local_symbol).items()
+        }
 
 
 class ExcelGenerator:
-    """Gerador de Excel com fórmulas para dados de importação ZFLP"""
+    """
+    Gerador de Excel com fórmulas para dados de importação ZFLP
     
-    def __init__(self):
-        self.workbook = None
-        self.worksheet = None
-        self.formats = {}
+    Não guarda estado entre chamadas: cada relatório usa seu próprio ReportContext,
+    então uma única instância pode gerar vários relatórios em threads concorrentes.
+    """
     
-    def generate_excel(self, data: Dict[str, Any], output_path: str) -> str:
+    def _create_workbook(self, output: Union[str, BinaryIO], row_count: int,
+                         constant_memory: Optional[bool] = None) -> xlsxwriter.Workbook:
+        """
+        Cria workbook para caminho ou buffer
+        
+        Relatórios grandes usam constant_memory (cada linha é descartada ao passar para
+        a próxima, por isso as seções escrevem estritamente em ordem); os pequenos em
+        buffer são montados inteiramente em memória, sem arquivos temporários.
+        """
+        if constant_memory is None:
+            constant_memory = row_count >= CONSTANT_MEMORY_ROWS
+        
+        if constant_memory:
+            options = {'constant_memory': True}
+        elif isinstance(output, (str, os.PathLike)):
+            options = {}
+        else:
+            options = {'in_memory': True}
+        
+        return xlsxwriter.Workbook(output, options)
+    
+    def generate_excel(self, data: Union[Dict[str, Any], ReportModel], output_path: Union[str, BinaryIO],
+                       constant_memory: Optional[bool] = None) -> Union[str, BinaryIO]:
         """
         Gera arquivo Excel formatado com fórmulas
         
         Args:
-            data: Dados processados da planilha
-            output_path: Caminho para salvar o Excel
+            data: Dados processados da planilha (ou ReportModel já montado)
+            output_path: Caminho ou buffer binário (ex.: BytesIO) para salvar o Excel
+            constant_memory: Forçar modo de memória constante (padrão: automático pelo nº de produtos)
             
         Returns:
-            Caminho do arquivo Excel gerado
+            Caminho (ou buffer) do arquivo Excel gerado
         """
+        workbook = None
         try:
-            # Criar workbook
-            self.workbook = xlsxwriter.Workbook(output_path)
-            self.worksheet = self.workbook.add_worksheet('Relatório ZFLP')
+            model = as_report_model(data)
             
-            # Configurar formatos
-            self._setup_formats()
+            # Criar workbook e contexto desta renderização (formatos registrados de uma vez)
+            workbook = self._create_workbook(output_path, model.product_count, constant_memory)
+            ctx = ReportContext(workbook, workbook.add_worksheet('Relatório ZFLP'), model.local_symbol)
             
             # Configurar página para impressão
-            self._setup_page_format()
+            self._setup_page_format(ctx)
             
             # Construir planilha
             current_row = 0
             
             # Cabeçalho
-            current_row = self._build_header(data, current_row)
+            current_row = self._build_header(ctx, model, current_row)
             
             # Resumo financeiro
-            current_row = self._build_summary_section(data, current_row)
+            current_row = self._build_summary_section(ctx, model, current_row)
             
             # Tabela de produtos
-            current_row = self._build_products_section(data, current_row)
+            current_row = self._build_products_section(ctx, model, current_row)
             
             # Custos operacionais
-            current_row = self._build_costs_section(data, current_row)
+            current_row = self._build_costs_section(ctx, model, current_row)
             
             # Totais finais
-            current_row = self._build_totals_section(data, current_row)
+            current_row = self._build_totals_section(ctx, model, current_row)
             
             # Fechar workbook
-            self.workbook.close()
+            workbook.close()
             
             return output_path
             
         except Exception as e:
-            if self.workbook:
-                self.workbook.close()
+            if workbook:
+                workbook.close()
             raise Exception(f"Erro ao gerar Excel: {str(e)}")
     
-    def _setup_formats(self):
-        """Configura formatos para células"""
-        # Formato para títulos
-        self.formats['title'] = self.workbook.add_format({
-            'bold': True,
-            'font_size': 14,
-            'align': 'center',
-            'valign': 'vcenter',
-            'bg_color': '#1e40af',
-            'font_color': 'white',
-            'border': 1
-        })
-        
-        # Formato para subtítulos
-        self.formats['subtitle'] = self.workbook.add_format({
-            'bold': True,
-            'font_size': 12,
-            'align': 'left',
-            'valign': 'vcenter',
-            'bg_color': '#64748b',
-            'font_color': 'white',
-            'border': 1
-        })
-        
-        # Formato para cabeçalhos de tabela
-        self.formats['header'] = self.workbook.add_format({
-            'bold': True,
-            'font_size': 10,
-            'align': 'center',
-            'valign': 'vcenter',
-            'bg_color': '#e2e8f0',
-            'border': 1
-        })
-        
-        # Formato para dados normais
-        self.formats['data'] = self.workbook.add_format({
-            'font_size': 10,
-            'align': 'left',
-            'valign': 'vcenter',
-            'border': 1
-        })
-        
-        # Formato para números
-        self.formats['number'] = self.workbook.add_format({
-            'font_size': 10,
-            'align': 'right',
-            'valign': 'vcenter',
-            'num_format': '#,##0.00',
-            'border': 1
-        })
-        
-        # Formato para moeda brasileira
-        self.formats['currency_brl'] = self.workbook.add_format({
-            'font_size': 10,
-            'align': 'right',
-            'valign': 'vcenter',
-            'num_format': 'R$ #,##0.00',
-            'border': 1
-        })
-        
-        # Formato para moeda americana
-        self.formats['currency_usd'] = self.workbook.add_format({
-            'font_size': 10,
-            'align': 'right',
-            'valign': 'vcenter',
-            'num_format': '$ #,##0.00',
-            'border': 1
-        })
-        
-        # Formato para percentual
-        self.formats['percent'] = self.workbook.add_format({
-            'font_size': 10,
-            'align': 'right',
-            'valign': 'vcenter',
-            'num_format': '0.0000%',
-            'border': 1
-        })
-        
-        # Formato para totais
-        self.formats['total'] = self.workbook.add_format({
-            'bold': True,
-            'font_size': 10,
-            'align': 'right',
-            'valign': 'vcenter',
-            'bg_color': '#fef3c7',
-            'border': 2
-        })
-        
-        # Formato para total final
-        self.formats['final_total'] = self.workbook.add_format({
-            'bold': True,
-            'font_size': 12,
-            'align': 'right',
-            'valign': 'vcenter',
-            'bg_color': '#fbbf24',
-            'border': 2,
-            'num_format': 'R$ #,##0.00'
-        })
+    def generate_excel_bytes(self, data: Union[Dict[str, Any], ReportModel], constant_memory: Optional[bool] = None) -> bytes:
+        """Gera o Excel em memória e retorna o conteúdo (para envio direto na resposta HTTP)"""
+        buffer = io.BytesIO()
+        self.generate_excel(data, buffer, constant_memory)
+        return buffer.getvalue()
     
-    def _setup_page_format(self):
+    def _setup_page_format(self, ctx: ReportContext):
         """Configura formato da página para impressão"""
         # Configurar para papel ofício (216x330mm) em modo retrato
-        self.worksheet.set_paper(9)  # A4 (mais próximo do ofício)
-        self.worksheet.set_portrait()
+        ctx.worksheet.set_paper(9)  # A4 (mais próximo do ofício)
+        ctx.worksheet.set_portrait()
         
         # Configurar margens (em polegadas)
-        self.worksheet.set_margins(0.79, 0.79, 0.79, 0.79)  # ~20mm
+        ctx.worksheet.set_margins(0.79, 0.79, 0.79, 0.79)  # ~20mm
         
         # Configurar cabeçalho e rodapé
         metadata = {}
-        self.worksheet.set_header(
+        ctx.worksheet.set_header(
             f'&C&14&B RELATÓRIO DE IMPORTAÇÃO - ZFLP'
         )
-        self.worksheet.set_footer(
+        ctx.worksheet.set_footer(
             f'&L Gerado em: {datetime.now().strftime("%d/%m/%Y %H:%M")} &R Página &P de &N'
         )
         
         # Configurar larguras das colunas
-        self.worksheet.set_column('A:A', 25)  # Descrição/Produto
-        self.worksheet.set_column('B:B', 12)  # Quantidade
-        self.worksheet.set_column('C:C', 15)  # Valores
-        self.worksheet.set_column('D:D', 15)  # Totais
-        self.worksheet.set_column('E:E', 15)  # Extra
+        ctx.worksheet.set_column('A:A', 25)  # Descrição/Produto
+        ctx.worksheet.set_column('B:B', 12)  # Quantidade
+        ctx.worksheet.set_column('C:C', 15)  # Valores
+        ctx.worksheet.set_column('D:D', 15)  # Totais
+        ctx.worksheet.set_column('E:E', 15)  # Extra
     
-    def _build_header(self, data: Dict[str, Any], start_row: int) -> int:
+    def _build_header(self, ctx: ReportContext, model: ReportModel, start_row: int) -> int:
         """Constrói cabeçalho da planilha"""
         current_row = start_row
         
         # Título principal
-        self.worksheet.merge_range(
+        ctx.worksheet.merge_range(
             current_row, 0, current_row, 4,
             'RELATÓRIO DE IMPORTAÇÃO - ZFLP',
-            self.formats['title']
+            ctx.formats['title']
         )
         current_row += 2
         
         # Informações do documento
-        metadata = data.get('metadata', {})
-        filename = metadata.get('filename', 'N/A')
-        processed_at = metadata.get('processed_at', datetime.now().isoformat())
-        
-        # Formatar data
-        try:
-            date_obj = datetime.fromisoformat(processed_at.replace('Z', '+00:00'))
-            formatted_date = date_obj.strftime('%d/%m/%Y %H:%M')
-        except:
-            formatted_date = processed_at
-        
-        self.worksheet.write(current_row, 0, 'Arquivo:', self.formats['data'])
-        self.worksheet.write(current_row, 1, filename, self.formats['data'])
+        ctx.worksheet.write(current_row, 0, 'Arquivo:', ctx.formats['data'])
+        ctx.worksheet.write(current_row, 1, model.filename, ctx.formats['data'])
         current_row += 1
         
-        self.worksheet.write(current_row, 0, 'Processado em:', self.formats['data'])
-        self.worksheet.write(current_row, 1, formatted_date, self.formats['data'])
+        ctx.worksheet.write(current_row, 0, 'Processado em:', ctx.formats['data'])
+        ctx.worksheet.write(current_row, 1, model.processed_at, ctx.formats['data'])
         current_row += 2
         
         return current_row
     
-    def _build_summary_section(self, data: Dict[str, Any], start_row: int) -> int:
+    def _build_summary_section(self, ctx: ReportContext, model: ReportModel, start_row: int) -> int:
         """Constrói seção de resumo financeiro"""
         current_row = start_row
-        summary = data.get('summary', {})
         
-        if not summary:
+        if not model.summary:
             return current_row
         
         # Título da seção
-        self.worksheet.merge_range(
+        ctx.worksheet.merge_range(
             current_row, 0, current_row, 4,
             'RESUMO FINANCEIRO',
-            self.formats['subtitle']
+            ctx.formats['subtitle']
         )
         current_row += 1
         
         # Cabeçalhos
-        self.worksheet.write(current_row, 0, 'Item', self.formats['header'])
-        self.worksheet.write(current_row, 1, 'Valor (R$)', self.formats['header'])
+        ctx.worksheet.write(current_row, 0, 'Item', ctx.formats['header'])
+        ctx.worksheet.write(current_row, 1, f'Valor ({ctx.local_symbol})', ctx.formats['header'])
         current_row += 1
         
         # Dados do resumo
-        summary_start_row = current_row
-        
-        if 'mercadoria' in summary:
-            self.worksheet.write(current_row, 0, 'Mercadoria', self.formats['data'])
-            self.worksheet.write(current_row, 1, summary['mercadoria'], self.formats['currency_brl'])
-            current_row += 1
-        
-        if 'frete_seguro' in summary:
-            self.worksheet.write(current_row, 0, 'Frete + Seguro', self.formats['data'])
-            self.worksheet.write(current_row, 1, summary['frete_seguro'], self.formats['currency_brl'])
-            current_row += 1
-        
-        if 'cif' in summary:
-            self.worksheet.write(current_row, 0, 'CIF', self.formats['data'])
-            self.worksheet.write(current_row, 1, summary['cif'], self.formats['currency_brl'])
-            current_row += 1
-        
-        if 'custo_total' in summary:
-            self.worksheet.write(current_row, 0, 'Custo Total', self.formats['data'])
-            self.worksheet.write(current_row, 1, summary['custo_total'], self.formats['currency_brl'])
+        for label, value in model.summary:
+            ctx.worksheet.write(current_row, 0, label, ctx.formats['data'])
+            ctx.worksheet.write(current_row, 1, value, ctx.formats['currency_local'])
             current_row += 1
         
         current_row += 1
         return current_row
     
-    def _build_products_section(self, data: Dict[str, Any], start_row: int) -> int:
+    def _build_products_section(self, ctx: ReportContext, model: ReportModel, start_row: int) -> int:
         """Constrói seção de produtos"""
         current_row = start_row
-        products = data.get('products', [])
         
-        if not products:
+        if not model.product_count:
             return current_row
         
         # Título da seção
-        self.worksheet.merge_range(
+        ctx.worksheet.merge_range(
             current_row, 0, current_row, 4,
             'PRODUTOS IMPORTADOS',
-            self.formats['subtitle']
+            ctx.formats['subtitle']
         )
         current_row += 1
         
         # Cabeçalhos
-        self.worksheet.write(current_row, 0, 'Produto', self.formats['header'])
-        self.worksheet.write(current_row, 1, 'Quantidade', self.formats['header'])
-        self.worksheet.write(current_row, 2, 'FOB (US$)', self.formats['header'])
-        self.worksheet.write(current_row, 3, 'Total (US$)', self.formats['header'])
+        ctx.worksheet.write_row(current_row, 0, PRODUCT_HEADERS, ctx.formats['header'])
         current_row += 1
         
-        # Dados dos produtos
+        # Dados dos produtos (linha a linha, em ordem: exigência do modo constant_memory);
+        # o total de cada linha é a fórmula =B*C com o resultado já calculado em cache
         products_start_row = current_row
-        
-        for product in products:
-            self.worksheet.write(current_row, 0, product.get('produto', ''), self.formats['data'])
-            self.worksheet.write(current_row, 1, product.get('quantidade', 0), self.formats['number'])
-            self.worksheet.write(current_row, 2, product.get('fob', 0), self.formats['currency_usd'])
-            
-            # Fórmula para calcular total (Quantidade * FOB)
-            formula = f'=B{current_row+1}*C{current_row+1}'
-            self.worksheet.write_formula(current_row, 3, formula, self.formats['currency_usd'])
-            
-            current_row += 1
+        current_row = self._write_rows(
+            ctx, current_row, model.product_rows(), PRODUCT_COLUMN_FORMATS, PRODUCT_TOTAL_FORMULA
+        )
         
         # Linha de totais
-        self.worksheet.write(current_row, 0, 'TOTAL', self.formats['total'])
+        ctx.worksheet.write(current_row, 0, 'TOTAL', ctx.formats['total'])
         
         # Fórmula para somar quantidades
         qty_formula = f'=SUM(B{products_start_row+1}:B{current_row})'
-        self.worksheet.write_formula(current_row, 1, qty_formula, self.formats['total'])
+        ctx.worksheet.write_formula(current_row, 1, qty_formula, ctx.formats['total'])
         
-        self.worksheet.write(current_row, 2, '', self.formats['total'])
+        ctx.worksheet.write(current_row, 2, '', ctx.formats['total'])
         
         # Fórmula para somar totais
         total_formula = f'=SUM(D{products_start_row+1}:D{current_row})'
-        self.worksheet.write_formula(current_row, 3, total_formula, self.formats['total'])
+        ctx.worksheet.write_formula(current_row, 3, total_formula, ctx.formats['total'])
         
         current_row += 2
         return current_row
     
-    def _build_costs_section(self, data: Dict[str, Any], start_row: int) -> int:
+    def _cost_headers(self, ctx: ReportContext) -> Tuple[str, str, str]:
+        return ('Item de Custo', 'Percentual (%)', f'Valor ({ctx.local_symbol})')
+    
+    def _write_rows(self, ctx: ReportContext, first_row: int, rows: List[tuple],
+                    column_formats: Tuple[str, ...], row_formula: Optional[str] = None) -> int:
+        """
+        Grava linhas pré-montadas em ordem e retorna a próxima linha livre
+        
+        O formato e o tipo de cada coluna são resolvidos uma vez para a tabela inteira
+        (primeira coluna texto, demais números), sem a detecção de tipo de write();
+        os valores numéricos já chegam como float do ReportModel (safe_float). Os
+        formatos vão em cada célula, não como padrão da coluna (set_column): as
+        mesmas colunas têm formatos diferentes no resumo, produtos e custos.
+        row_formula ('=B{n}*C{n}') acrescenta uma coluna de fórmula na mesma linha,
+        com o formato da última coluna e, se a linha trouxer, o valor já calculado.
+        """
+        worksheet = ctx.worksheet
+        text_format, *number_formats = [ctx.formats[name] for name in column_formats]
+        number_columns = list(enumerate(number_formats, start=1))
+        formula_col = len(column_formats)
+        
+        row = first_row
+        for values in rows:
+            if values[0]:
+                worksheet.write_string(row, 0, values[0], text_format)
+            else:
+                worksheet.write_blank(row, 0, None, text_format)
+            for col, cell_format in number_columns:
+                worksheet.write_number(row, col, values[col], cell_format)
+            if row_formula:
+                cached = values[formula_col] if len(values) > formula_col else 0
+                worksheet.write_formula(row, formula_col, row_formula.format(n=row + 1), number_formats[-1], cached)
+            row += 1
+        return row
+    
+    def _build_costs_section(self, ctx: ReportContext, model: ReportModel, start_row: int) -> int:
         """Constrói seção de custos operacionais"""
         current_row = start_row
-        costs = data.get('costs', [])
         
-        if not costs:
+        if not model.cost_items:
             return current_row
         
         # Título da seção
-        self.worksheet.merge_range(
+        ctx.worksheet.merge_range(
             current_row, 0, current_row, 4,
             'CUSTOS OPERACIONAIS',
-            self.formats['subtitle']
+            ctx.formats['subtitle']
         )
         current_row += 1
         
         # Cabeçalhos
-        self.worksheet.write(current_row, 0, 'Item de Custo', self.formats['header'])
-        self.worksheet.write(current_row, 1, 'Percentual (%)', self.formats['header'])
-        self.worksheet.write(current_row, 2, 'Valor (R$)', self.formats['header'])
+        ctx.worksheet.write_row(current_row, 0, self._cost_headers(ctx), ctx.formats['header'])
         current_row += 1
         
-        # Dados dos custos
+        # Dados dos custos (percentual zero aparece como '-')
         costs_start_row = current_row
         
-        for cost in costs:
-            self.worksheet.write(current_row, 0, cost.get('item', ''), self.formats['data'])
-            
-            # Percentual (converter de decimal para percentual)
-            percentual = cost.get('percentual', 0) / 100 if cost.get('percentual', 0) > 0 else 0
+        for item, percentual, valor in model.cost_rows():
+            ctx.worksheet.write_string(current_row, 0, item, ctx.formats['data'])
             if percentual > 0:
-                self.worksheet.write(current_row, 1, percentual, self.formats['percent'])
+                ctx.worksheet.write_number(current_row, 1, percentual, ctx.formats['percent'])
             else:
-                self.worksheet.write(current_row, 1, '-', self.formats['data'])
-            
-            self.worksheet.write(current_row, 2, cost.get('valor', 0), self.formats['currency_brl'])
-            
+                ctx.worksheet.write_string(current_row, 1, '-', ctx.formats['data'])
+            ctx.worksheet.write_number(current_row, 2, valor, ctx.formats['currency_local'])
             current_row += 1
         
         # Linha de total de custos
-        self.worksheet.write(current_row, 0, 'TOTAL CUSTOS', self.formats['total'])
-        self.worksheet.write(current_row, 1, '', self.formats['total'])
+        ctx.worksheet.write(current_row, 0, 'TOTAL CUSTOS', ctx.formats['total'])
+        ctx.worksheet.write(current_row, 1, '', ctx.formats['total'])
         
         # Fórmula para somar custos
         costs_formula = f'=SUM(C{costs_start_row+1}:C{current_row})'
-        self.worksheet.write_formula(current_row, 2, costs_formula, self.formats['total'])
+        ctx.worksheet.write_formula(current_row, 2, costs_formula, ctx.formats['total'])
         
         current_row += 2
         return current_row
     
-    def _build_totals_section(self, data: Dict[str, Any], start_row: int) -> int:
+    def _build_totals_section(self, ctx: ReportContext, model: ReportModel, start_row: int) -> int:
         """Constrói seção de totais finais"""
         current_row = start_row
-        totals = data.get('totals', {})
+        totals_lines = model.totals_lines
         
-        if not totals:
+        if not totals_lines:
             return current_row
         
         # Título da seção
-        self.worksheet.merge_range(
+        ctx.worksheet.merge_range(
             current_row, 0, current_row, 4,
             'TOTAIS CONSOLIDADOS',
-            self.formats['subtitle']
+            ctx.formats['subtitle']
         )
         current_row += 1
         
         # Cabeçalhos
-        self.worksheet.write(current_row, 0, 'Descrição', self.formats['header'])
-        self.worksheet.write(current_row, 1, 'Valor', self.formats['header'])
+        ctx.worksheet.write(current_row, 0, 'Descrição', ctx.formats['header'])
+        ctx.worksheet.write(current_row, 1, 'Valor', ctx.formats['header'])
         current_row += 1
         
         # Dados dos totais
-        if 'total_produtos' in totals:
-            self.worksheet.write(current_row, 0, 'Total Produtos (US$)', self.formats['data'])
-            self.worksheet.write(current_row, 1, totals['total_produtos'], self.formats['currency_usd'])
-            current_row += 1
-        
-        if 'total_quantidade' in totals:
-            self.worksheet.write(current_row, 0, 'Total Quantidade', self.formats['data'])
-            self.worksheet.write(current_row, 1, f"{totals['total_quantidade']} unidades", self.formats['data'])
-            current_row += 1
-        
-        if 'total_custos' in totals:
-            self.worksheet.write(current_row, 0, 'Total Custos (R$)', self.formats['data'])
-            self.worksheet.write(current_row, 1, totals['total_custos'], self.formats['currency_brl'])
-            current_row += 1
-        
-        if 'custo_total' in totals:
-            self.worksheet.write(current_row, 0, 'CUSTO TOTAL FINAL (R$)', self.formats['data'])
-            self.worksheet.write(current_row, 1, totals['custo_total'], self.formats['final_total'])
+        for key, label, value in totals_lines:
+            ctx.worksheet.write(current_row, 0, label, ctx.formats['data'])
+            if key == 'total_quantidade':
+                ctx.worksheet.write(current_row, 1, f"{format_quantity(value)} unidades", ctx.formats['data'])
+            else:
+                ctx.worksheet.write(current_row, 1, value, ctx.formats[TOTALS_VALUE_FORMATS[key]])
             current_row += 1
         
         current_row += 1
         return current_row
     
-    def generate_editable_template(self, data: Dict[str, Any], output_path: str) -> str:
+    def generate_editable_template(self, data: Union[Dict[str, Any], ReportModel], output_path: Union[str, BinaryIO]) -> Union[str, BinaryIO]:
         """
         Gera template editável com fórmulas dinâmicas
         
         Args:
             data: Dados processados
-            output_path: Caminho para salvar o Excel
+            output_path: Caminho ou buffer binário (ex.: BytesIO) para salvar o Excel
             
         Returns:
-            Caminho do arquivo Excel gerado
+            Caminho (ou buffer) do arquivo Excel gerado
         """
+        workbook = None
         try:
-            self.workbook = xlsxwriter.Workbook(output_path)
-            self.worksheet = self.workbook.add_worksheet('Template Editável')
+            model = as_report_model(data)
+            
+            # Template tem no máximo 20 produtos: sempre cabe em memória
+            workbook = self._create_workbook(output_path, 0, constant_memory=False)
+            ctx = ReportContext(workbook, workbook.add_worksheet('Template Editável'), model.local_symbol)
             
-            self._setup_formats()
-            self._setup_page_format()
+            self._setup_page_format(ctx)
             
             current_row = 0
             
             # Instruções
-            self.worksheet.merge_range(
+            ctx.worksheet.merge_range(
                 current_row, 0, current_row, 4,
                 'TEMPLATE EDITÁVEL - ZFLP (Modifique os valores conforme necessário)',
-                self.formats['title']
+                ctx.formats['title']
             )
             current_row += 2
             
             # Seção de produtos editável
-            current_row = self._build_editable_products_section(data, current_row)
+            current_row = self._build_editable_products_section(ctx, model, current_row)
             
             # Seção de custos editável
-            current_row = self._build_editable_costs_section(data, current_row)
+            current_row = self._build_editable_costs_section(ctx, model, current_row)
             
             # Totais com fórmulas dinâmicas
-            current_row = self._build_dynamic_totals_section(current_row)
+            current_row = self._build_dynamic_totals_section(ctx, current_row)
             
-            self.workbook.close()
+            workbook.close()
             return output_path
             
         except Exception as e:
-            if self.workbook:
-                self.workbook.close()
+            if workbook:
+                workbook.close()
             raise Exception(f"Erro ao gerar template editável: {str(e)}")
     
-    def _build_editable_products_section(self, data: Dict[str, Any], start_row: int) -> int:
+    def generate_editable_template_bytes(self, data: Union[Dict[str, Any], ReportModel]) -> bytes:
+        """Gera o template editável em memória e retorna o conteúdo"""
+        buffer = io.BytesIO()
+        self.generate_editable_template(data, buffer)
+        return buffer.getvalue()
+    
+    def _build_editable_products_section(self, ctx: ReportContext, model: ReportModel, start_row: int) -> int:
         """Constrói seção editável de produtos"""
         current_row = start_row
-        products = data.get('products', [])
         
         # Título
-        self.worksheet.merge_range(
+        ctx.worksheet.merge_range(
             current_row, 0, current_row, 4,
             'PRODUTOS (Editável)',
-            self.formats['subtitle']
+            ctx.formats['subtitle']
         )
         current_row += 1
         
         # Cabeçalhos
-        self.worksheet.write(current_row, 0, 'Produto', self.formats['header'])
-        self.worksheet.write(current_row, 1, 'Quantidade', self.formats['header'])
-        self.worksheet.write(current_row, 2, 'FOB (US$)', self.formats['header'])
-        self.worksheet.write(current_row, 3, 'Total (US$)', self.formats['header'])
+        ctx.worksheet.write_row(current_row, 0, PRODUCT_HEADERS, ctx.formats['header'])
         current_row += 1
         
-        # Produtos com células editáveis
+        # Produtos com células editáveis (máximo 20) e linhas vazias para novos produtos;
+        # cada linha tem sua própria fórmula para continuar editável isoladamente
         products_start = current_row
-        for i, product in enumerate(products[:20]):  # Máximo 20 produtos
-            self.worksheet.write(current_row, 0, product.get('produto', ''), self.formats['data'])
-            self.worksheet.write(current_row, 1, product.get('quantidade', 0), self.formats['number'])
-            self.worksheet.write(current_row, 2, product.get('fob', 0), self.formats['currency_usd'])
-            
-            # Fórmula dinâmica para total
-            formula = f'=B{current_row+1}*C{current_row+1}'
-            self.worksheet.write_formula(current_row, 3, formula, self.formats['currency_usd'])
-            
-            current_row += 1
-        
-        # Adicionar linhas vazias para novos produtos
-        for i in range(5):
-            self.worksheet.write(current_row, 0, '', self.formats['data'])
-            self.worksheet.write(current_row, 1, 0, self.formats['number'])
-            self.worksheet.write(current_row, 2, 0, self.formats['currency_usd'])
-            
-            formula = f'=B{current_row+1}*C{current_row+1}'
-            self.worksheet.write_formula(current_row, 3, formula, self.formats['currency_usd'])
-            
-            current_row += 1
+        rows = model.product_rows(limit=20) + [('', 0, 0, 0)] * 5
+        current_row = self._write_rows(ctx, current_row, rows, PRODUCT_COLUMN_FORMATS, PRODUCT_TOTAL_FORMULA)
         
         # Total de produtos
-        self.worksheet.write(current_row, 0, 'TOTAL PRODUTOS', self.formats['total'])
+        ctx.worksheet.write(current_row, 0, 'TOTAL PRODUTOS', ctx.formats['total'])
         qty_formula = f'=SUM(B{products_start+1}:B{current_row})'
-        self.worksheet.write_formula(current_row, 1, qty_formula, self.formats['total'])
-        self.worksheet.write(current_row, 2, '', self.formats['total'])
+        ctx.worksheet.write_formula(current_row, 1, qty_formula, ctx.formats['total'])
+        ctx.worksheet.write(current_row, 2, '', ctx.formats['total'])
         total_formula = f'=SUM(D{products_start+1}:D{current_row})'
-        self.worksheet.write_formula(current_row, 3, total_formula, self.formats['total'])
+        ctx.worksheet.write_formula(current_row, 3, total_formula, ctx.formats['total'])
         
         current_row += 2
         return current_row
     
-    def _build_editable_costs_section(self, data: Dict[str, Any], start_row: int) -> int:
+    def _build_editable_costs_section(self, ctx: ReportContext, model: ReportModel, start_row: int) -> int:
         """Constrói seção editável de custos"""
         current_row = start_row
-        costs = data.get('costs', [])
         
         # Título
-        self.worksheet.merge_range(
+        ctx.worksheet.merge_range(
             current_row, 0, current_row, 4,
             'CUSTOS OPERACIONAIS (Editável)',
-            self.formats['subtitle']
+            ctx.formats['subtitle']
         )
         current_row += 1
         
         # Cabeçalhos
-        self.worksheet.write(current_row, 0, 'Item de Custo', self.formats['header'])
-        self.worksheet.write(current_row, 1, 'Percentual (%)', self.formats['header'])
-        self.worksheet.write(current_row, 2, 'Valor (R$)', self.formats['header'])
+        ctx.worksheet.write_row(current_row, 0, self._cost_headers(ctx), ctx.formats['header'])
         current_row += 1
         
-        # Custos com células editáveis
+        # Custos com células editáveis (máximo 15) e linhas vazias para novos custos
         costs_start = current_row
-        for cost in costs[:15]:  # Máximo 15 custos
-            self.worksheet.write(current_row, 0, cost.get('item', ''), self.formats['data'])
-            
-            percentual = cost.get('percentual', 0) / 100 if cost.get('percentual', 0) > 0 else 0
-            self.worksheet.write(current_row, 1, percentual, self.formats['percent'])
-            self.worksheet.write(current_row, 2, cost.get('valor', 0), self.formats['currency_brl'])
-            
-            current_row += 1
-        
-        # Adicionar linhas vazias para novos custos
-        for i in range(5):
-            self.worksheet.write(current_row, 0, '', self.formats['data'])
-            self.worksheet.write(current_row, 1, 0, self.formats['percent'])
-            self.worksheet.write(current_row, 2, 0, self.formats['currency_brl'])
-            current_row += 1
+        rows = model.cost_rows(limit=15) + [('', 0, 0)] * 5
+        current_row = self._write_rows(ctx, current_row, rows, COST_COLUMN_FORMATS)
         
         # Total de custos
-        self.worksheet.write(current_row, 0, 'TOTAL CUSTOS', self.formats['total'])
-        self.worksheet.write(current_row, 1, '', self.formats['total'])
+        ctx.worksheet.write(current_row, 0, 'TOTAL CUSTOS', ctx.formats['total'])
+        ctx.worksheet.write(current_row, 1, '', ctx.formats['total'])
         costs_formula = f'=SUM(C{costs_start+1}:C{current_row})'
-        self.worksheet.write_formula(current_row, 2, costs_formula, self.formats['total'])
+        ctx.worksheet.write_formula(current_row, 2, costs_formula, ctx.formats['total'])
         
         current_row += 2
         return current_row
     
-    def _build_dynamic_totals_section(self, start_row: int) -> int:
+    def _build_dynamic_totals_section(self, ctx: ReportContext, start_row: int) -> int:
         """Constrói seção de totais com fórmulas dinâmicas"""
         current_row = start_row
         
         # Título
-        self.worksheet.merge_range(
+        ctx.worksheet.merge_range(
             current_row, 0, current_row, 4,
             'TOTAIS AUTOMÁTICOS',
-            self.formats['subtitle']
+            ctx.formats['subtitle']
         )
         current_row += 1
         
         # Instruções
-        self.worksheet.write(current_row, 0, 'Os totais abaixo são calculados automaticamente', self.formats['data'])
+        ctx.worksheet.write(current_row, 0, 'Os totais abaixo são calculados automaticamente', ctx.formats['data'])
         current_row += 2
         
         # Totais dinâmicos (referências devem ser ajustadas conforme a estrutura real)
-        self.worksheet.write(current_row, 0, 'CUSTO TOTAL FINAL (R$)', self.formats['data'])
+        ctx.worksheet.write(current_row, 0, f'CUSTO TOTAL FINAL ({ctx.local_symbol})', ctx.formats['data'])
         # Esta fórmula deve ser ajustada conforme a localização real dos totais
-        self.worksheet.write(current_row, 1, 'Ajustar fórmula conforme necessário', self.formats['final_total'])
+        ctx.worksheet.write(current_row, 1, 'Ajustar fórmula conforme necessário', ctx.formats['final_total'])
         
         current_row += 1
         return current_row
@@ -6,10 +6,78 @@ from typing import Dict, List, Any, Optional, Tuple
 import re
 from decimal import Decimal, InvalidOperation
 
-# Configurar logging
-logging.basicConfig(level=logging.INFO)
+from services.metrics import StageTimer
+from services.upload_limits import UPLOAD_MAX_BYTES
+from logging_config import LogRateLimiter
+
 logger = logging.getLogger(__name__)
 
+# Avisos por célula: no máximo 10 por minuto (uma planilha com milhares de células ruins não inunda o log)
+_conversion_warnings = LogRateLimiter(limit=10, interval=60)
+
+def safe_float(value: Any) -> float:
+    """
+    Parser numérico ultra-robusto: moeda, separadores BR/US e texto inválido (vira 0.0)
+
+    Usado na leitura das planilhas e na montagem dos relatórios (ReportModel).
+    """
+    try:
+        if pd.isna(value) or value == '' or value is None:
+            return 0.0
+        
+        # Se já é número
+        if isinstance(value, (int, float)):
+            return float(value) if not pd.isna(value) else 0.0
+        
+        # Converter para string e limpar
+        str_value = str(value).strip()
+        
+        if not str_value:
+            return 0.0
+        
+        # Remover símbolos de moeda e espaços
+        cleaned = re.sub(r'[^\d.,\-+]', '', str_value)
+        
+        if not cleaned:
+            return 0.0
+        
+        # Lidar com diferentes formatos decimais
+        if ',' in cleaned and '.' in cleaned:
+            # Determinar qual é o separador decimal
+            last_comma = cleaned.rfind(',')
+            last_dot = cleaned.rfind('.')
+            
+            if last_comma > last_dot:
+                # Formato: 1.234,56
+                cleaned = cleaned.replace('.', '').replace(',', '.')
+            else:
+                # Formato: 1,234.56
+                cleaned = cleaned.replace(',', '')
+        elif ',' in cleaned:
+            # Verificar se é decimal ou milhares
+            parts = cleaned.split(',')
+            if len(parts) == 2 and len(parts[1]) <= 2 and parts[1].isdigit():
+                # Provavelmente decimal: 12,34
+                cleaned = cleaned.replace(',', '.')
+            else:
+                # Provavelmente milhares: 1,234
+                cleaned = cleaned.replace(',', '')
+        
+        # Tentar conversão com Decimal para maior precisão
+        try:
+            decimal_value = Decimal(cleaned)
+            return float(decimal_value)
+        except InvalidOperation:
+            pass
+        
+        # Fallback para float direto
+        return float(cleaned)
+        
+    except (ValueError, TypeError, InvalidOperation) as e:
+        _conversion_warnings.log(logger, logging.WARNING, "Erro ao converter %r para número: %s", value, e)
+        return 0.0
+
+
 class RobustExcelProcessor:
     """
     Processador de Excel ultra-robusto com validação completa
@@ -17,7 +85,7 @@ class RobustExcelProcessor:
     
     def __init__(self):
         self.supported_formats = ['.xlsx', '.xls', '.csv']
-        self.max_file_size = 50 * 1024 * 1024  # 50MB
+        self.max_file_size = UPLOAD_MAX_BYTES  # 50MB por padrão
         self.max_rows = 10000
         
         # Padrões para detecção de colunas
@@ -63,7 +131,7 @@ class RobustExcelProcessor:
             return True, "Arquivo válido"
             
         except Exception as e:
-            logger.error(f"Erro na validação do arquivo: {e}")
+            logger.error("Erro na validação do arquivo: %s", e)
             return False, f"Erro na validação: {str(e)}"
     
     def read_excel_file(self, file_path: str) -> Tuple[Optional[pd.DataFrame], str]:
@@ -78,15 +146,15 @@ class RobustExcelProcessor:
             
             for attempt in read_attempts:
                 try:
-                    logger.info(f"Tentando ler com configuração: {attempt}")
+                    logger.debug("Tentando ler com configuração: %s", attempt)
                     df = pd.read_excel(file_path, **attempt)
                     
                     if not df.empty:
-                        logger.info(f"Arquivo lido com sucesso. Shape: {df.shape}")
+                        logger.info("Arquivo lido com sucesso. Shape: %s", df.shape)
                         return df, "Sucesso"
                         
                 except Exception as e:
-                    logger.warning(f"Tentativa falhou: {e}")
+                    logger.warning("Tentativa falhou: %s", e)
                     continue
             
             # Se Excel falhar, tentar como CSV
@@ -96,18 +164,18 @@ class RobustExcelProcessor:
                 if not df.empty:
                     return df, "Lido como CSV"
             except Exception as e:
-                logger.warning(f"Leitura como CSV falhou: {e}")
+                logger.warning("Leitura como CSV falhou: %s", e)
             
             return None, "Não foi possível ler o arquivo com nenhum método"
             
         except Exception as e:
-            logger.error(f"Erro crítico na leitura: {e}")
+            logger.error("Erro crítico na leitura: %s", e)
             return None, f"Erro crítico: {str(e)}"
     
     def clean_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
         """Limpar e preparar DataFrame"""
         try:
-            logger.info(f"Limpando DataFrame. Shape inicial: {df.shape}")
+            logger.debug("Limpando DataFrame. Shape inicial: %s", df.shape)
             
             # Remover linhas completamente vazias
             df = df.dropna(how='all')
@@ -117,7 +185,7 @@ class RobustExcelProcessor:
             
             # Limitar número de linhas
             if len(df) > self.max_rows:
-                logger.warning(f"Arquivo muito grande. Limitando a {self.max_rows} linhas")
+                logger.warning("Arquivo muito grande. Limitando a %d linhas", self.max_rows)
                 df = df.head(self.max_rows)
             
             # Limpar nomes das colunas
@@ -126,18 +194,18 @@ class RobustExcelProcessor:
             # Preencher valores NaN
             df = df.fillna('')
             
-            logger.info(f"DataFrame limpo. Shape final: {df.shape}")
+            logger.info("DataFrame limpo. Shape final: %s", df.shape)
             return df
             
         except Exception as e:
-            logger.error(f"Erro na limpeza do DataFrame: {e}")
+            logger.error("Erro na limpeza do DataFrame: %s", e)
             raise
     
     def detect_columns_robust(self, df: pd.DataFrame) -> Dict[str, str]:
         """Detectar colunas com algoritmo robusto"""
         try:
             columns = df.columns.tolist()
-            logger.info(f"Detectando colunas em: {columns}")
+            logger.debug("Detectando colunas em: %s", columns)
             
             mapping = {}
             
@@ -164,14 +232,14 @@ class RobustExcelProcessor:
                 
                 if best_match and best_score > 0:
                     mapping[target_col] = best_match
-                    logger.info(f"Coluna '{target_col}' mapeada para '{best_match}' (score: {best_score})")
+                    logger.debug("Coluna '%s' mapeada para '%s' (score: %d)", target_col, best_match, best_score)
             
             # Validar mapeamento mínimo
             required_cols = ['produto', 'quantidade', 'valor']
             missing_cols = [col for col in required_cols if col not in mapping]
             
             if missing_cols:
-                logger.warning(f"Colunas obrigatórias não encontradas: {missing_cols}")
+                logger.warning("Colunas obrigatórias não encontradas: %s", missing_cols)
                 # Tentar mapeamento por posição
                 if len(columns) >= 3:
                     mapping.update({
@@ -182,70 +250,16 @@ class RobustExcelProcessor:
                     if len(columns) >= 4:
                         mapping['marca'] = columns[1]
             
-            logger.info(f"Mapeamento final: {mapping}")
+            logger.info("Mapeamento final: %s", mapping)
             return mapping
             
         except Exception as e:
-            logger.error(f"Erro na detecção de colunas: {e}")
+            logger.error("Erro na detecção de colunas: %s", e)
             return {}
     
     def parse_numeric_value(self, value: Any) -> float:
         """Parser numérico ultra-robusto"""
-        try:
-            if pd.isna(value) or value == '' or value is None:
-                return 0.0
-            
-            # Se já é número
-            if isinstance(value, (int, float)):
-                return float(value) if not pd.isna(value) else 0.0
-            
-            # Converter para string e limpar
-            str_value = str(value).strip()
-            
-            if not str_value:
-                return 0.0
-            
-            # Remover símbolos de moeda e espaços
-            cleaned = re.sub(r'[^\d.,\-+]', '', str_value)
-            
-            if not cleaned:
-                return 0.0
-            
-            # Lidar com diferentes formatos decimais
-            if ',' in cleaned and '.' in cleaned:
-                # Determinar qual é o separador decimal
-                last_comma = cleaned.rfind(',')
-                last_dot = cleaned.rfind('.')
-                
-                if last_comma > last_dot:
-                    # Formato: 1.234,56
-                    cleaned = cleaned.replace('.', '').replace(',', '.')
-                else:
-                    # Formato: 1,234.56
-                    cleaned = cleaned.replace(',', '')
-            elif ',' in cleaned:
-                # Verificar se é decimal ou milhares
-                parts = cleaned.split(',')
-                if len(parts) == 2 and len(parts[1]) <= 2 and parts[1].isdigit():
-                    # Provavelmente decimal: 12,34
-                    cleaned = cleaned.replace(',', '.')
-                else:
-                    # Provavelmente milhares: 1,234
-                    cleaned = cleaned.replace(',', '')
-            
-            # Tentar conversão com Decimal para maior precisão
-            try:
-                decimal_value = Decimal(cleaned)
-                return float(decimal_value)
-            except InvalidOperation:
-                pass
-            
-            # Fallback para float direto
-            return float(cleaned)
-            
-        except (ValueError, TypeError, InvalidOperation) as e:
-            logger.warning(f"Erro ao converter '{value}' para número: {e}")
-            return 0.0
+        return safe_float(value)
     
     def validate_product_data(self, product: Dict[str, Any]) -> Tuple[bool, str, Dict[str, Any]]:
         """Validar dados de um produto"""
@@ -293,16 +307,28 @@ class RobustExcelProcessor:
             return True, "Produto válido", validated_product
             
         except Exception as e:
-            logger.error(f"Erro na validação do produto: {e}")
+            logger.error("Erro na validação do produto: %s", e)
             return False, f"Erro na validação: {str(e)}", {}
     
     def process_file(self, file_path: str) -> Dict[str, Any]:
-        """Processar arquivo com validação completa"""
+        """
+        Processar arquivo com validação completa
+        
+        O resultado traz `stage_timings` (segundos por etapa) para que o processo
+        do servidor registre as métricas mesmo quando isto roda no pool.
+        """
+        timer = StageTimer('process_file')
+        result = self._process_file(file_path, timer)
+        result['stage_timings'] = timer.timings
+        return result
+    
+    def _process_file(self, file_path: str, timer: StageTimer) -> Dict[str, Any]:
         try:
-            logger.info(f"Iniciando processamento de: {file_path}")
+            logger.info("Iniciando processamento de: %s", file_path)
             
             # 1. Validar arquivo
-            is_valid, validation_msg = self.validate_file(file_path)
+            with timer.stage('validate'):
+                is_valid, validation_msg = self.validate_file(file_path)
             if not is_valid:
                 return {
                     "success": False,
@@ -311,7 +337,8 @@ class RobustExcelProcessor:
                 }
             
             # 2. Ler arquivo
-            df, read_msg = self.read_excel_file(file_path)
+            with timer.stage('read'):
+                df, read_msg = self.read_excel_file(file_path)
             if df is None:
                 return {
                     "success": False,
@@ -320,7 +347,8 @@ class RobustExcelProcessor:
                 }
             
             # 3. Limpar dados
-            df = self.clean_dataframe(df)
+            with timer.stage('clean'):
+                df = self.clean_dataframe(df)
             
             if df.empty:
                 return {
@@ -330,7 +358,8 @@ class RobustExcelProcessor:
                 }
             
             # 4. Detectar colunas
-            column_mapping = self.detect_columns_robust(df)
+            with timer.stage('detect'):
+                column_mapping = self.detect_columns_robust(df)
             
             required_cols = ['produto', 'quantidade', 'valor']
             missing_cols = [col for col in required_cols if col not in column_mapping]
@@ -348,27 +377,28 @@ class RobustExcelProcessor:
             products = []
             errors = []
             
-            for index, row in df.iterrows():
-                try:
-                    # Extrair dados da linha
-                    raw_product = {
-                        'name': row.get(column_mapping.get('produto', ''), ''),
-                        'brand': row.get(column_mapping.get('marca', ''), ''),
-                        'quantity': row.get(column_mapping.get('quantidade', ''), 0),
-                        'unit_cost': row.get(column_mapping.get('valor', ''), 0)
-                    }
-                    
-                    # Validar produto
-                    is_valid, error_msg, validated_product = self.validate_product_data(raw_product)
-                    
-                    if is_valid:
-                        products.append(validated_product)
-                    else:
-                        errors.append(f"Linha {index + 2}: {error_msg}")
+            with timer.stage('rows'):
+                for index, row in df.iterrows():
+                    try:
+                        # Extrair dados da linha
+                        raw_product = {
+                            'name': row.get(column_mapping.get('produto', ''), ''),
+                            'brand': row.get(column_mapping.get('marca', ''), ''),
+                            'quantity': row.get(column_mapping.get('quantidade', ''), 0),
+                            'unit_cost': row.get(column_mapping.get('valor', ''), 0)
+                        }
                         
-                except Exception as e:
-                    errors.append(f"Linha {index + 2}: Erro no processamento - {str(e)}")
-                    continue
+                        # Validar produto
+                        is_valid, error_msg, validated_product = self.validate_product_data(raw_product)
+                        
+                        if is_valid:
+                            products.append(validated_product)
+                        else:
+                            errors.append(f"Linha {index + 2}: {error_msg}")
+                        
+                    except Exception as e:
+                        errors.append(f"Linha {index + 2}: Erro no processamento - {str(e)}")
+                        continue
             
             # 6. Validar resultado final
             if not products:
@@ -403,11 +433,11 @@ class RobustExcelProcessor:
                 }
             }
             
-            logger.info(f"Processamento concluído. {len(products)} produtos válidos de {len(df)} linhas")
+            logger.info("Processamento concluído. %d produtos válidos de %d linhas", len(products), len(df))
             return result
             
         except Exception as e:
-            logger.error(f"Erro crítico no processamento: {e}")
+            logger.error("Erro crítico no processamento: %s", e)
             return {
                 "success": False,
                 "error": f"Erro crítico no processamento: {str(e)}",
@@ -416,3 +446,8 @@ class RobustExcelProcessor:
 
 # Instância global para uso
 robust_processor = RobustExcelProcessor()
+
+
+def process_file(file_path: str) -> Dict[str, Any]:
+    """Processar arquivo com a instância global (ponto de entrada para o pool de processos)"""
+    return robust_processor.process_file(file_path)
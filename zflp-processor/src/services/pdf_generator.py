@@ -1,12 +1,130 @@
 from reportlab.lib.pagesizes import letter
 from reportlab.lib import colors
 from reportlab.lib.units import mm
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import SimpleDocTemplate, Table, LongTable, TableStyle, Paragraph, Spacer, PageBreak
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle, StyleSheet1
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
-from typing import Dict, List, Any
+from typing import Dict, List, Any, BinaryIO, Union
+import io
 import os
-from datetime import datetime
+import copy
+from functools import lru_cache
+from services.report_model import ReportModel, as_report_model, format_quantity
+
+# Linhas por bloco das tabelas longas (~ uma página ofício com fonte 8)
+TABLE_CHUNK_ROWS = int(os.environ.get('PDF_TABLE_CHUNK_ROWS', 45))
+
+# Larguras de coluna calculadas uma vez por processo
+PRODUCT_COL_WIDTHS = (100*mm, 20*mm, 30*mm, 30*mm)
+COST_COL_WIDTHS = (100*mm, 40*mm, 40*mm)
+
+
+# Estilos de tabela, montados uma vez por processo e compartilhados entre relatórios
+_HEADER_ROW_COMMANDS = [
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black)
+]
+
+SUMMARY_TABLE_STYLE = TableStyle(_HEADER_ROW_COMMANDS + [
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+    ('FONTSIZE', (0, 0), (-1, -1), 9),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige)
+])
+
+TOTALS_TABLE_STYLE = TableStyle(_HEADER_ROW_COMMANDS + [
+    ('ALIGN', (0, 0), (0, -1), 'LEFT'),
+    ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+    ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 9),
+    ('BACKGROUND', (0, 1), (-1, -2), colors.beige),
+    ('BACKGROUND', (0, -1), (-1, -1), colors.yellow)
+])
+
+# Tabelas longas (produtos, custos): bloco intermediário e último bloco com total
+_LONG_TABLE_COMMANDS = _HEADER_ROW_COMMANDS + [
+    ('ALIGN', (0, 0), (0, -1), 'LEFT'),
+    ('ALIGN', (1, 0), (-1, -1), 'RIGHT'),
+    ('FONTSIZE', (0, 0), (-1, -1), 8)
+]
+
+LONG_TABLE_BODY_STYLE = TableStyle(_LONG_TABLE_COMMANDS + [
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige)
+])
+
+LONG_TABLE_TOTAL_STYLE = TableStyle(_LONG_TABLE_COMMANDS + [
+    ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+    ('BACKGROUND', (0, 1), (-1, -2), colors.beige),
+    ('BACKGROUND', (0, -1), (-1, -1), colors.lightgrey)
+])
+
+
+def build_report_styles() -> StyleSheet1:
+    """Folha de estilos do relatório: amostra do ReportLab + estilos customizados"""
+    styles = getSampleStyleSheet()
+    
+    # Estilo para título principal
+    styles.add(ParagraphStyle(
+        name='CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=14,
+        spaceAfter=12,
+        alignment=TA_CENTER,
+        textColor=colors.black
+    ))
+    
+    # Estilo para subtítulos
+    styles.add(ParagraphStyle(
+        name='CustomSubtitle',
+        parent=styles['Heading2'],
+        fontSize=12,
+        spaceAfter=8,
+        alignment=TA_LEFT,
+        textColor=colors.black
+    ))
+    
+    # Estilo para texto normal
+    styles.add(ParagraphStyle(
+        name='CustomNormal',
+        parent=styles['Normal'],
+        fontSize=9,
+        spaceAfter=4,
+        alignment=TA_LEFT
+    ))
+    
+    # Estilo para valores monetários
+    styles.add(ParagraphStyle(
+        name='Currency',
+        parent=styles['Normal'],
+        fontSize=9,
+        alignment=TA_RIGHT
+    ))
+    
+    return styles
+
+
+@lru_cache(maxsize=1)
+def report_styles() -> StyleSheet1:
+    """Folha de estilos compartilhada por todos os geradores do processo (somente leitura)"""
+    return build_report_styles()
+
+
+@lru_cache(maxsize=None)
+def _static_paragraph(text: str, style_name: str) -> Paragraph:
+    return Paragraph(text, report_styles()[style_name])
+
+
+def static_paragraph(text: str, style_name: str) -> Paragraph:
+    """
+    Parágrafo de texto fixo (títulos, rodapé) analisado uma única vez
+
+    Cada uso recebe uma cópia rasa: o layout (wrap) fica na cópia, e o
+    modelo em cache pode ser compartilhado entre relatórios concorrentes.
+    """
+    return copy.copy(_static_paragraph(text, style_name))
 
 
 class PDFGenerator:
@@ -15,90 +133,56 @@ class PDFGenerator:
     def __init__(self):
         # Tamanho papel ofício em mm: 216x330
         self.page_size = (216*mm, 330*mm)
-        self.styles = getSampleStyleSheet()
-        self._setup_custom_styles()
+        self.styles = report_styles()
     
-    def _setup_custom_styles(self):
-        """Configura estilos customizados para o PDF"""
-        # Estilo para título principal
-        self.styles.add(ParagraphStyle(
-            name='CustomTitle',
-            parent=self.styles['Heading1'],
-            fontSize=14,
-            spaceAfter=12,
-            alignment=TA_CENTER,
-            textColor=colors.black
-        ))
-        
-        # Estilo para subtítulos
-        self.styles.add(ParagraphStyle(
-            name='CustomSubtitle',
-            parent=self.styles['Heading2'],
-            fontSize=12,
-            spaceAfter=8,
-            alignment=TA_LEFT,
-            textColor=colors.black
-        ))
-        
-        # Estilo para texto normal
-        self.styles.add(ParagraphStyle(
-            name='CustomNormal',
-            parent=self.styles['Normal'],
-            fontSize=9,
-            spaceAfter=4,
-            alignment=TA_LEFT
-        ))
-        
-        # Estilo para valores monetários
-        self.styles.add(ParagraphStyle(
-            name='Currency',
-            parent=self.styles['Normal'],
-            fontSize=9,
-            alignment=TA_RIGHT
-        ))
+    def _create_document(self, output: Union[str, BinaryIO]) -> SimpleDocTemplate:
+        """Documento ofício com margens de 20mm, gravado em caminho ou buffer binário"""
+        return SimpleDocTemplate(
+            output,
+            pagesize=self.page_size,
+            rightMargin=20*mm,
+            leftMargin=20*mm,
+            topMargin=20*mm,
+            bottomMargin=20*mm
+        )
     
-    def generate_pdf(self, data: Dict[str, Any], output_path: str) -> str:
+    def generate_pdf(self, data: Union[Dict[str, Any], ReportModel], output_path: Union[str, BinaryIO]) -> Union[str, BinaryIO]:
         """
         Gera PDF formatado com os dados processados
         
         Args:
-            data: Dados processados da planilha
-            output_path: Caminho para salvar o PDF
+            data: Dados processados da planilha (ou ReportModel já montado)
+            output_path: Caminho ou buffer binário gravável (ex.: BytesIO) para salvar o PDF
             
         Returns:
-            Caminho do arquivo PDF gerado
+            Caminho (ou buffer) do arquivo PDF gerado
         """
         try:
+            model = as_report_model(data)
+            
             # Criar documento PDF
-            doc = SimpleDocTemplate(
-                output_path,
-                pagesize=self.page_size,
-                rightMargin=20*mm,
-                leftMargin=20*mm,
-                topMargin=20*mm,
-                bottomMargin=20*mm
-            )
+            doc = self._create_document(output_path)
             
             # Construir conteúdo
             story = []
             
             # Cabeçalho
-            story.extend(self._build_header(data))
+            story.extend(self._build_header(model))
             
             # Resumo financeiro
-            story.extend(self._build_summary_section(data))
+            story.extend(self._build_summary_section(model))
             
             # Tabela de produtos
-            story.extend(self._build_products_section(data))
+            story.extend(self._build_products_section(model))
             
             # Custos operacionais
-            story.extend(self._build_costs_section(data))
+            story.extend(self._build_costs_section(model))
             
             # Totais finais
-            story.extend(self._build_totals_section(data))
+            story.extend(self._build_totals_section(model))
             
             # Rodapé
-            story.extend(self._build_footer(data))
+            story.extend(self._build_footer())
             
             # Gerar PDF
             doc.build(story)
@@ -108,27 +192,22 @@ class PDFGenerator:
         except Exception as e:
             raise Exception(f"Erro ao gerar PDF: {str(e)}")
     
-    def _build_header(self, data: Dict[str, Any]) -> List:
+    def generate_pdf_bytes(self, data: Union[Dict[str, Any], ReportModel]) -> bytes:
+        """Gera o PDF em memória e retorna o conteúdo (para envio direto na resposta HTTP)"""
+        buffer = io.BytesIO()
+        self.generate_pdf(data, buffer)
+        return buffer.getvalue()
+    
+    def _build_header(self, model: ReportModel) -> List:
         """Constrói cabeçalho do documento"""
         elements = []
         
         # Título principal
-        title = Paragraph("RELATÓRIO DE IMPORTAÇÃO - ZFLP", self.styles['CustomTitle'])
+        title = static_paragraph("RELATÓRIO DE IMPORTAÇÃO - ZFLP", 'CustomTitle')
         elements.append(title)
         
         # Informações do documento
-        metadata = data.get('metadata', {})
-        filename = metadata.get('filename', 'N/A')
-        processed_at = metadata.get('processed_at', datetime.now().isoformat())
-        
-        # Formatar data
-        try:
-            date_obj = datetime.fromisoformat(processed_at.replace('Z', '+00:00'))
-            formatted_date = date_obj.strftime('%d/%m/%Y %H:%M')
-        except:
-            formatted_date = processed_at
-        
-        info_text = f"<b>Arquivo:</b> {filename}<br/><b>Processado em:</b> {formatted_date}"
+        info_text = f"<b>Arquivo:</b> {model.filename}<br/><b>Processado em:</b> {model.processed_at}"
         info_para = Paragraph(info_text, self.styles['CustomNormal'])
         elements.append(info_para)
         
@@ -136,217 +215,128 @@ class PDFGenerator:
         
         return elements
     
-    def _build_summary_section(self, data: Dict[str, Any]) -> List:
+    def _build_summary_section(self, model: ReportModel) -> List:
         """Constrói seção de resumo financeiro"""
         elements = []
         
-        summary = data.get('summary', {})
-        if not summary:
+        if not model.summary:
             return elements
         
         # Título da seção
-        subtitle = Paragraph("RESUMO FINANCEIRO", self.styles['CustomSubtitle'])
+        subtitle = static_paragraph("RESUMO FINANCEIRO", 'CustomSubtitle')
         elements.append(subtitle)
         
         # Dados do resumo
-        summary_data = [
-            ['Item', 'Valor (R$)']
-        ]
-        
-        if 'mercadoria' in summary:
-            summary_data.append(['Mercadoria', f"R$ {summary['mercadoria']:,.2f}"])
-        
-        if 'frete_seguro' in summary:
-            summary_data.append(['Frete + Seguro', f"R$ {summary['frete_seguro']:,.2f}"])
-        
-        if 'cif' in summary:
-            summary_data.append(['CIF', f"R$ {summary['cif']:,.2f}"])
-        
-        if 'custo_total' in summary:
-            summary_data.append(['Custo Total', f"R$ {summary['custo_total']:,.2f}"])
+        summary_data = [['Item', f'Valor ({model.local_symbol})']]
+        summary_data.extend(
+            [label, f"{model.local_symbol} {value:,.2f}"] for label, value in model.summary
+        )
         
         # Criar tabela
         summary_table = Table(summary_data, colWidths=[120*mm, 60*mm])
-        summary_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 9),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
+        summary_table.setStyle(SUMMARY_TABLE_STYLE)
         
         elements.append(summary_table)
         elements.append(Spacer(1, 12))
         
         return elements
     
-    def _build_products_section(self, data: Dict[str, Any]) -> List:
+    def _build_products_section(self, model: ReportModel) -> List:
         """Constrói seção de produtos"""
         elements = []
         
-        products = data.get('products', [])
-        if not products:
+        if not model.product_count:
             return elements
         
         # Título da seção
-        subtitle = Paragraph("PRODUTOS IMPORTADOS", self.styles['CustomSubtitle'])
+        subtitle = static_paragraph("PRODUTOS IMPORTADOS", 'CustomSubtitle')
         elements.append(subtitle)
         
-        # Cabeçalho da tabela
-        products_data = [
-            ['Produto', 'Qnt', 'FOB (US$)', 'Total (US$)']
-        ]
-        
-        # Adicionar produtos
-        for product in products:
-            products_data.append([
-                product.get('produto', ''),
-                str(product.get('quantidade', 0)),
-                f"$ {product.get('fob', 0):.2f}",
-                f"$ {product.get('total', 0):,.2f}"
-            ])
-        
-        # Calcular totais
-        total_qty = sum(p.get('quantidade', 0) for p in products)
-        total_value = sum(p.get('total', 0) for p in products)
-        
-        products_data.append([
-            'TOTAL',
-            str(total_qty),
-            '',
-            f"$ {total_value:,.2f}"
-        ])
+        # Linhas dos produtos (já formatadas no modelo)
+        header = ['Produto', 'Qnt', 'FOB (US$)', 'Total (US$)']
+        total_row = ['TOTAL', format_quantity(model.total_quantity), '', f"$ {model.total_products_value:,.2f}"]
         
-        # Criar tabela
-        products_table = Table(products_data, colWidths=[100*mm, 20*mm, 30*mm, 30*mm])
-        products_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-            ('ALIGN', (1, 0), (-1, -1), 'RIGHT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 8),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -2), colors.beige),
-            ('BACKGROUND', (0, -1), (-1, -1), colors.lightgrey),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        
-        elements.append(products_table)
+        elements.extend(self._build_long_table(header, model.product_cells, total_row, PRODUCT_COL_WIDTHS))
         elements.append(Spacer(1, 12))
         
         return elements
     
-    def _build_costs_section(self, data: Dict[str, Any]) -> List:
+    def _build_costs_section(self, model: ReportModel) -> List:
         """Constrói seção de custos operacionais"""
         elements = []
         
-        costs = data.get('costs', [])
-        if not costs:
+        if not model.cost_items:
             return elements
         
         # Título da seção
-        subtitle = Paragraph("CUSTOS OPERACIONAIS", self.styles['CustomSubtitle'])
+        subtitle = static_paragraph("CUSTOS OPERACIONAIS", 'CustomSubtitle')
         elements.append(subtitle)
         
-        # Cabeçalho da tabela
-        costs_data = [
-            ['Item de Custo', 'Percentual (%)', 'Valor (R$)']
-        ]
-        
-        # Adicionar custos
-        for cost in costs:
-            costs_data.append([
-                cost.get('item', ''),
-                f"{cost.get('percentual', 0):.4f}%" if cost.get('percentual', 0) > 0 else '-',
-                f"R$ {cost.get('valor', 0):,.2f}"
-            ])
-        
-        # Calcular total de custos
-        total_costs = sum(c.get('valor', 0) for c in costs)
-        costs_data.append([
-            'TOTAL CUSTOS',
-            '',
-            f"R$ {total_costs:,.2f}"
-        ])
+        # Linhas dos custos (já formatadas no modelo)
+        header = ['Item de Custo', 'Percentual (%)', f'Valor ({model.local_symbol})']
+        total_row = ['TOTAL CUSTOS', '', f"{model.local_symbol} {model.total_costs:,.2f}"]
         
-        # Criar tabela
-        costs_table = Table(costs_data, colWidths=[100*mm, 40*mm, 40*mm])
-        costs_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-            ('ALIGN', (1, 0), (-1, -1), 'RIGHT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 8),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -2), colors.beige),
-            ('BACKGROUND', (0, -1), (-1, -1), colors.lightgrey),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        
-        elements.append(costs_table)
+        elements.extend(self._build_long_table(header, model.cost_cells, total_row, COST_COL_WIDTHS))
         elements.append(Spacer(1, 12))
         
         return elements
     
-    def _build_totals_section(self, data: Dict[str, Any]) -> List:
+    def _build_long_table(self, header: List[str], rows: List[tuple], total_row: List[str],
+                          col_widths) -> List:
+        """
+        Monta uma tabela longa em blocos de TABLE_CHUNK_ROWS linhas
+        
+        Uma Table única com milhares de linhas é recalculada e copiada a cada quebra
+        de página (custo quadrático); blocos do tamanho de uma página mantêm o tempo
+        linear. Cada bloco repete o cabeçalho e, se ainda assim quebrar, o repete na
+        página seguinte (repeatRows). A linha de total fecha o último bloco.
+        """
+        tables = []
+        chunk_starts = range(0, len(rows), TABLE_CHUNK_ROWS) if rows else [0]
+        for start in chunk_starts:
+            chunk = [header, *rows[start:start + TABLE_CHUNK_ROWS]]
+            is_last = start + TABLE_CHUNK_ROWS >= len(rows)
+            if is_last:
+                chunk.append(total_row)
+            
+            table = LongTable(chunk, colWidths=col_widths, repeatRows=1)
+            table.setStyle(LONG_TABLE_TOTAL_STYLE if is_last else LONG_TABLE_BODY_STYLE)
+            tables.append(table)
+        
+        return tables
+    
+    def _build_totals_section(self, model: ReportModel) -> List:
         """Constrói seção de totais finais"""
         elements = []
         
-        totals = data.get('totals', {})
-        if not totals:
+        totals_lines = model.totals_lines
+        if not totals_lines:
             return elements
         
         # Título da seção
-        subtitle = Paragraph("TOTAIS CONSOLIDADOS", self.styles['CustomSubtitle'])
+        subtitle = static_paragraph("TOTAIS CONSOLIDADOS", 'CustomSubtitle')
         elements.append(subtitle)
         
         # Dados dos totais
-        totals_data = [
-            ['Descrição', 'Valor']
-        ]
-        
-        if 'total_produtos' in totals:
-            totals_data.append(['Total Produtos (US$)', f"$ {totals['total_produtos']:,.2f}"])
-        
-        if 'total_quantidade' in totals:
-            totals_data.append(['Total Quantidade', f"{totals['total_quantidade']:,} unidades"])
-        
-        if 'total_custos' in totals:
-            totals_data.append(['Total Custos (R$)', f"R$ {totals['total_custos']:,.2f}"])
-        
-        if 'custo_total' in totals:
-            totals_data.append(['CUSTO TOTAL FINAL (R$)', f"R$ {totals['custo_total']:,.2f}"])
+        totals_data = [['Descrição', 'Valor']]
+        for key, label, value in totals_lines:
+            if key == 'total_quantidade':
+                totals_data.append([label, f"{format_quantity(value, grouping=True)} unidades"])
+            elif key == 'total_produtos':
+                totals_data.append([label, f"$ {value:,.2f}"])
+            else:
+                totals_data.append([label, f"{model.local_symbol} {value:,.2f}"])
         
         # Criar tabela
         totals_table = Table(totals_data, colWidths=[120*mm, 60*mm])
-        totals_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-            ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 9),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -2), colors.beige),
-            ('BACKGROUND', (0, -1), (-1, -1), colors.yellow),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
+        totals_table.setStyle(TOTALS_TABLE_STYLE)
         
         elements.append(totals_table)
         elements.append(Spacer(1, 12))
         
         return elements
     
-    def _build_footer(self, data: Dict[str, Any]) -> List:
+    def _build_footer(self) -> List:
         """Constrói rodapé do documento"""
         elements = []
         
@@ -360,47 +350,47 @@ class PDFGenerator:
         <i>Para dúvidas ou correções, entre em contato com o setor responsável.</i>
         """
         
-        footer_para = Paragraph(footer_text, self.styles['CustomNormal'])
+        footer_para = static_paragraph(footer_text, 'CustomNormal')
         elements.append(footer_para)
         
         return elements
     
-    def generate_summary_pdf(self, data: Dict[str, Any], output_path: str) -> str:
+    def generate_summary_pdf(self, data: Union[Dict[str, Any], ReportModel], output_path: Union[str, BinaryIO]) -> Union[str, BinaryIO]:
         """
         Gera PDF resumido (apenas totais principais)
         
         Args:
             data: Dados processados
-            output_path: Caminho para salvar o PDF
+            output_path: Caminho ou buffer binário gravável para salvar o PDF
             
         Returns:
-            Caminho do arquivo PDF gerado
+            Caminho (ou buffer) do arquivo PDF gerado
         """
         try:
-            doc = SimpleDocTemplate(
-                output_path,
-                pagesize=self.page_size,
-                rightMargin=20*mm,
-                leftMargin=20*mm,
-                topMargin=20*mm,
-                bottomMargin=20*mm
-            )
+            model = as_report_model(data)
+            
+            doc = self._create_document(output_path)
             
             story = []
             
             # Cabeçalho
-            story.extend(self._build_header(data))
+            story.extend(self._build_header(model))
             
             # Apenas resumo e totais
-            story.extend(self._build_summary_section(data))
-            story.extend(self._build_totals_section(data))
+            story.extend(self._build_summary_section(model))
+            story.extend(self._build_totals_section(model))
             
             # Rodapé
-            story.extend(self._build_footer(data))
+            story.extend(self._build_footer())
             
             doc.build(story)
             return output_path
             
         except Exception as e:
             raise Exception(f"Erro ao gerar PDF resumido: {str(e)}")
-
+    
+    def generate_summary_pdf_bytes(self, data: Union[Dict[str, Any], ReportModel]) -> bytes:
+        """Gera o PDF resumido em memória e retorna o conteúdo"""
+        buffer = io.BytesIO()
+        self.generate_summary_pdf(data, buffer)
+        return buffer.getvalue()
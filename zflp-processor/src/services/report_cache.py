@@ -0,0 +1,105 @@
+import os
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[str, str, str]  # (upload_id, tipo de relatório, hash dos dados)
+
+
+class CachedReport:
+    """Relatório renderizado mantido em cache"""
+
+    __slots__ = ('content', 'etag', 'created_at')
+
+    def __init__(self, content: bytes):
+        self.content = content
+        self.etag = hashlib.sha1(content).hexdigest()
+        self.created_at = datetime.now(timezone.utc)
+
+    @property
+    def size(self) -> int:
+        return len(self.content)
+
+
+class ReportCache:
+    """
+    Cache LRU de relatórios gerados, limitado por número de entradas e bytes
+
+    A chave inclui o hash dos dados do relatório: quando o upload recebe um novo
+    cálculo, a chave muda e o relatório é gerado de novo. O cache é de cada
+    processo: com vários workers, uma exportação atendida por outro worker
+    apenas gera o relatório de novo (os uploads em si ficam no upload_store,
+    compartilhado em disco).
+    """
+
+    def __init__(self, max_entries: int = 100, max_bytes: int = 200 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[CacheKey, CachedReport]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: CacheKey) -> Optional[CachedReport]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def contains(self, key: CacheKey) -> bool:
+        """Verificar presença sem contar acerto/erro nem alterar a ordem LRU"""
+        with self._lock:
+            return key in self._entries
+
+    def put(self, key: CacheKey, content: bytes) -> CachedReport:
+        entry = CachedReport(content)
+        if entry.size > self.max_bytes:
+            # Maior que o cache inteiro: serve sem guardar
+            return entry
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._total_bytes -= previous.size
+
+            self._entries[key] = entry
+            self._total_bytes += entry.size
+
+            while len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes:
+                evicted_key, evicted = self._entries.popitem(last=False)
+                self._total_bytes -= evicted.size
+                logger.info("Relatório %s/%s removido do cache", evicted_key[0], evicted_key[1])
+
+        return entry
+
+    def invalidate(self, upload_id: str):
+        """Remover todos os relatórios de um upload"""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == upload_id]:
+                self._total_bytes -= self._entries.pop(key).size
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+
+# Instância global para uso
+report_cache = ReportCache(
+    max_entries=int(os.environ.get('REPORT_CACHE_MAX_ENTRIES', 100)),
+    max_bytes=int(os.environ.get('REPORT_CACHE_MAX_MB', 200)) * 1024 * 1024
+)
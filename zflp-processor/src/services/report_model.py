@@ -0,0 +1,134 @@
+from datetime import datetime
+from functools import cached_property
+from typing import Dict, List, Any, Tuple, Union
+
+from services.currency_converter import convert_report_data, currency_symbol
+from services.excel_processor_robust import safe_float
+
+# Linhas do resumo financeiro: (chave em data['summary'], rótulo)
+SUMMARY_LINES = (
+    ('mercadoria', 'Mercadoria'),
+    ('frete_seguro', 'Frete + Seguro'),
+    ('cif', 'CIF'),
+    ('custo_total', 'Custo Total')
+)
+
+
+def format_processed_at(processed_at: str) -> str:
+    """Data de processamento no formato dd/mm/aaaa hh:mm (texto original se não for ISO)"""
+    try:
+        date_obj = datetime.fromisoformat(processed_at.replace('Z', '+00:00'))
+        return date_obj.strftime('%d/%m/%Y %H:%M')
+    except (AttributeError, ValueError):
+        return processed_at
+
+
+def format_quantity(quantity: float, grouping: bool = False) -> str:
+    """Quantidade em texto sem casas decimais quando for inteira (2.0 -> '2'; grouping: 1,234)"""
+    if float(quantity).is_integer():
+        quantity = int(quantity)
+    return f"{quantity:,}" if grouping else str(quantity)
+
+
+class ReportModel:
+    """
+    Representação intermediária de um relatório, compartilhada pelos geradores Excel e PDF
+
+    Conversão de moeda, colunas de produtos/custos e totais são calculados uma
+    única vez na construção; as células formatadas em texto (usadas só pelo PDF)
+    são montadas na primeira vez em que são pedidas. Os campos numéricos são
+    convertidos para float aqui (safe_float), então os geradores podem contar
+    com números mesmo quando o payload traz "2", "US$ 10,50" ou null.
+    """
+
+    def __init__(self, data: Dict[str, Any]):
+        if data.get('report_currency'):
+            data = convert_report_data(data, data['report_currency'])
+
+        self.currency = data.get('local_currency', 'BRL')
+        self.local_symbol = currency_symbol(self.currency)
+
+        # Cabeçalho
+        metadata = data.get('metadata', {})
+        self.filename = metadata.get('filename', 'N/A')
+        self.processed_at = format_processed_at(metadata.get('processed_at', datetime.now().isoformat()))
+
+        # Resumo: (rótulo, valor) na ordem de SUMMARY_LINES
+        summary = data.get('summary', {})
+        self.summary = [(label, safe_float(summary[key])) for key, label in SUMMARY_LINES if key in summary]
+
+        # Produtos em colunas
+        products = data.get('products', [])
+        self.product_names = [str(product.get('produto', '')) for product in products]
+        self.quantities = [safe_float(product.get('quantidade', 0)) for product in products]
+        self.fobs = [safe_float(product.get('fob', 0)) for product in products]
+        self.product_totals = [safe_float(product.get('total', 0)) for product in products]
+        self.total_quantity = sum(self.quantities)
+        self.total_products_value = sum(self.product_totals)
+
+        # Custos em colunas (percentual como informado, ex.: 2.5 = 2,5%)
+        costs = data.get('costs', [])
+        self.cost_items = [str(cost.get('item', '')) for cost in costs]
+        self.cost_percentuals = [safe_float(cost.get('percentual', 0)) for cost in costs]
+        self.cost_values = [safe_float(cost.get('valor', 0)) for cost in costs]
+        self.total_costs = sum(self.cost_values)
+
+        self.totals = {key: safe_float(value) for key, value in data.get('totals', {}).items()}
+
+    @property
+    def product_count(self) -> int:
+        return len(self.product_names)
+
+    @property
+    def totals_lines(self) -> List[Tuple[str, str, Any]]:
+        """Linhas dos totais consolidados: (chave, rótulo, valor)"""
+        labels = (
+            ('total_produtos', 'Total Produtos (US$)'),
+            ('total_quantidade', 'Total Quantidade'),
+            ('total_custos', f'Total Custos ({self.local_symbol})'),
+            ('custo_total', f'CUSTO TOTAL FINAL ({self.local_symbol})')
+        )
+        return [(key, label, self.totals[key]) for key, label in labels if key in self.totals]
+
+    def product_rows(self, limit: int = None) -> List[Tuple[str, float, float, float]]:
+        """Linhas (produto, quantidade, FOB, quantidade * FOB) para planilhas"""
+        columns = (self.product_names, self.quantities, self.fobs)
+        if limit is not None:
+            columns = tuple(column[:limit] for column in columns)
+        names, quantities, fobs = columns
+        return [
+            (name, quantity, fob, quantity * fob)
+            for name, quantity, fob in zip(names, quantities, fobs)
+        ]
+
+    def cost_rows(self, limit: int = None) -> List[Tuple[str, float, float]]:
+        """Linhas (item, percentual em fração, valor) para planilhas"""
+        rows = [
+            (item, percentual / 100 if percentual > 0 else 0, valor)
+            for item, percentual, valor in zip(self.cost_items, self.cost_percentuals, self.cost_values)
+        ]
+        return rows if limit is None else rows[:limit]
+
+    @cached_property
+    def product_cells(self) -> List[Tuple[str, str, str, str]]:
+        """Linhas de produtos já formatadas em texto"""
+        return list(zip(
+            self.product_names,
+            map(format_quantity, self.quantities),
+            map('$ {:.2f}'.format, self.fobs),
+            map('$ {:,.2f}'.format, self.product_totals)
+        ))
+
+    @cached_property
+    def cost_cells(self) -> List[Tuple[str, str, str]]:
+        """Linhas de custos já formatadas em texto"""
+        return list(zip(
+            self.cost_items,
+            [f"{percentual:.4f}%" if percentual > 0 else '-' for percentual in self.cost_percentuals],
+            map(f'{self.local_symbol} {{:,.2f}}'.format, self.cost_values)
+        ))
+
+
+def as_report_model(data: Union[Dict[str, Any], ReportModel]) -> ReportModel:
+    """Aceitar dados brutos ou um ReportModel já montado"""
+    return data if isinstance(data, ReportModel) else ReportModel(data)
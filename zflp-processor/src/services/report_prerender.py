@@ -0,0 +1,149 @@
+import os
+import time
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Tuple
+
+from services.upload_store import upload_store
+from services.report_cache import report_cache, CachedReport, CacheKey
+from services.report_service import REPORT_TYPES, build_report_data, report_data_hash, render_reports
+from services.worker_pool import run_cpu_bound
+
+logger = logging.getLogger(__name__)
+
+PrerenderKey = Tuple[str, str]  # (upload_id, hash dos dados)
+
+# Tempo máximo que /export espera por um job em andamento antes de gerar na hora
+PRERENDER_WAIT_SECONDS = float(os.environ.get('REPORT_PRERENDER_WAIT', 30))
+
+
+def _configured_types() -> List[str]:
+    types = [t.strip() for t in os.environ.get('REPORT_PRERENDER_TYPES', '').split(',') if t.strip()]
+    unknown = [t for t in types if t not in REPORT_TYPES]
+    if unknown:
+        logger.warning("REPORT_PRERENDER_TYPES ignorados (tipo desconhecido): %s", ', '.join(unknown))
+    return [t for t in types if t in REPORT_TYPES]
+
+
+class ReportPrerenderer:
+    """
+    Pré-renderização de relatórios em segundo plano, logo após upload/cálculo
+
+    Cada upload vira um job que gera todos os tipos configurados de uma vez
+    (uma única agregação, via render_reports) no pool de processos (respeita
+    CPU_OFFLOAD, via run_cpu_bound) e grava os resultados no report_cache. Poucas threads despacham os jobs (limite de
+    concorrência) e a fila de pendentes é limitada: quando cheia, o job é
+    descartado e o relatório é gerado na hora do download, como antes.
+    """
+
+    def __init__(self, report_types: List[str], max_workers: int = 2, max_pending: int = 16):
+        self.report_types = report_types
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._inflight: Dict[PrerenderKey, Future] = {}
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.report_types)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix='report-prerender'
+            )
+        return self._executor
+
+    def schedule(self, upload_id: str) -> bool:
+        """Agendar a geração dos relatórios de um upload; False se desativado, já feito ou fila cheia"""
+        if not self.enabled:
+            return False
+
+        record = upload_store.get(upload_id)
+        if record is None:
+            return False
+
+        data = build_report_data(record)
+        key = (upload_id, report_data_hash(data))
+        if all(report_cache.contains(self._cache_key(key, t)) for t in self.report_types):
+            return False
+
+        with self._lock:
+            if key in self._inflight:
+                return False
+            if len(self._inflight) >= self.max_pending:
+                self.dropped += 1
+                logger.warning("Fila de pré-renderização cheia; upload %s será gerado sob demanda", upload_id)
+                return False
+            future = self._get_executor().submit(self._render, key, data)
+            self._inflight[key] = future
+
+        future.add_done_callback(lambda _: self._forget(key))
+        return True
+
+    def wait(self, cache_key: CacheKey, timeout: float) -> Optional[CachedReport]:
+        """Aguardar o job em andamento que cobre a chave do cache; None se não houver ou falhar"""
+        upload_id, report_type, digest = cache_key
+        if report_type not in self.report_types:
+            return None
+
+        with self._lock:
+            future = self._inflight.get((upload_id, digest))
+        if future is None:
+            return None
+
+        try:
+            future.result(timeout=timeout)
+        except FutureTimeoutError:
+            logger.warning("Pré-renderização de %s ainda em andamento após %.0fs", upload_id, timeout)
+            return None
+        except Exception:
+            return None
+        return report_cache.get(cache_key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "types": self.report_types,
+                "in_flight": len(self._inflight),
+                "max_pending": self.max_pending,
+                "dropped": self.dropped
+            }
+
+    def _cache_key(self, key: PrerenderKey, report_type: str) -> CacheKey:
+        return (key[0], report_type, key[1])
+
+    def _forget(self, key: PrerenderKey):
+        with self._lock:
+            self._inflight.pop(key, None)
+
+    def _render(self, key: PrerenderKey, data: dict):
+        started = time.perf_counter()
+        try:
+            rendered = run_cpu_bound(render_reports, self.report_types, data)
+        except BrokenProcessPool:
+            logger.error("Pool de processos falhou na pré-renderização de %s", key[0])
+            raise
+        except Exception as e:
+            logger.error("Erro na pré-renderização de %s: %s", key[0], e)
+            raise
+
+        for report_type, content in rendered.items():
+            report_cache.put(self._cache_key(key, report_type), content)
+        logger.info(
+            "Relatórios %s pré-renderizados para %s em %.0f ms",
+            ', '.join(rendered), key[0], (time.perf_counter() - started) * 1000
+        )
+
+
+# Instância global para uso
+report_prerenderer = ReportPrerenderer(
+    report_types=_configured_types(),
+    max_workers=int(os.environ.get('REPORT_PRERENDER_CONCURRENCY', 2)),
+    max_pending=int(os.environ.get('REPORT_PRERENDER_QUEUE', 16))
+)
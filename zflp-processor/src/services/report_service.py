@@ -0,0 +1,187 @@
+import json
+import time
+import zipfile
+import hashlib
+import logging
+from typing import Dict, Any, Iterable, Iterator, List, Tuple, Union
+
+from services.excel_generator import ExcelGenerator
+from services.pdf_generator import PDFGenerator
+from services.report_model import ReportModel, as_report_model
+
+logger = logging.getLogger(__name__)
+
+XLSX_MIMETYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+PDF_MIMETYPE = "application/pdf"
+
+# Tipos de relatório expostos em /api/export/<tipo>/<upload_id>
+REPORT_TYPES = {
+    'excel': {
+        'generator': ExcelGenerator,
+        'method': 'generate_excel_bytes',
+        'mimetype': XLSX_MIMETYPE,
+        'download_name': 'relatorio_zflp.xlsx'
+    },
+    'excel-template': {
+        'generator': ExcelGenerator,
+        'method': 'generate_editable_template_bytes',
+        'mimetype': XLSX_MIMETYPE,
+        'download_name': 'template_editavel_zflp.xlsx'
+    },
+    'pdf': {
+        'generator': PDFGenerator,
+        'method': 'generate_pdf_bytes',
+        'mimetype': PDF_MIMETYPE,
+        'download_name': 'relatorio_zflp.pdf'
+    },
+    'pdf-summary': {
+        'generator': PDFGenerator,
+        'method': 'generate_summary_pdf_bytes',
+        'mimetype': PDF_MIMETYPE,
+        'download_name': 'resumo_zflp.pdf'
+    }
+}
+
+COST_GROUP_LABELS = {
+    'fixed': 'Custo Fixo',
+    'variable': 'Custo Variável',
+    'taxes': 'Tributo'
+}
+
+
+def build_report_data(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Converter um upload armazenado (produtos + cálculo) no formato dos geradores"""
+    products = record.get('products', [])
+    calculation = record.get('calculation')
+
+    report_products = [
+        {
+            'produto': product.get('name', ''),
+            'marca': product.get('brand', ''),
+            'quantidade': product.get('quantity', 0),
+            'fob': product.get('unit_cost', 0),
+            'total': product.get('total', 0)
+        }
+        for product in products
+    ]
+    total_products = sum(p['total'] for p in report_products)
+    total_quantity = sum(p['quantidade'] for p in report_products)
+
+    data = {
+        'metadata': {
+            'upload_id': record.get('upload_id'),
+            'filename': record.get('filename') or 'N/A',
+            'processed_at': record.get('processed_at')
+        },
+        'products': report_products,
+        'totals': {
+            'total_produtos': round(total_products, 2),
+            'total_quantidade': total_quantity
+        }
+    }
+
+    if not calculation:
+        data['local_currency'] = 'USD'
+        data['summary'] = {'mercadoria': round(total_products, 2)}
+        data['costs'] = []
+        return data
+
+    data['local_currency'] = calculation.get('currency', 'USD')
+    data['summary'] = {
+        'mercadoria': calculation['total_products'],
+        'frete_seguro': round(calculation['freight_value'] + calculation['insurance_value'], 2),
+        'cif': calculation['cif_value'],
+        'custo_total': calculation['total_cost']
+    }
+    data['costs'] = [
+        {
+            'item': item.get('description') or COST_GROUP_LABELS.get(item.get('group'), 'Custo'),
+            'percentual': item.get('percentage', 0),
+            'valor': item.get('value', 0)
+        }
+        for item in calculation.get('cost_items', [])
+    ]
+    data['totals']['total_custos'] = round(
+        calculation['total_fixed'] + calculation['total_variable'] + calculation['total_taxes'], 2
+    )
+    data['totals']['custo_total'] = calculation['total_cost']
+    return data
+
+
+def report_data_hash(data: Dict[str, Any]) -> str:
+    """Hash estável dos dados do relatório (parte da chave do cache)"""
+    canonical = json.dumps(data, sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:20]
+
+
+def render_report(report_type: str, data: Union[Dict[str, Any], ReportModel]) -> bytes:
+    """Gerar relatório em memória e retornar seu conteúdo (sem arquivos temporários)"""
+    spec = REPORT_TYPES[report_type]
+    generator = spec['generator']()
+    return getattr(generator, spec['method'])(data)
+
+
+def render_reports(report_types: List[str], data: Dict[str, Any]) -> Dict[str, bytes]:
+    """Gerar vários formatos dos mesmos dados com uma única agregação (ReportModel)"""
+    model = as_report_model(data)
+    return {report_type: render_report(report_type, model) for report_type in report_types}
+
+
+def render_report_job(index: int, job_id: Any, report_type: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Renderizar um relatório de um lote (executado no pool de processos)
+
+    Nunca levanta exceção: falhas viram um registro com success=False,
+    para que um relatório com erro não derrube o lote inteiro.
+    """
+    started = time.perf_counter()
+    item = {"index": index, "id": job_id, "type": report_type}
+
+    try:
+        content = render_report(report_type, data)
+        item.update({"success": True, "content": content, "size": len(content)})
+    except Exception as e:
+        item.update({"success": False, "error": f"Erro ao gerar relatório: {str(e)}", "stage": "render_error"})
+
+    item["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return item
+
+
+class _ZipChunkSink:
+    """Destino de escrita do ZipFile que acumula bytes até serem enviados"""
+
+    def __init__(self):
+        self._chunks = []
+        self._offset = 0
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._offset
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_zip(entries: Iterable[Tuple[str, bytes]]) -> Iterator[bytes]:
+    """
+    Montar um ZIP a partir de (nome, conteúdo) e emitir os bytes à medida que é construído
+
+    Cada arquivo é enviado assim que é adicionado; o ZIP nunca fica inteiro em memória.
+    Arquivos .xlsx (que já são ZIP) entram sem recompressão.
+    """
+    sink = _ZipChunkSink()
+    with zipfile.ZipFile(sink, mode='w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in entries:
+            compress_type = zipfile.ZIP_STORED if name.endswith('.xlsx') else zipfile.ZIP_DEFLATED
+            archive.writestr(name, content, compress_type=compress_type)
+            yield sink.drain()
+    yield sink.drain()
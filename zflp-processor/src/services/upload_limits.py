@@ -0,0 +1,6 @@
+import os
+
+# Tamanho máximo da planilha enviada em /upload; compartilhado entre a recepção
+# em streaming (upload_stream) e o RobustExcelProcessor, que roda nos workers do
+# pool e por isso não deve depender do módulo HTTP
+UPLOAD_MAX_BYTES = int(os.environ.get('UPLOAD_MAX_BYTES', 50 * 1024 * 1024))
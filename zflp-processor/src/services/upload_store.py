@@ -0,0 +1,150 @@
+import os
+import json
+import uuid
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Diretório compartilhado entre os workers do gunicorn (e entre reinícios do worker)
+UPLOAD_STORE_DIR = os.environ.get('UPLOAD_STORE_DIR', os.path.join(tempfile.gettempdir(), 'zflp-uploads'))
+
+
+def _json_default(obj: Any) -> Any:
+    """Escalares numpy (ex.: float64 vindo do pandas) viram tipos nativos"""
+    if hasattr(obj, 'item'):
+        return obj.item()
+    raise TypeError(f"Tipo não serializável: {type(obj).__name__}")
+
+
+class UploadStore:
+    """
+    Armazenamento dos uploads processados, compartilhado entre processos
+
+    Guarda o resultado de process_file e o último cálculo de custos de cada
+    upload, para que as exportações possam ser geradas depois pelo upload_id.
+    Cada upload é um arquivo JSON em `directory` (fonte da verdade, visível a
+    todos os workers); a memória do processo guarda os mais recentes (LRU) e
+    é revalidada pelo mtime e tamanho do arquivo, então um cálculo anexado
+    por outro worker é enxergado na próxima leitura.
+    """
+
+    def __init__(self, directory: str, max_uploads: int = 200):
+        self.directory = directory
+        self.max_uploads = max_uploads
+        self._records: "OrderedDict[str, Tuple[Tuple[int, int], Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+
+    def save(self, result: Dict[str, Any], filename: str = '') -> str:
+        """Registrar resultado processado e retornar o upload_id"""
+        upload_id = uuid.uuid4().hex
+        record = {
+            "upload_id": upload_id,
+            "filename": filename,
+            "processed_at": datetime.now().isoformat(),
+            "products": result.get('products', []),
+            "summary": result.get('summary', {}),
+            "calculation": None
+        }
+        self._write(upload_id, record)
+        self._prune()
+        return upload_id
+
+    def get(self, upload_id: str) -> Optional[Dict[str, Any]]:
+        path = self._path(upload_id)
+        if path is None:
+            return None
+        try:
+            version = self._version(path)
+        except FileNotFoundError:
+            with self._lock:
+                self._records.pop(upload_id, None)
+            return None
+
+        with self._lock:
+            cached = self._records.get(upload_id)
+            if cached is not None and cached[0] == version:
+                self._records.move_to_end(upload_id)
+                return cached[1]
+
+        try:
+            with open(path, 'r', encoding='utf-8') as source:
+                record = json.load(source)
+        except (OSError, ValueError) as e:
+            logger.warning("Upload %s ilegível no armazenamento: %s", upload_id, e)
+            return None
+        self._remember(upload_id, version, record)
+        return record
+
+    def attach_calculation(self, upload_id: str, calculation: Dict[str, Any]) -> bool:
+        """Associar cálculo de custos ao upload (substitui o anterior)"""
+        record = self.get(upload_id)
+        if record is None:
+            return False
+        # Novo registro em vez de mutação: leitores concorrentes veem um estado consistente
+        self._write(upload_id, dict(record, calculation=calculation))
+        return True
+
+    def _path(self, upload_id: str) -> Optional[str]:
+        # upload_id vem da URL: só aceitar o formato gerado por save (uuid4 hex)
+        if len(upload_id) != 32 or not all(c in '0123456789abcdef' for c in upload_id):
+            return None
+        return os.path.join(self.directory, f"{upload_id}.json")
+
+    def _write(self, upload_id: str, record: Dict[str, Any]):
+        """Gravar atomicamente (arquivo temporário + rename) e atualizar a memória"""
+        path = self._path(upload_id)
+        descriptor, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'w', encoding='utf-8') as output:
+                json.dump(record, output, default=_json_default, separators=(',', ':'))
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+        self._remember(upload_id, self._version(path), record)
+
+    @staticmethod
+    def _version(path: str) -> Tuple[int, int]:
+        # mtime + tamanho: sistemas de arquivos com mtime grosseiro ainda detectam a troca
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def _remember(self, upload_id: str, version: Tuple[int, int], record: Dict[str, Any]):
+        with self._lock:
+            self._records[upload_id] = (version, record)
+            self._records.move_to_end(upload_id)
+            while len(self._records) > self.max_uploads:
+                self._records.popitem(last=False)
+
+    def _prune(self):
+        """Manter no disco só os max_uploads mais recentes (por mtime)"""
+        entries = []
+        try:
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith('.json'):
+                    entries.append((entry.stat().st_mtime_ns, entry.path, entry.name[:-5]))
+        except OSError:
+            return  # outro worker removeu um arquivo durante a listagem; fica para o próximo save
+        if len(entries) <= self.max_uploads:
+            return
+        entries.sort()
+        for _, path, upload_id in entries[:len(entries) - self.max_uploads]:
+            try:
+                os.unlink(path)
+                logger.info("Upload %s removido do armazenamento (limite atingido)", upload_id)
+            except FileNotFoundError:
+                pass  # outro worker removeu primeiro
+
+
+# Instância global para uso
+upload_store = UploadStore(
+    UPLOAD_STORE_DIR,
+    max_uploads=int(os.environ.get('UPLOAD_STORE_MAX', 200))
+)
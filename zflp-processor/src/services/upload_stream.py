@@ -0,0 +1,113 @@
+import os
+from typing import BinaryIO, Tuple
+
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.sansio.multipart import MultipartDecoder, Data, Epilogue, Field, File, NeedData
+from werkzeug.utils import secure_filename
+
+from services.upload_limits import UPLOAD_MAX_BYTES
+
+# Folga para cabeçalhos multipart e outros campos do formulário
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# Assinaturas (magic bytes) dos formatos aceitos em /upload
+FILE_SIGNATURES = {
+    '.xlsx': (b'PK\x03\x04',),                     # ZIP (Office Open XML)
+    '.xls': (b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1',)  # OLE2 (Excel 97-2003)
+}
+SIGNATURE_BYTES = max(len(signature) for signatures in FILE_SIGNATURES.values() for signature in signatures)
+
+
+class UploadRejected(ValueError):
+    """Upload recusado durante a recepção (antes de o arquivo inteiro ser lido)"""
+
+    def __init__(self, message: str, stage: str = "file_validation", status: int = 200):
+        super().__init__(message)
+        self.stage = stage
+        self.status = status
+
+
+def matches_signature(extension: str, head: bytes) -> bool:
+    return any(head.startswith(signature) for signature in FILE_SIGNATURES.get(extension, ()))
+
+
+def receive_upload(stream: BinaryIO, boundary: str, dest_dir: str, field: str = 'file',
+                   max_bytes: int = UPLOAD_MAX_BYTES) -> Tuple[str, str]:
+    """
+    Ler o corpo multipart em blocos e gravar o arquivo do campo `field` em dest_dir
+
+    As validações acontecem durante a leitura: extensão no cabeçalho da parte,
+    assinatura nos primeiros bytes e tamanho a cada bloco. Um arquivo inválido
+    ou grande demais é recusado assim que detectado, sem ler o resto do corpo.
+
+    Returns:
+        (caminho do arquivo gravado, nome original seguro)
+
+    Raises:
+        UploadRejected: campo ausente, formato inválido, arquivo grande demais ou corpo malformado
+    """
+    decoder = MultipartDecoder(boundary.encode('latin-1'))
+    output = None
+    file_path = filename = extension = None
+    head = b''
+    received = 0
+    capturing = False
+    finished = False
+
+    try:
+        while not finished:
+            chunk = stream.read(UPLOAD_CHUNK_SIZE)
+            decoder.receive_data(chunk or None)
+            event = decoder.next_event()
+            while not isinstance(event, (NeedData, Epilogue)):
+                if isinstance(event, File) and event.name == field and file_path is None:
+                    if not event.filename:
+                        raise UploadRejected("Nenhum arquivo selecionado")
+                    extension = os.path.splitext(event.filename)[1].lower()
+                    if extension not in FILE_SIGNATURES:
+                        raise UploadRejected("Formato de arquivo inválido. Use .xlsx ou .xls", "file_format")
+                    filename = secure_filename(event.filename) or f"upload{extension}"
+                    file_path = os.path.join(dest_dir, filename)
+                    output = open(file_path, 'wb')
+                    capturing = True
+                elif isinstance(event, (File, Field)):
+                    capturing = False
+                elif isinstance(event, Data) and capturing:
+                    received += len(event.data)
+                    if received > max_bytes:
+                        raise UploadRejected(
+                            f"Arquivo muito grande. Máximo: {max_bytes / 1024 / 1024:.1f}MB", "file_size", 413
+                        )
+                    if len(head) < SIGNATURE_BYTES:
+                        head += event.data[:SIGNATURE_BYTES - len(head)]
+                        if len(head) >= SIGNATURE_BYTES and not matches_signature(extension, head):
+                            raise UploadRejected(
+                                f"Conteúdo não corresponde a um arquivo {extension}", "file_format", 415
+                            )
+                    output.write(event.data)
+                    if not event.more_data:
+                        capturing = False
+                        finished = True
+                event = decoder.next_event()
+            if not chunk or isinstance(event, Epilogue):
+                break
+    except RequestEntityTooLarge:
+        # Corpo sem Content-Length (chunked) passou de MAX_CONTENT_LENGTH
+        raise UploadRejected(f"Arquivo muito grande. Máximo: {max_bytes / 1024 / 1024:.1f}MB", "file_size", 413)
+    except UploadRejected:
+        raise
+    except ValueError as e:
+        raise UploadRejected(f"Corpo multipart inválido: {e}", "file_validation", 400)
+    finally:
+        if output is not None:
+            output.close()
+
+    if file_path is None:
+        raise UploadRejected("Nenhum arquivo enviado")
+    if received == 0:
+        raise UploadRejected("Arquivo está vazio")
+    if not matches_signature(extension, head):
+        raise UploadRejected(f"Conteúdo não corresponde a um arquivo {extension}", "file_format", 415)
+    return file_path, filename
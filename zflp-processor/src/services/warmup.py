@@ -0,0 +1,179 @@
+import os
+import time
+import logging
+import tempfile
+import importlib
+import threading
+from datetime import datetime
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from services.metrics import metrics
+from services.catalog import product_catalog
+from services.worker_pool import CPU_OFFLOAD, get_process_pool
+
+logger = logging.getLogger(__name__)
+
+# WARMUP=0 pula o aquecimento (o worker fica pronto imediatamente)
+WARMUP_ENABLED = os.environ.get('WARMUP', '1').lower() not in ('0', 'false', 'no')
+
+# Definido pelo gunicorn.conf.py: o warm-up roda no hook post_worker_init. Fora
+# do gunicorn (flask run, waitress, python main.py) create_app inicia o warm-up
+# em segundo plano na primeira requisição, senão /ready ficaria em 503 para sempre
+WARMUP_ON_WORKER_INIT = os.environ.get('WARMUP_ON_WORKER_INIT', '0') == '1'
+
+WARMUP_READY = metrics.gauge('zflp_ready', 'Worker aquecido e pronto para tráfego (1) ou não (0)')
+WARMUP_STEP_DURATION = metrics.gauge(
+    'zflp_warmup_step_seconds', 'Duração de cada etapa do warm-up do worker', ('step',)
+)
+
+# Planilha mínima no formato de /upload, processada de ponta a ponta no warm-up
+SAMPLE_ROWS = [
+    {'Produto': '205/55R16 91V', 'Marca': 'LINGLONG', 'Quantidade': 10, 'Valor Unitário FOB': 45.5},
+    {'Produto': '185/65R15 88H', 'Marca': 'DURATURN', 'Quantidade': 4, 'Valor Unitário FOB': 38.9},
+    {'Produto': '225/45R17 94W', 'Marca': 'GOODRIDE', 'Quantidade': 8, 'Valor Unitário FOB': 52.0}
+]
+
+
+def _import_modules(*names: str):
+    for name in names:
+        importlib.import_module(name)
+
+
+def _process_sample_workbook():
+    """Gravar e processar uma planilha de 3 linhas (leitor do pandas, openpyxl, detecção de colunas)"""
+    import pandas as pd
+    from services.excel_processor_robust import process_file
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = os.path.join(temp_dir, 'warmup.xlsx')
+        pd.DataFrame(SAMPLE_ROWS).to_excel(file_path, index=False, engine='openpyxl')
+        result = process_file(file_path)
+    if not result.get('success'):
+        raise RuntimeError(f"planilha de aquecimento recusada: {result.get('error')}")
+
+
+def _render_sample_reports():
+    """Gerar os relatórios uma vez (estilos e formatos em cache, fontes do reportlab)"""
+    from services.report_service import REPORT_TYPES, build_report_data, render_reports
+
+    products = [
+        {
+            'name': row['Produto'],
+            'brand': row['Marca'],
+            'quantity': row['Quantidade'],
+            'unit_cost': row['Valor Unitário FOB'],
+            'total': row['Quantidade'] * row['Valor Unitário FOB']
+        }
+        for row in SAMPLE_ROWS
+    ]
+    render_reports(list(REPORT_TYPES), build_report_data({'products': products, 'filename': 'warmup.xlsx'}))
+
+
+def _start_process_pool():
+    """
+    Criar o pool de processos depois das etapas acima
+
+    Com fork, os processos filhos herdam módulos já importados e caches já
+    preenchidos; a primeira tarefa sobe todos os processos do pool.
+    """
+    if CPU_OFFLOAD:
+        get_process_pool().submit(os.getpid).result()
+
+
+# Ordem importa: o pool por último, para herdar tudo o que foi aquecido
+WARMUP_STEPS: Tuple[Tuple[str, Callable[[], Any]], ...] = (
+    ('import_pandas', partial(_import_modules, 'numpy', 'pandas', 'pandas.io.excel._openpyxl')),
+    ('import_openpyxl', partial(_import_modules, 'openpyxl', 'xlsxwriter')),
+    ('import_reportlab', partial(_import_modules, 'reportlab.platypus', 'reportlab.pdfgen.canvas')),
+    ('catalog_index', product_catalog.build),
+    ('sample_workbook', _process_sample_workbook),
+    ('sample_reports', _render_sample_reports),
+    ('process_pool', _start_process_pool)
+)
+
+
+class WarmupState:
+    """
+    Estado do warm-up do worker (exposto em /ready)
+
+    pending -> warming -> ready. Uma etapa que falha é registrada com o erro
+    e o worker fica "degraded": pronto, mas a primeira requisição daquele
+    tipo ainda paga o custo que o warm-up deveria ter antecipado.
+    """
+
+    def __init__(self, steps: Tuple[Tuple[str, Callable[[], Any]], ...] = WARMUP_STEPS):
+        self.status = 'pending'
+        self.started_at: Optional[str] = None
+        self.duration: Optional[float] = None
+        self.steps: List[Dict[str, Any]] = []
+        self._steps = steps
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        WARMUP_READY.set(0)
+
+    @property
+    def ready(self) -> bool:
+        return self.status in ('ready', 'degraded')
+
+    def run(self):
+        """Executar as etapas em ordem (apenas a primeira chamada tem efeito)"""
+        with self._lock:
+            if self.status != 'pending':
+                return
+            self.status = 'warming'
+            self.started_at = datetime.now().isoformat()
+
+        if not WARMUP_ENABLED:
+            self._finish('ready', 0.0)
+            logger.info("Warm-up desativado (WARMUP=0)")
+            return
+
+        started = time.perf_counter()
+        failed = False
+        for name, step in self._steps:
+            step_started = time.perf_counter()
+            entry = {'name': name, 'status': 'ok'}
+            try:
+                step()
+            except Exception as e:
+                failed = True
+                entry.update(status='failed', error=str(e))
+                logger.warning("Warm-up: etapa %s falhou: %s", name, e)
+            elapsed = time.perf_counter() - step_started
+            entry['duration_ms'] = round(elapsed * 1000, 2)
+            WARMUP_STEP_DURATION.set(elapsed, name)
+            with self._lock:
+                self.steps.append(entry)
+
+        self._finish('degraded' if failed else 'ready', time.perf_counter() - started)
+        logger.info("Warm-up concluído em %.2fs (%s)", self.duration, self.status)
+
+    def start_background(self) -> Optional[threading.Thread]:
+        """Executar o warm-up numa thread, uma única vez (fora do gunicorn)"""
+        with self._lock:
+            if self.status != 'pending' or self._thread is not None:
+                return None
+            self._thread = threading.Thread(target=self.run, name='warmup', daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'status': self.status,
+                'ready': self.ready,
+                'started_at': self.started_at,
+                'duration_ms': round(self.duration * 1000, 2) if self.duration is not None else None,
+                'steps': list(self.steps)
+            }
+
+    def _finish(self, status: str, duration: float):
+        with self._lock:
+            self.status = status
+            self.duration = duration
+        WARMUP_READY.set(1)
+
+
+# Instância global: um warm-up por processo worker
+warmup_state = WarmupState()
@@ -0,0 +1,86 @@
+import os
+import logging
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Número de processos para trabalho pesado de CPU (cálculos em lote, relatórios).
+# Cada worker do gunicorn tem o seu pool: o padrão divide os núcleos entre eles
+WEB_CONCURRENCY = max(1, int(os.environ.get('WEB_CONCURRENCY', 1)))
+CPU_WORKERS = int(os.environ.get('CPU_WORKERS', max(1, (os.cpu_count() or 2) // WEB_CONCURRENCY)))
+
+# Trabalho pesado das requisições (leitura de planilhas, relatórios) roda no pool,
+# deixando as threads do servidor livres para endpoints leves; CPU_OFFLOAD=0 desativa
+CPU_OFFLOAD = os.environ.get('CPU_OFFLOAD', '1').lower() not in ('0', 'false', 'no')
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+# Threads que executam run_cpu_bound localmente (ex.: requisição sendo perfilada)
+_thread_state = threading.local()
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Pool de processos compartilhado, criado sob demanda (um por worker do servidor)"""
+    global _process_pool
+    with _pool_lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(max_workers=CPU_WORKERS)
+            logger.info("Pool de processos iniciado com %d workers", CPU_WORKERS)
+        return _process_pool
+
+
+def reset_process_pool():
+    """Descartar o pool atual (ex.: após BrokenProcessPool); o próximo uso cria outro"""
+    global _process_pool
+    with _pool_lock:
+        pool, _process_pool = _process_pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def run_cpu_bound(func: Callable[..., Any], *args) -> Any:
+    """
+    Executar func(*args) no pool de processos e aguardar o resultado
+
+    A thread da requisição fica apenas esperando (sem segurar o GIL), então outras
+    requisições do mesmo worker continuam sendo atendidas. func deve ser uma
+    função de módulo (picklable).
+    """
+    if not CPU_OFFLOAD or getattr(_thread_state, 'inline', False):
+        return func(*args)
+    try:
+        return get_process_pool().submit(func, *args).result()
+    except BrokenProcessPool:
+        reset_process_pool()
+        raise
+
+
+def submit_cpu_bound(func: Callable[..., Any], *args) -> Future:
+    """
+    Enviar func(*args) ao pool de processos sem esperar (lotes com vários itens)
+
+    Segue a mesma regra de run_cpu_bound: com CPU_OFFLOAD=0 (ou durante um
+    perfil) executa na hora, na própria thread, e devolve um Future já
+    resolvido com o resultado ou a exceção.
+    """
+    if not CPU_OFFLOAD or getattr(_thread_state, 'inline', False):
+        future = Future()
+        try:
+            future.set_result(func(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+    try:
+        return get_process_pool().submit(func, *args)
+    except BrokenProcessPool:
+        reset_process_pool()
+        raise
+
+
+def set_cpu_inline(inline: bool):
+    """Fazer run_cpu_bound executar na thread atual (True) ou no pool (False)"""
+    _thread_state.inline = inline
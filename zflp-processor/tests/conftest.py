@@ -0,0 +1,36 @@
+"""
+Configuração dos testes (pytest, executado a partir de zflp-processor/)
+
+O código da aplicação importa módulos a partir de src/ (como o gunicorn faz
+via src/main.py), então src/ entra no sys.path. O ambiente é fixado antes
+dos imports: trabalho pesado inline, uploads num diretório temporário, sem
+warm-up pesado em segundo plano e logs só de erro.
+"""
+
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(ROOT, 'tests', 'fixtures')
+
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+os.environ.setdefault('LOG_LEVEL', 'ERROR')
+os.environ.setdefault('CPU_OFFLOAD', '0')
+os.environ.setdefault('WARMUP', '0')
+os.environ.setdefault('FX_RATES_FILE', os.path.join(FIXTURES, 'fx_rates.json'))
+os.environ.setdefault('UPLOAD_STORE_DIR', tempfile.mkdtemp(prefix='zflp-test-uploads-'))
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def app():
+    from main import app as flask_app
+    return flask_app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
@@ -0,0 +1,75 @@
+import threading
+import time
+
+import pytest
+
+import request_limits
+from services.admission import AdmissionController
+
+
+def test_admits_up_to_max_concurrent_then_rejects_when_queue_is_full():
+    controller = AdmissionController(max_concurrent=2, max_queue=0, max_wait=1)
+    assert controller.acquire() and controller.acquire()
+
+    started = time.monotonic()
+    assert controller.acquire() is False
+    # Fila cheia: recusa imediata, sem esperar max_wait
+    assert time.monotonic() - started < 0.5
+    assert controller.stats() == dict(controller.stats(), in_flight=2, queued=0)
+
+
+def test_queued_request_times_out():
+    controller = AdmissionController(max_concurrent=1, max_queue=1, max_wait=0.1)
+    assert controller.acquire()
+    started = time.monotonic()
+    assert controller.acquire() is False
+    assert time.monotonic() - started >= 0.1
+    assert controller.stats()['queued'] == 0
+
+
+def test_release_hands_slot_to_queued_request():
+    controller = AdmissionController(max_concurrent=1, max_queue=1, max_wait=5)
+    assert controller.acquire()
+
+    result = {}
+    waiter = threading.Thread(target=lambda: result.setdefault('admitted', controller.acquire()))
+    waiter.start()
+    deadline = time.monotonic() + 2
+    while controller.stats()['queued'] == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert controller.stats()['queued'] == 1
+
+    controller.release()
+    waiter.join(2)
+    assert result == {'admitted': True}
+    assert controller.stats() == dict(controller.stats(), in_flight=1, queued=0)
+
+
+@pytest.fixture
+def busy_controller(monkeypatch):
+    # Única vaga já ocupada e sem fila: a próxima requisição pesada é recusada
+    controller = AdmissionController(max_concurrent=1, max_queue=0, max_wait=0.1)
+    controller.acquire()
+    monkeypatch.setattr(request_limits, 'admission_controller', controller)
+    return controller
+
+
+def test_heavy_endpoint_returns_503_with_retry_after(client, busy_controller):
+    response = client.post('/api/calculate-costs', json={'products': []})
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == str(request_limits.ADMISSION_RETRY_AFTER)
+    assert response.json['stage'] == 'server_busy'
+
+
+def test_light_endpoints_and_preflight_skip_admission(client, busy_controller):
+    assert client.get('/api/health').status_code == 200
+    assert client.open('/api/calculate-costs', method='OPTIONS').status_code == 200
+
+
+def test_slot_is_released_after_response(client, monkeypatch):
+    controller = AdmissionController(max_concurrent=1, max_queue=0, max_wait=0.1)
+    monkeypatch.setattr(request_limits, 'admission_controller', controller)
+    for _ in range(3):
+        response = client.post('/api/calculate-costs', json={'products': []})
+        assert response.status_code == 200
+    assert controller.stats()['in_flight'] == 0
@@ -0,0 +1,105 @@
+import json
+
+import pytest
+
+from services.cost_calculator import calculate_shipment
+from services import worker_pool
+from services.worker_pool import reset_process_pool
+
+
+def shipment(shipment_id, **overrides):
+    data = {
+        'id': shipment_id,
+        'products': [{'name': 'Pneu A', 'quantity': 4, 'unit_cost': 25, 'total': 100}],
+        'freightValue': 10,
+        'insurancePercentage': 0
+    }
+    data.update(overrides)
+    return data
+
+
+@pytest.fixture
+def process_pool(monkeypatch):
+    # Os testes rodam com CPU_OFFLOAD=0; este fixture liga o envio ao pool
+    monkeypatch.setattr(worker_pool, 'CPU_OFFLOAD', True)
+    yield
+    reset_process_pool()
+
+
+def read_ndjson(response):
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines() if line]
+    return lines[:-1], lines[-1]['summary']
+
+
+def test_calculate_shipment_never_raises():
+    assert calculate_shipment(0, shipment('ok'))['success'] is True
+
+    not_an_object = calculate_shipment(1, ['x'])
+    assert not_an_object == dict(not_an_object, index=1, id=1, success=False, stage='json_validation')
+
+    empty = calculate_shipment(2, shipment('empty', products=[]))
+    assert empty['success'] is False and empty['stage'] == 'data_validation' and empty['id'] == 'empty'
+
+    broken = calculate_shipment(3, shipment('broken', freightValue='muito'))
+    assert broken['success'] is False and broken['stage'] == 'server_error'
+
+
+def test_bulk_isolates_errors_per_shipment(client):
+    response = client.post('/api/calculate-costs/bulk', json={'shipments': [
+        shipment('a'),
+        shipment('sem-produtos', products=[]),
+        'não é um objeto',
+        shipment('b', freightValue=20)
+    ]})
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+
+    items, summary = read_ndjson(response)
+    by_index = {item['index']: item for item in items}
+    assert sorted(by_index) == [0, 1, 2, 3]
+    assert by_index[0]['success'] and by_index[0]['data']['calculation']['total_cost'] == 110.0
+    assert by_index[3]['success'] and by_index[3]['data']['calculation']['total_cost'] == 120.0
+    assert by_index[1]['stage'] == 'data_validation'
+    assert by_index[2]['stage'] == 'json_validation'
+    assert summary['total'] == 4 and summary['succeeded'] == 2 and summary['failed'] == 2
+
+
+def test_bulk_ndjson_invalid_line_fails_only_that_shipment(client):
+    body = '\n'.join([json.dumps(shipment('a')), '{isto não é json', '', json.dumps(shipment('b'))])
+    response = client.post('/api/calculate-costs/bulk', data=body, content_type='application/x-ndjson')
+
+    items, summary = read_ndjson(response)
+    failed = [item for item in items if not item['success']]
+    assert len(failed) == 1 and failed[0]['index'] == 1 and failed[0]['stage'] == 'json_validation'
+    assert summary == dict(summary, total=3, succeeded=2, failed=1)
+
+
+def test_bulk_rejects_empty_or_malformed_body(client):
+    response = client.post('/api/calculate-costs/bulk', json={'shipments': []})
+    assert response.json['success'] is False and response.json['stage'] == 'json_validation'
+
+    response = client.post('/api/calculate-costs/bulk', json={'products': []})
+    assert response.json['stage'] == 'json_validation'
+
+
+def test_bulk_runs_inline_without_cpu_offload(client, monkeypatch):
+    def no_pool():
+        raise AssertionError("pool de processos usado com CPU_OFFLOAD=0")
+
+    monkeypatch.setattr(worker_pool, 'get_process_pool', no_pool)
+    items, summary = read_ndjson(client.post(
+        '/api/calculate-costs/bulk', json=[shipment('a'), shipment('b')]
+    ))
+
+    assert summary['succeeded'] == 2
+    assert sorted(item['id'] for item in items) == ['a', 'b']
+
+
+def test_bulk_uses_process_pool_with_cpu_offload(client, process_pool):
+    items, summary = read_ndjson(client.post(
+        '/api/calculate-costs/bulk', json=[shipment('a'), shipment('b', freightValue='x')]
+    ))
+
+    assert worker_pool._process_pool is not None
+    assert summary['succeeded'] == 1 and summary['failed'] == 1
+    assert {item['id']: item['success'] for item in items} == {'a': True, 'b': False}
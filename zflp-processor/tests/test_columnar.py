@@ -0,0 +1,41 @@
+import pytest
+
+from services.columnar import encode_arrow, to_columnar
+
+pa = pytest.importorskip('pyarrow')
+
+
+def decode(body: bytes):
+    return pa.ipc.open_stream(body).read_all()
+
+
+def test_to_columnar_keeps_first_seen_column_order():
+    columnar = to_columnar([{'a': 1, 'b': 2}, {'c': 3, 'a': 4}])
+    assert columnar == {'columns': ['a', 'b', 'c'], 'data': {'a': [1, 4], 'b': [2, None], 'c': [None, 3]}}
+
+
+def test_arrow_mixed_type_column_is_sent_as_text():
+    rows = [
+        {'name': 'Pneu A', 'code': '205/55R16', 'total': 10.5},
+        {'name': 'Pneu B', 'code': None, 'total': 3},
+        {'name': 'Pneu C', 'code': 4011.10, 'total': None}
+    ]
+    table = decode(encode_arrow(to_columnar(rows), {'zflp': '{}'}))
+
+    assert table.schema.field('code').type == pa.string()
+    assert table.column('code').to_pylist() == ['205/55R16', None, '4011.1']
+    # Colunas homogêneas mantêm o tipo numérico
+    assert table.schema.field('total').type == pa.float64()
+    assert table.column('total').to_pylist() == [10.5, 3.0, None]
+    assert table.schema.metadata[b'zflp'] == b'{}'
+
+
+def test_calculate_costs_arrow_response(client):
+    payload = {'products': [{'name': 'A', 'brand': 'LINGLONG', 'quantity': 2, 'unit_cost': 5, 'total': 10},
+                            {'name': 'B', 'brand': 7, 'quantity': 1, 'unit_cost': 10, 'total': 10}]}
+    response = client.post('/api/calculate-costs', json=payload,
+                           headers={'Accept': 'application/vnd.apache.arrow.stream'})
+    assert response.status_code == 200
+    table = decode(response.data)
+    assert table.column('brand').to_pylist() == ['LINGLONG', '7']
+    assert table.column('allocated_cost').to_pylist() == [10.0, 10.0]
@@ -0,0 +1,121 @@
+import gzip
+import json
+
+import pytest
+
+from routes.upload import SUGGESTIONS
+from services.compression import (
+    COMPRESSION_MIN_BYTES,
+    PrecompressedBody,
+    choose_encoding,
+    is_compressible
+)
+from werkzeug.http import parse_accept_header
+
+GZIP = {'Accept-Encoding': 'gzip'}
+
+
+def accept(header):
+    return parse_accept_header(header)
+
+
+def decode(response):
+    body = response.get_data()
+    if response.headers.get('Content-Encoding') == 'gzip':
+        body = gzip.decompress(body)
+    return json.loads(body)
+
+
+def manual_entry(client, count, headers=None):
+    products = [{'produto': f'Pneu {i}', 'marca': 'Marca', 'quantidade': 1, 'valorFornecedor': 10} for i in range(count)]
+    return client.post('/api/manual-entry', json={'products': products}, headers=headers or {})
+
+
+def test_choose_encoding_follows_accept_encoding():
+    assert choose_encoding(accept('gzip')) == 'gzip'
+    assert choose_encoding(accept('gzip;q=0')) is None
+    assert choose_encoding(accept('identity')) is None
+    assert choose_encoding(accept('')) is None
+
+
+@pytest.mark.parametrize('mimetype, expected', [
+    ('application/json', True),
+    ('application/x-ndjson', True),
+    ('text/csv', True),
+    ('application/problem+json', True),
+    ('application/vnd.apache.arrow.stream', False),
+    ('application/pdf', False),
+    ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', False),
+    (None, False)
+])
+def test_is_compressible(mimetype, expected):
+    assert is_compressible(mimetype) is expected
+
+
+def test_precompressed_body_selects_variant():
+    body = json.dumps({'items': ['pneu'] * 500}).encode()
+    payload = PrecompressedBody(body)
+    encoding, selected = payload.select(accept('br;q=1, gzip;q=0.5'))
+    assert encoding in ('br', 'gzip') and len(selected) < len(body)
+    assert payload.select(accept('gzip')) == ('gzip', payload.variants['gzip'])
+    assert gzip.decompress(payload.variants['gzip']) == body
+    assert payload.select(accept('')) == (None, body)
+
+
+def test_precompressed_body_skips_small_bodies():
+    payload = PrecompressedBody(b'{"ok":true}')
+    assert payload.variants == {}
+    assert payload.select(accept('gzip')) == (None, b'{"ok":true}')
+
+
+def test_large_json_response_is_gzipped(client):
+    response = manual_entry(client, 50, GZIP)
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.vary
+    assert decode(response)['data']['summary']['total_products'] == 50
+
+
+def test_without_accept_encoding_response_is_identity(client):
+    response = manual_entry(client, 50)
+    assert 'Content-Encoding' not in response.headers
+    assert decode(response)['success'] is True
+
+
+def test_small_response_is_not_compressed(client):
+    response = client.get('/api/health', headers=GZIP)
+    assert len(response.get_data()) < COMPRESSION_MIN_BYTES
+    assert 'Content-Encoding' not in response.headers
+
+
+def test_streamed_response_is_not_compressed(client):
+    response = manual_entry(client, 50, {**GZIP, 'Accept': 'application/x-ndjson'})
+    assert response.mimetype == 'application/x-ndjson'
+    assert 'Content-Encoding' not in response.headers
+    lines = response.get_data(as_text=True).splitlines()
+    assert json.loads(lines[0])['type'] == 'header' and len(lines) == 52
+
+
+@pytest.mark.parametrize('suggestion_type', sorted(SUGGESTIONS))
+def test_every_suggestion_type_is_served(client, suggestion_type):
+    response = client.get(f'/api/suggestions/{suggestion_type}', headers=GZIP)
+    assert response.status_code == 200
+    data = decode(response)['data']
+    assert data['type'] == suggestion_type and data['count'] == len(SUGGESTIONS[suggestion_type])
+
+
+def test_unknown_suggestion_type_is_an_error(client):
+    assert client.get('/api/suggestions/nada').json['stage'] == 'invalid_type'
+
+
+def test_catalog_etag_revalidates_with_304(client):
+    first = client.get('/api/catalog', headers=GZIP)
+    assert first.status_code == 200 and first.headers['Content-Encoding'] == 'gzip'
+    etag = first.headers['ETag']
+    assert etag.startswith('W/')
+
+    second = client.get('/api/catalog', headers={**GZIP, 'If-None-Match': etag})
+    assert second.status_code == 304 and second.get_data() == b''
+
+    identity = client.get('/api/catalog')
+    assert 'Content-Encoding' not in identity.headers and not identity.headers['ETag'].startswith('W/')
+    assert decode(identity) == decode(first)
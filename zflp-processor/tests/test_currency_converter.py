@@ -0,0 +1,160 @@
+import os
+from datetime import date
+
+import pytest
+
+from conftest import FIXTURES
+from services.currency_converter import (
+    CurrencyConverter,
+    FXRateError,
+    FXRateTable,
+    clear_fx_cache,
+    load_fx_table
+)
+from services.cost_calculator import CostCalculationError, calculate_landed_costs
+
+FIXTURE_FILE = os.path.join(FIXTURES, 'fx_rates.json')
+
+
+@pytest.fixture
+def table():
+    clear_fx_cache()
+    return load_fx_table(FIXTURE_FILE)
+
+
+@pytest.fixture
+def converter(table):
+    return CurrencyConverter(table)
+
+
+def test_fixture_table_loads_offline(table):
+    assert table.base == 'USD'
+    assert table.dates == [date(2025, 1, 10), date(2025, 1, 20), date(2025, 2, 1)]
+    assert table.currencies == ['ARS', 'BRL', 'USD']
+
+
+@pytest.mark.parametrize('on_date, expected', [
+    ('2025-01-10', date(2025, 1, 10)),   # exatamente na primeira cotação
+    ('2025-01-19', date(2025, 1, 10)),   # entre cotações: vale a anterior
+    ('2025-01-20', date(2025, 1, 20)),   # exatamente numa cotação intermediária
+    ('2025-02-01', date(2025, 2, 1)),    # exatamente na última
+    ('2030-12-31', date(2025, 2, 1)),    # depois da última
+    (None, date(2025, 2, 1)),            # sem data: mais recente
+    ('2025-01-15T13:45:00', date(2025, 1, 10))
+])
+def test_rates_for_picks_latest_rate_up_to_date(table, on_date, expected):
+    rate_date, rates = table.rates_for(on_date)
+    assert rate_date == expected
+    assert rates['USD'] == 1.0
+
+
+def test_rates_for_before_first_date_raises(table):
+    with pytest.raises(FXRateError, match='2025-01-09'):
+        table.rates_for('2025-01-09')
+
+
+def test_invalid_date_raises(table):
+    with pytest.raises(FXRateError):
+        table.rates_for('ontem')
+
+
+def test_cross_rates_are_derived_from_base(table):
+    assert table.rate('USD', 'ARS', '2025-01-10') == pytest.approx(1000.0)
+    assert table.rate('ARS', 'USD', '2025-01-10') == pytest.approx(0.001)
+    assert table.rate('BRL', 'ARS', '2025-01-10') == pytest.approx(200.0)
+    assert table.rate('ARS', 'BRL', '2025-01-20') == pytest.approx(5.25 / 1050.0)
+    assert table.rate('brl', 'brl') == 1.0
+
+
+def test_unknown_currency_raises(table):
+    with pytest.raises(FXRateError, match='EUR'):
+        table.rate('USD', 'EUR')
+
+
+def test_empty_table_raises():
+    with pytest.raises(FXRateError):
+        FXRateTable('USD', {})
+
+
+def test_convert_records_converts_columns_and_keeps_missing_fields(converter):
+    records = [
+        {'name': 'a', 'total': 10, 'unit_cost': 2.5},
+        {'name': 'b', 'total': '4'},
+        {'name': 'c', 'total': None, 'unit_cost': 1}
+    ]
+    converted = converter.convert_records(records, ['total', 'unit_cost'], 'USD', 'ARS', '2025-01-20', decimals=2)
+
+    assert [record['total'] for record in converted] == [10500.0, 4200.0, 0.0]
+    assert converted[0]['unit_cost'] == 2625.0
+    assert 'unit_cost' not in converted[1]
+    assert converted[2]['unit_cost'] == 1050.0
+    # Cópias: a entrada não é alterada
+    assert records[0]['total'] == 10
+
+
+def test_convert_records_same_currency_returns_copies(converter):
+    records = [{'total': 7}]
+    converted = converter.convert_records(records, ['total'], 'USD', 'USD')
+    assert converted == records and converted[0] is not records[0]
+
+
+def landed_cost_payload(**overrides):
+    payload = {
+        'products': [
+            {'name': 'Pneu A', 'quantity': 10, 'unit_cost': 10, 'total': 100},
+            {'name': 'Pneu B', 'quantity': 5, 'unit_cost': 20, 'total': 100}
+        ],
+        'freightValue': 20,
+        'insurancePercentage': 1,
+        'currency': 'ARS',
+        'fxDate': '2025-01-20',
+        'fixedCosts': [{'activo': True, 'tipo': 'fijo', 'valor': 1050, 'descripcion': 'Despachante'}],
+        'variableCosts': [],
+        'taxes': [{'activo': True, 'tipo': 'porcentaje', 'base': 'CIF', 'valor': 10, 'descripcion': 'IVA'}]
+    }
+    payload.update(overrides)
+    return payload
+
+
+def test_calculate_landed_costs_in_ars(table):
+    calculation = calculate_landed_costs(landed_cost_payload())['calculation']
+
+    # Produtos e frete em US$ convertidos a 1050 ARS/USD; custo fixo já em ARS
+    assert calculation['currency'] == 'ARS'
+    assert calculation['total_products'] == 210000.0
+    assert calculation['freight_value'] == 21000.0
+    assert calculation['insurance_value'] == 2100.0
+    assert calculation['cif_value'] == 233100.0
+    assert calculation['total_fixed'] == 1050.0
+    assert calculation['total_taxes'] == 23310.0
+    assert calculation['total_cost'] == 257460.0
+    assert calculation['fx'] == {
+        'date': '2025-01-20',
+        'products_rate': 1050.0,
+        'costs_rate': 1.0,
+        'products_currency': 'USD',
+        'costs_currency': 'ARS'
+    }
+    assert [row['allocated_cost'] for row in calculation['rateio']] == [128730.0, 128730.0]
+
+
+def test_calculate_landed_costs_before_first_rate_is_a_currency_error(table):
+    with pytest.raises(CostCalculationError) as error:
+        calculate_landed_costs(landed_cost_payload(fxDate='2024-12-31'))
+    assert error.value.stage == 'currency_conversion'
+
+
+def test_convert_records_coerces_text_values_like_report_model(converter):
+    records = [{'total': 'US$ 10,50'}, {'total': 'n/a'}, {'total': '1.000,00'}]
+    converted = converter.convert_records(records, ['total'], 'USD', 'ARS', '2025-01-10')
+    assert [record['total'] for record in converted] == [10500.0, 0.0, 1000000.0]
+
+
+def test_calculate_landed_costs_in_ars_survives_a_bad_product_row(table):
+    payload = landed_cost_payload(fixedCosts=[], taxes=[], freightValue=0, insurancePercentage=0)
+    payload['products'].append({'name': 'Linha ruim', 'quantity': 1, 'unit_cost': 'sem preço', 'total': 'abc'})
+
+    calculation = calculate_landed_costs(payload)['calculation']
+    assert calculation['total_products'] == 210000.0
+    assert [row['name'] for row in calculation['rateio']] == ['Pneu A', 'Pneu B', 'Linha ruim']
+    assert calculation['rateio'][2]['allocated_cost'] == 0.0
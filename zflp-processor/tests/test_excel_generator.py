@@ -0,0 +1,86 @@
+import io
+
+import pytest
+
+openpyxl = pytest.importorskip('openpyxl')
+
+from services.excel_generator import ExcelGenerator
+
+PRODUCTS = [
+    {'produto': 'Pneu A', 'quantidade': 2, 'fob': 10.5},
+    {'produto': 'Pneu B', 'quantidade': 3, 'fob': 5}
+]
+
+
+def load(content, data_only=False):
+    return openpyxl.load_workbook(io.BytesIO(content), data_only=data_only).active
+
+
+def product_rows(sheet):
+    header = next(row[0].row for row in sheet.iter_rows(max_col=1) if row[0].value == 'Produto')
+    rows = []
+    for row in sheet.iter_rows(min_row=header + 1, max_col=4, values_only=True):
+        if row[0] == 'TOTAL':
+            break
+        rows.append(row)
+    return header, rows
+
+
+@pytest.mark.parametrize('constant_memory', [False, True])
+def test_product_totals_are_live_formulas_with_cached_results(constant_memory):
+    content = ExcelGenerator().generate_excel_bytes({'products': PRODUCTS}, constant_memory)
+
+    header, rows = product_rows(load(content))
+    assert [row[3] for row in rows] == [f'=B{header + 1}*C{header + 1}', f'=B{header + 2}*C{header + 2}']
+
+    # Valor em cache: quem abre sem recalcular (visualizadores, openpyxl) vê o total
+    _, cached = product_rows(load(content, data_only=True))
+    assert [row[3] for row in cached] == [21.0, 15.0]
+
+
+def full_report(count):
+    return {
+        'local_currency': 'ARS',
+        'metadata': {'filename': 'pedido.xlsx', 'processed_at': '2025-01-20T10:30:00'},
+        'summary': {'mercadoria': 1234.5, 'frete_seguro': 100, 'cif': 1334.5, 'custo_total': 2000},
+        'products': [
+            {'produto': f'Pneu {i}' if i % 7 else '', 'quantidade': i % 5 + 1, 'fob': 10 + i / 4}
+            for i in range(count)
+        ],
+        'costs': [
+            {'item': 'Despachante', 'percentual': 0, 'valor': 500},
+            {'item': 'IVA', 'percentual': 10.5, 'valor': 140.1}
+        ],
+        'totals': {'total_produtos': 1234.5, 'total_quantidade': 300, 'total_custos': 640.1, 'custo_total': 2000}
+    }
+
+
+def cell_snapshot(content):
+    """Valor, fórmula em cache e estilo de cada célula preenchida"""
+    formulas = load(content)
+    cached = load(content, data_only=True)
+    cells = {}
+    for row in formulas.iter_rows():
+        for cell in row:
+            if cell.value is None and not cell.has_style:
+                continue
+            cells[cell.coordinate] = (
+                cell.value,
+                cached[cell.coordinate].value,
+                cell.number_format,
+                cell.font.b, cell.font.sz,
+                cell.fill.fgColor.rgb,
+                cell.alignment.horizontal,
+                cell.border.left.style
+            )
+    return cells, [str(merged) for merged in formulas.merged_cells.ranges]
+
+
+def test_constant_memory_and_in_memory_workbooks_have_identical_cells():
+    data = full_report(60)
+    generator = ExcelGenerator()
+    streamed = cell_snapshot(generator.generate_excel_bytes(data, constant_memory=True))
+    in_memory = cell_snapshot(generator.generate_excel_bytes(data, constant_memory=False))
+
+    assert streamed[0] and len(streamed[0]) == len(in_memory[0])
+    assert streamed == in_memory
@@ -0,0 +1,131 @@
+import os
+
+import pytest
+
+from services.report_cache import ReportCache, report_cache
+from services.report_service import REPORT_TYPES
+from services.upload_store import UploadStore, upload_store
+
+PRODUCTS = [
+    {'name': 'Pneu A', 'brand': 'LINGLONG', 'quantity': 10, 'unit_cost': 10, 'total': 100},
+    {'name': 'Pneu B', 'brand': 'DURATURN', 'quantity': 5, 'unit_cost': 20, 'total': 100}
+]
+
+SIGNATURES = {
+    'application/pdf': b'%PDF',
+    'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet': b'PK\x03\x04'
+}
+
+
+@pytest.fixture
+def upload_id():
+    return upload_store.save({'products': PRODUCTS, 'summary': {'total_value': 200}}, 'pedido.xlsx')
+
+
+@pytest.mark.parametrize('report_type', sorted(REPORT_TYPES))
+def test_exports_every_report_type_from_stored_upload(client, upload_id, report_type):
+    spec = REPORT_TYPES[report_type]
+    response = client.get(f'/api/export/{report_type}/{upload_id}')
+    assert response.status_code == 200
+    assert response.mimetype == spec['mimetype']
+    assert spec['download_name'] in response.headers['Content-Disposition']
+    assert response.get_data().startswith(SIGNATURES[spec['mimetype']])
+    assert response.headers['ETag']
+
+
+def test_repeat_download_is_served_from_cache_and_revalidates(client, upload_id):
+    first = client.get(f'/api/export/pdf/{upload_id}')
+    hits = report_cache.stats()['hits']
+
+    second = client.get(f'/api/export/pdf/{upload_id}')
+    assert report_cache.stats()['hits'] == hits + 1
+    assert second.get_data() == first.get_data()
+
+    conditional = client.get(f'/api/export/pdf/{upload_id}', headers={'If-None-Match': first.headers['ETag']})
+    assert conditional.status_code == 304 and conditional.get_data() == b''
+
+
+def test_new_calculation_changes_the_report(client, upload_id):
+    before = client.get(f'/api/export/excel/{upload_id}')
+    calculation = client.post('/api/calculate-costs', json={
+        'products': PRODUCTS, 'freightValue': 50, 'insurancePercentage': 1, 'uploadId': upload_id
+    })
+    assert calculation.json['success'] is True
+
+    after = client.get(f'/api/export/excel/{upload_id}')
+    assert after.status_code == 200 and after.headers['ETag'] != before.headers['ETag']
+
+
+@pytest.mark.parametrize('unknown_id', ['0' * 32, 'nao-e-hex', 'g' * 32, 'A' * 32])
+def test_unknown_or_malformed_upload_id_is_404(client, unknown_id):
+    response = client.get(f'/api/export/pdf/{unknown_id}')
+    assert response.status_code == 404
+    assert response.json['stage'] == 'upload_lookup'
+
+
+def test_invalid_report_type_is_400(client, upload_id):
+    response = client.get(f'/api/export/docx/{upload_id}')
+    assert response.status_code == 400 and response.json['stage'] == 'invalid_type'
+
+
+def test_report_cache_evicts_least_recently_used_by_entry_count():
+    cache = ReportCache(max_entries=2, max_bytes=1024)
+    cache.put(('a', 'pdf', '1'), b'a')
+    cache.put(('b', 'pdf', '1'), b'b')
+    assert cache.get(('a', 'pdf', '1')) is not None  # 'a' passa a ser o mais recente
+    cache.put(('c', 'pdf', '1'), b'c')
+
+    assert cache.contains(('a', 'pdf', '1')) and cache.contains(('c', 'pdf', '1'))
+    assert not cache.contains(('b', 'pdf', '1'))
+    assert cache.stats() == dict(cache.stats(), entries=2, bytes=2)
+
+
+def test_report_cache_evicts_by_total_bytes():
+    cache = ReportCache(max_entries=10, max_bytes=100)
+    cache.put(('a', 'pdf', '1'), b'x' * 40)
+    cache.put(('b', 'pdf', '1'), b'x' * 40)
+    cache.put(('c', 'pdf', '1'), b'x' * 40)
+    assert not cache.contains(('a', 'pdf', '1'))
+    assert cache.stats() == dict(cache.stats(), entries=2, bytes=80)
+
+    # Maior que o cache inteiro: devolvido sem ser guardado
+    entry = cache.put(('d', 'pdf', '1'), b'x' * 101)
+    assert entry.size == 101 and not cache.contains(('d', 'pdf', '1'))
+    assert cache.stats()['bytes'] == 80
+
+
+def test_report_cache_replaces_entry_and_invalidates_upload():
+    cache = ReportCache(max_entries=10, max_bytes=100)
+    cache.put(('a', 'pdf', '1'), b'x' * 30)
+    cache.put(('a', 'pdf', '1'), b'x' * 10)
+    cache.put(('a', 'excel', '1'), b'x' * 10)
+    cache.put(('b', 'pdf', '1'), b'x' * 10)
+    assert cache.stats()['bytes'] == 30
+
+    cache.invalidate('a')
+    assert cache.stats() == dict(cache.stats(), entries=1, bytes=10)
+
+
+def test_upload_store_is_shared_between_processes(tmp_path):
+    # Duas instâncias no mesmo diretório fazem o papel de dois workers do gunicorn
+    worker_a = UploadStore(str(tmp_path))
+    worker_b = UploadStore(str(tmp_path))
+
+    upload_id = worker_a.save({'products': PRODUCTS}, 'pedido.xlsx')
+    assert worker_b.get(upload_id)['calculation'] is None
+
+    assert worker_a.attach_calculation(upload_id, {'total_cost': 250.0})
+    assert worker_b.get(upload_id)['calculation'] == {'total_cost': 250.0}
+    assert worker_b.get(upload_id)['filename'] == 'pedido.xlsx'
+
+    assert worker_b.attach_calculation('f' * 32, {}) is False
+
+
+def test_upload_store_prunes_oldest_uploads(tmp_path):
+    store = UploadStore(str(tmp_path), max_uploads=2)
+    first = store.save({'products': []})
+    os.utime(tmp_path / f'{first}.json', ns=(0, 0))
+    store.save({'products': []})
+    store.save({'products': []})
+    assert len(list(tmp_path.glob('*.json'))) == 2
+    assert UploadStore(str(tmp_path)).get(first) is None
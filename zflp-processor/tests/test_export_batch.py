@@ -0,0 +1,117 @@
+import io
+import json
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import request_limits
+import routes.export
+from services.admission import AdmissionController
+from services.upload_store import upload_store
+
+PRODUCTS = [{'name': 'Pneu A', 'brand': 'LINGLONG', 'quantity': 4, 'unit_cost': 25, 'total': 100}]
+REPORT_DATA = {'products': [{'produto': 'Pneu A', 'quantidade': 4, 'fob': 25, 'total': 100}]}
+
+
+def read_zip(response):
+    archive = zipfile.ZipFile(io.BytesIO(response.get_data()))
+    manifest = json.loads(archive.read('manifest.json'))
+    return archive, manifest
+
+
+def test_batch_streams_zip_with_per_job_folders_and_manifest(client):
+    upload_id = upload_store.save({'products': PRODUCTS}, 'pedido.xlsx')
+    response = client.post('/api/export/batch', json={'jobs': [
+        {'id': 'embarque-1', 'type': 'pdf', 'uploadId': upload_id},
+        {'id': 'embarque-2', 'type': 'excel', 'data': REPORT_DATA},
+        {'id': 'quebrado', 'type': 'pdf', 'data': {'products': 'não é uma lista de produtos'}},
+        {'id': 'tipo', 'type': 'docx', 'data': REPORT_DATA},
+        {'id': 'sumido', 'type': 'pdf', 'uploadId': 'f' * 32}
+    ]})
+    assert response.status_code == 200 and response.mimetype == 'application/zip'
+
+    archive, manifest = read_zip(response)
+    assert sorted(archive.namelist()) == [
+        'embarque-1/relatorio_zflp.pdf', 'embarque-2/relatorio_zflp.xlsx', 'manifest.json'
+    ]
+    assert archive.read('embarque-1/relatorio_zflp.pdf').startswith(b'%PDF')
+
+    assert manifest['summary'] == dict(manifest['summary'], total=5, succeeded=2, failed=3)
+    jobs = manifest['jobs']
+    assert [job['index'] for job in jobs] == [0, 1, 2, 3, 4]
+    for job in jobs[:2]:
+        assert job['success'] and job['elapsed_ms'] > 0 and job['size'] > 0
+        assert archive.getinfo(job['file']).file_size == job['size']
+    # Um relatório com erro é registrado no manifest sem interromper o ZIP
+    assert jobs[2]['success'] is False and jobs[2]['stage'] == 'render_error'
+    assert jobs[3]['stage'] == 'invalid_type'
+    assert jobs[4]['stage'] == 'upload_lookup'
+
+
+def test_repeated_job_ids_get_separate_folders(client):
+    response = client.post('/api/export/batch', json=[
+        {'id': 'mesmo', 'type': 'pdf-summary', 'data': REPORT_DATA},
+        {'id': 'mesmo', 'type': 'pdf-summary', 'data': REPORT_DATA}
+    ])
+    archive, manifest = read_zip(response)
+    assert sorted(job['file'] for job in manifest['jobs']) == ['mesmo-2/resumo_zflp.pdf', 'mesmo/resumo_zflp.pdf']
+
+
+def test_batch_rejects_empty_body(client):
+    assert client.post('/api/export/batch', json={'jobs': []}).json['stage'] == 'json_validation'
+
+
+class CountingPool:
+    """Pool em threads que registra quantos jobs estavam pendentes a cada envio"""
+
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=4)
+        self.futures = []
+        self.max_outstanding = 0
+
+    def submit(self, *args):
+        outstanding = sum(1 for future in self.futures if not future.done()) + 1
+        self.max_outstanding = max(self.max_outstanding, outstanding)
+        future = self.executor.submit(*args)
+        self.futures.append(future)
+        return future
+
+
+def test_batch_caps_jobs_in_flight(client, monkeypatch):
+    pool = CountingPool()
+    monkeypatch.setattr(routes.export, 'submit_cpu_bound', pool.submit)
+    monkeypatch.setattr(routes.export, 'BATCH_MAX_IN_FLIGHT', 2)
+
+    jobs = [{'id': f'job-{i}', 'type': 'pdf-summary', 'data': REPORT_DATA} for i in range(8)]
+    _, manifest = read_zip(client.post('/api/export/batch', json=jobs))
+    pool.executor.shutdown()
+
+    assert manifest['summary']['succeeded'] == 8
+    assert len(pool.futures) == 8 and pool.max_outstanding <= 2
+
+
+def busy_controller():
+    controller = AdmissionController(max_concurrent=1, max_queue=0, max_wait=0.1)
+    controller.acquire()
+    return controller
+
+
+def test_batch_is_under_admission_control(client, monkeypatch):
+    monkeypatch.setattr(request_limits, 'admission_controller', busy_controller())
+    response = client.post('/api/export/batch', json=[{'type': 'pdf', 'data': REPORT_DATA}])
+    assert response.status_code == 503 and response.headers['Retry-After']
+
+
+def test_export_render_needs_a_slot_but_cached_download_does_not(client, monkeypatch):
+    upload_id = upload_store.save({'products': PRODUCTS}, 'pedido.xlsx')
+    controller = busy_controller()
+    monkeypatch.setattr(routes.export, 'admission_controller', controller)
+
+    response = client.get(f'/api/export/pdf-summary/{upload_id}')
+    assert response.status_code == 503 and response.json['stage'] == 'server_busy'
+
+    controller.release()
+    assert client.get(f'/api/export/pdf-summary/{upload_id}').status_code == 200
+    assert controller.stats()['in_flight'] == 0
+
+    controller.acquire()
+    assert client.get(f'/api/export/pdf-summary/{upload_id}').status_code == 200
@@ -0,0 +1,38 @@
+import json
+import math
+
+import numpy as np
+import pytest
+
+
+def test_request_bodies_with_nan_and_infinity_still_parse(app):
+    provider = app.json
+    data = provider.loads('{"a": NaN, "b": Infinity, "c": [1, 2]}')
+    assert math.isnan(data['a']) and data['b'] == math.inf and data['c'] == [1, 2]
+
+
+def test_invalid_json_still_raises_value_error(app):
+    with pytest.raises(ValueError):
+        app.json.loads('{"a": ')
+
+
+def test_dumps_honours_sort_keys_and_ensure_ascii(app):
+    provider = app.json
+    obj = {'b': 1, 'a': 'ação'}
+    assert list(json.loads(provider.dumps(obj, sort_keys=True))) == ['a', 'b']
+    assert list(json.loads(provider.dumps(obj))) == ['b', 'a']
+    assert 'ação' in provider.dumps(obj)
+    assert provider.dumps(obj, ensure_ascii=True) == json.dumps(obj, ensure_ascii=True)
+
+
+def test_numpy_values_serialize(app):
+    provider = app.json
+    payload = json.loads(provider.dumps({'x': np.float64(1.5), 'y': np.arange(3)}))
+    assert payload == {'x': 1.5, 'y': [0, 1, 2]}
+
+
+def test_calculate_costs_accepts_nan_in_body(client):
+    body = '{"products": [{"name": "A", "quantity": 1, "unit_cost": 10, "total": 10, "peso": NaN}]}'
+    response = client.post('/api/calculate-costs', data=body, content_type='application/json')
+    assert response.status_code == 200
+    assert response.json['data']['calculation']['total_products'] == 10.0
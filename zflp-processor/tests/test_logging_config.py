@@ -0,0 +1,66 @@
+import json
+import time
+import queue
+import logging
+
+from logging_config import DeferredFormatQueueHandler, JSONFormatter, LogRateLimiter
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+def isolated_logger(name):
+    logger = logging.getLogger(f'tests.{name}')
+    logger.handlers[:] = []
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    handler = ListHandler()
+    logger.addHandler(handler)
+    return logger, handler
+
+
+def test_rate_limiter_reports_suppressed_burst_when_window_expires():
+    logger, handler = isolated_logger('burst')
+    limiter = LogRateLimiter(limit=2, interval=0.2)
+    for i in range(5):
+        limiter.log(logger, logging.WARNING, 'linha %d ruim', i)
+    assert handler.messages == ['linha 0 ruim', 'linha 1 ruim']
+
+    # Nenhuma mensagem nova: o resumo sai sozinho ao fim da janela
+    deadline = time.monotonic() + 2
+    while len(handler.messages) < 3 and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert handler.messages[2].startswith('3 mensagens semelhantes suprimidas')
+
+    # Janela nova: volta a aceitar mensagens
+    limiter.log(logger, logging.WARNING, 'linha %d ruim', 9)
+    assert handler.messages[-1] == 'linha 9 ruim'
+
+
+def test_rate_limiter_flush_reports_pending_summary_once():
+    logger, handler = isolated_logger('flush')
+    limiter = LogRateLimiter(limit=1, interval=60)
+    for i in range(3):
+        limiter.log(logger, logging.WARNING, 'aviso %d', i)
+    limiter.flush()
+    limiter.flush()
+    assert handler.messages == ['aviso 0', '2 mensagens semelhantes suprimidas nos últimos 60s']
+
+
+def test_queue_handler_defers_formatting_to_listener():
+    log_queue = queue.SimpleQueue()
+    handler = DeferredFormatQueueHandler(log_queue)
+    record = logging.LogRecord('tests', logging.INFO, __file__, 1, 'total %s de %d', ({'a': 1}, 2), None)
+    handler.handle(record)
+
+    queued = log_queue.get_nowait()
+    # Mensagem e argumentos chegam intactos: nada foi formatado na thread de quem registrou
+    assert queued.msg == 'total %s de %d' and queued.args == ({'a': 1}, 2)
+    assert not hasattr(queued, 'message')
+    assert json.loads(JSONFormatter().format(queued))['message'] == "total {'a': 1} de 2"
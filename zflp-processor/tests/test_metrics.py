@@ -0,0 +1,137 @@
+import io
+
+import pandas as pd
+
+from services.metrics import MetricsRegistry, metrics
+
+XLSX_COLUMNS = {'Produto': ['205/55R16 91V', '185/65R15 88H'], 'Marca': ['LINGLONG', 'DURATURN'],
+                'Quantidade': [10, 4], 'Valor Unitário FOB': [45.5, 38.9]}
+
+
+def samples(text=None):
+    """Linhas de amostra da exposição: {'nome{labels}': valor}"""
+    text = metrics.render() if text is None else text
+    values = {}
+    for line in text.splitlines():
+        if line and not line.startswith('#'):
+            name, value = line.rsplit(' ', 1)
+            values[name] = float(value)
+    return values
+
+
+def test_histogram_exposition_is_cumulative_with_inf_sum_and_count():
+    registry = MetricsRegistry()
+    histogram = registry.histogram('zflp_teste_seconds', 'Teste', ('route',), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, '/api/x')
+
+    text = registry.render()
+    assert '# HELP zflp_teste_seconds Teste\n# TYPE zflp_teste_seconds histogram\n' in text
+    assert samples(text) == {
+        'zflp_teste_seconds_bucket{route="/api/x",le="0.1"}': 2,  # limite inclusivo (le)
+        'zflp_teste_seconds_bucket{route="/api/x",le="1"}': 3,
+        'zflp_teste_seconds_bucket{route="/api/x",le="+Inf"}': 4,
+        'zflp_teste_seconds_sum{route="/api/x"}': 3.65,
+        'zflp_teste_seconds_count{route="/api/x"}': 4
+    }
+
+
+def test_counter_gauge_and_label_escaping():
+    registry = MetricsRegistry()
+    counter = registry.counter('zflp_eventos_total', 'Eventos', ('motivo',))
+    gauge = registry.gauge('zflp_fila', 'Fila')
+    counter.inc('aspas "e" \\barra')
+    counter.inc('aspas "e" \\barra', amount=2)
+    gauge.set(1.5)
+    assert samples(registry.render()) == {
+        'zflp_eventos_total{motivo="aspas \\"e\\" \\\\barra"}': 3,
+        'zflp_fila': 1.5
+    }
+
+
+def test_http_metrics_use_route_rule_not_raw_path(client):
+    client.get('/api/export/pdf/' + 'e' * 32)
+    client.get('/nao-existe')
+
+    text = metrics.render()
+    assert 'e' * 32 not in text
+    assert 'zflp_http_requests_total{method="GET",route="/api/export/<report_type>/<upload_id>",status="404"}' in text
+    assert 'route="unmatched",status="404"' in text
+
+
+def test_streamed_response_bytes_are_counted(client):
+    key = 'zflp_http_response_size_bytes_sum{method="POST",route="/api/manual-entry"}'
+    before = samples().get(key, 0)
+
+    products = [{'produto': f'Pneu {i}', 'quantidade': 1, 'valorFornecedor': 10} for i in range(20)]
+    response = client.post('/api/manual-entry', json={'products': products},
+                           headers={'Accept': 'application/x-ndjson'})
+    assert response.is_streamed
+    body = response.get_data()
+    response.close()
+
+    assert samples()[key] - before == len(body)
+
+
+def stage_count(operation, stage):
+    return samples().get(f'zflp_stage_duration_seconds_count{{operation="{operation}",stage="{stage}"}}', 0)
+
+
+def test_calculate_costs_records_stage_timings(client):
+    before = {stage: stage_count('calculate_costs', stage) for stage in ('validate', 'fx', 'costs', 'rateio')}
+    response = client.post('/api/calculate-costs', json={
+        'products': [{'name': 'A', 'quantity': 1, 'unit_cost': 10, 'total': 10}], 'freightValue': 5
+    })
+    assert response.json['success'] is True
+    for stage, count in before.items():
+        assert stage_count('calculate_costs', stage) == count + 1
+
+
+def test_upload_records_process_file_stage_timings(client):
+    stages = ('validate', 'read', 'clean', 'detect', 'rows')
+    before = {stage: stage_count('process_file', stage) for stage in stages}
+
+    workbook = io.BytesIO()
+    pd.DataFrame(XLSX_COLUMNS).to_excel(workbook, index=False, engine='openpyxl')
+    workbook.seek(0)
+    response = client.post('/api/upload', data={'file': (workbook, 'pedido.xlsx')},
+                           content_type='multipart/form-data')
+    assert response.status_code == 200 and response.json['success'] is True
+
+    for stage, count in before.items():
+        assert stage_count('process_file', stage) == count + 1
+
+
+def test_abandoned_streamed_body_does_not_record_from_the_garbage_collector():
+    import gc
+    import threading
+    from request_metrics import _CountingBody
+    from services.metrics import HTTP_RESPONSE_SIZE
+
+    recorded = []
+
+    def abandon_while_holding_lock():
+        body = _CountingBody(iter([b'abc', b'de']), None, lambda size: HTTP_RESPONSE_SIZE.observe(size, 'GET', '/x'))
+        iterator = iter(body)
+        next(iterator)
+        # Coleta com o lock da métrica adquirido (como durante metrics.render())
+        with HTTP_RESPONSE_SIZE._lock:
+            del body, iterator
+            gc.collect()
+        recorded.append(True)
+
+    worker = threading.Thread(target=abandon_while_holding_lock, daemon=True)
+    worker.start()
+    worker.join(5)
+    assert recorded == [True], 'observe() travou esperando o próprio lock'
+
+
+def test_streamed_body_records_size_once_on_close():
+    from request_metrics import _CountingBody
+
+    sizes = []
+    body = _CountingBody(iter([b'abc', b'de']), None, sizes.append)
+    assert b''.join(body) == b'abcde'
+    body.close()
+    body.close()
+    assert sizes == [5]
@@ -0,0 +1,51 @@
+import pytest
+from reportlab.platypus import LongTable
+
+import services.pdf_generator
+from services.pdf_generator import PDFGenerator
+from services.report_model import ReportModel
+
+
+def report_data(count):
+    return {
+        'products': [{'produto': f'Pneu {i}', 'quantidade': 1, 'fob': 10, 'total': 10} for i in range(count)],
+        'costs': [{'item': f'Custo {i}', 'percentual': 0, 'valor': 5} for i in range(count)]
+    }
+
+
+def table_rows(tables):
+    return [list(row) for table in tables for row in table._cellvalues]
+
+
+@pytest.mark.parametrize('count', [1, 2, 3, 4, 7, 9])
+def test_long_table_chunks_keep_every_row_in_order(monkeypatch, count):
+    monkeypatch.setattr(services.pdf_generator, 'TABLE_CHUNK_ROWS', 3)
+    model = ReportModel(report_data(count))
+    elements = PDFGenerator()._build_products_section(model)
+    tables = [element for element in elements if isinstance(element, LongTable)]
+
+    assert len(tables) == -(-count // 3)
+    header = ['Produto', 'Qnt', 'FOB (US$)', 'Total (US$)']
+    for table in tables:
+        assert list(table._cellvalues[0]) == header
+        assert table.repeatRows == 1
+
+    # Sem o cabeçalho de cada bloco e o total do último: todas as linhas, na ordem, uma vez
+    body = [row for table in tables for row in table._cellvalues[1:]]
+    assert body[-1][0] == 'TOTAL' and body[-1][1] == str(count)
+    assert [row[0] for row in body[:-1]] == [f'Pneu {i}' for i in range(count)]
+    assert sum(row[0] == 'TOTAL' for row in body) == 1
+
+
+def test_costs_section_uses_the_same_chunking(monkeypatch):
+    monkeypatch.setattr(services.pdf_generator, 'TABLE_CHUNK_ROWS', 4)
+    elements = PDFGenerator()._build_costs_section(ReportModel(report_data(10)))
+    tables = [element for element in elements if isinstance(element, LongTable)]
+    assert len(tables) == 3
+    names = [row[0] for row in table_rows(tables) if row[0] not in ('Item de Custo', 'TOTAL CUSTOS')]
+    assert names == [f'Custo {i}' for i in range(10)]
+
+
+def test_large_report_renders():
+    content = PDFGenerator().generate_pdf_bytes(report_data(500))
+    assert content.startswith(b'%PDF') and content.rstrip().endswith(b'%%EOF')
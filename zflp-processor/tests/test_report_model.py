@@ -0,0 +1,44 @@
+import pytest
+
+from services.report_model import ReportModel, format_quantity
+
+
+def test_numeric_fields_are_coerced_with_safe_float():
+    model = ReportModel({
+        'local_currency': 'USD',
+        'products': [
+            {'produto': 'Pneu A', 'quantidade': '2', 'fob': 'US$ 10,50', 'total': '21'},
+            {'produto': 'Pneu B', 'quantidade': None, 'fob': None, 'total': None},
+            {'produto': 'Pneu C', 'quantidade': '1000', 'fob': '1.234,56', 'total': 'n/a'}
+        ],
+        'costs': [{'item': 'Frete', 'percentual': '2,5', 'valor': 'US$ 1.000,00'}],
+        'summary': {'mercadoria': '21,00', 'cif': None},
+        'totals': {'total_produtos': '21', 'total_quantidade': '3'}
+    })
+
+    assert model.quantities == [2.0, 0.0, 1000.0]
+    assert model.fobs == [10.5, 0.0, 1234.56]
+    assert model.product_totals == [21.0, 0.0, 0.0]
+    assert model.total_quantity == 1002.0 and model.total_products_value == 21.0
+    assert model.product_rows() == [
+        ('Pneu A', 2.0, 10.5, 21.0),
+        ('Pneu B', 0.0, 0.0, 0.0),
+        ('Pneu C', 1000.0, 1234.56, pytest.approx(1234560.0))
+    ]
+
+    assert model.cost_rows() == [('Frete', 0.025, 1000.0)]
+    assert model.total_costs == 1000.0
+    assert model.summary == [('Mercadoria', 21.0), ('CIF', 0.0)]
+    assert model.totals == {'total_produtos': 21.0, 'total_quantidade': 3.0}
+
+
+def test_text_cells_show_whole_quantities_without_decimals():
+    model = ReportModel({'products': [{'produto': 'Pneu A', 'quantidade': '2', 'fob': 10, 'total': 20}]})
+    assert model.product_cells == [('Pneu A', '2', '$ 10.00', '$ 20.00')]
+    assert format_quantity(2.5) == '2.5'
+    assert format_quantity(1234.0, grouping=True) == '1,234'
+
+
+def test_product_rows_limit():
+    model = ReportModel({'products': [{'produto': str(i), 'quantidade': 1, 'fob': 1} for i in range(5)]})
+    assert [row[0] for row in model.product_rows(limit=2)] == ['0', '1']
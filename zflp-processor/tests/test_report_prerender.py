@@ -0,0 +1,84 @@
+import threading
+
+import pytest
+
+import routes.export
+import services.report_prerender
+from services.report_prerender import ReportPrerenderer, _configured_types, report_prerenderer
+from services.report_service import render_reports
+from services.upload_store import upload_store
+
+PRODUCTS = [{'name': 'Pneu A', 'brand': 'LINGLONG', 'quantity': 4, 'unit_cost': 25, 'total': 100}]
+
+
+def new_upload():
+    return upload_store.save({'products': PRODUCTS}, 'pedido.xlsx')
+
+
+@pytest.fixture
+def blocked_render(monkeypatch):
+    """render_reports só termina quando o teste libera; conta as chamadas"""
+    gate = threading.Event()
+    calls = []
+
+    def render(report_types, data):
+        calls.append(list(report_types))
+        assert gate.wait(5)
+        return render_reports(report_types, data)
+
+    monkeypatch.setattr(services.report_prerender, 'render_reports', render)
+    yield gate, calls
+    gate.set()
+
+
+def test_prerender_is_off_by_default(monkeypatch):
+    monkeypatch.delenv('REPORT_PRERENDER_TYPES', raising=False)
+    assert _configured_types() == []
+    assert report_prerenderer.enabled is False
+    assert report_prerenderer.schedule(new_upload()) is False
+
+
+def test_configured_types_ignore_unknown(monkeypatch):
+    monkeypatch.setenv('REPORT_PRERENDER_TYPES', 'pdf, docx ,excel')
+    assert _configured_types() == ['pdf', 'excel']
+
+
+def test_jobs_beyond_max_pending_are_dropped(blocked_render):
+    gate, calls = blocked_render
+    prerenderer = ReportPrerenderer(['pdf-summary'], max_workers=1, max_pending=1)
+
+    first = new_upload()
+    assert prerenderer.schedule(first) is True
+    assert prerenderer.schedule(first) is False  # já em andamento
+    assert prerenderer.schedule(new_upload()) is False
+    assert prerenderer.stats() == dict(prerenderer.stats(), in_flight=1, dropped=1)
+
+    gate.set()
+    prerenderer._executor.shutdown(wait=True)
+    assert calls == [['pdf-summary']]
+    # Já no cache: não agenda de novo
+    assert prerenderer.schedule(first) is False
+
+
+def test_export_waits_for_inflight_prerender_instead_of_rendering(client, monkeypatch, blocked_render):
+    gate, calls = blocked_render
+    prerenderer = ReportPrerenderer(['pdf-summary', 'pdf'], max_workers=1, max_pending=4)
+    monkeypatch.setattr(routes.export, 'report_prerenderer', prerenderer)
+
+    def render_on_demand(*args):
+        raise AssertionError('relatório gerado de novo em vez de aguardar a pré-renderização')
+
+    monkeypatch.setattr(routes.export, 'render_report', render_on_demand)
+
+    upload_id = new_upload()
+    assert prerenderer.schedule(upload_id)
+    releaser = threading.Timer(0.2, gate.set)
+    releaser.start()
+
+    response = client.get(f'/api/export/pdf-summary/{upload_id}')
+    releaser.join()
+    assert response.status_code == 200 and response.get_data().startswith(b'%PDF')
+    assert calls == [['pdf-summary', 'pdf']]
+
+    # O outro tipo do mesmo job já está no cache
+    assert client.get(f'/api/export/pdf/{upload_id}').status_code == 200
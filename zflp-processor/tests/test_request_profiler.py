@@ -0,0 +1,97 @@
+import pstats
+import time
+
+import pytest
+from flask import Flask, jsonify
+
+import request_profiler
+from request_profiler import ProfileLimiter, install_request_profiler
+
+
+def busy_work():
+    deadline = time.perf_counter() + 0.05
+    total = 0
+    while time.perf_counter() < deadline:
+        total += sum(range(1000))
+    return total
+
+
+@pytest.fixture
+def profiled_client(tmp_path, monkeypatch):
+    """App mínimo com o perfilamento ativo, perfis em tmp_path"""
+    monkeypatch.setattr(request_profiler, 'PROFILING_ENABLED', True)
+    monkeypatch.setattr(request_profiler, 'PROFILE_DIR', str(tmp_path))
+    monkeypatch.setattr(request_profiler, 'PROFILE_SAMPLE_INTERVAL', 0.001)
+    monkeypatch.setattr(request_profiler, 'profile_limiter', ProfileLimiter(max_per_minute=10, max_concurrent=1))
+
+    app = Flask(__name__)
+    install_request_profiler(app)
+
+    @app.route('/trabalho')
+    def work():
+        return jsonify(total=busy_work())
+
+    return app.test_client()
+
+
+def test_profiling_is_disabled_by_default():
+    app = Flask(__name__)
+    install_request_profiler(app)
+    assert not app.before_request_funcs
+
+
+def test_sample_mode_writes_collapsed_stacks(profiled_client, tmp_path):
+    response = profiled_client.get('/trabalho', headers={'X-Profile': 'sample', 'X-Request-ID': 'req-1'})
+    assert response.headers['X-Profile-Id'] == 'req-1'
+
+    lines = (tmp_path / 'req-1.collapsed').read_text(encoding='utf-8').splitlines()
+    assert lines and any('busy_work' in line for line in lines)
+    stack, count = lines[0].rsplit(' ', 1)
+    assert ';' in stack and int(count) > 0
+
+
+def test_cprofile_mode_writes_pstats(profiled_client, tmp_path):
+    response = profiled_client.get('/trabalho', headers={'X-Profile': 'cprofile'})
+    profile_id = response.headers['X-Profile-Id']
+
+    stats = pstats.Stats(str(tmp_path / f'{profile_id}.prof'))
+    assert any(name == 'busy_work' for _, _, name in stats.stats)
+
+
+def test_wrong_token_is_not_profiled(profiled_client, tmp_path, monkeypatch):
+    monkeypatch.setattr(request_profiler, 'PROFILING_TOKEN', 'segredo')
+
+    response = profiled_client.get('/trabalho', headers={'X-Profile': 'sample', 'X-Profile-Token': 'errado'})
+    assert response.status_code == 200 and 'X-Profile-Id' not in response.headers
+
+    response = profiled_client.get('/trabalho', headers={'X-Profile': 'sample', 'X-Profile-Token': 'segredo'})
+    assert 'X-Profile-Id' in response.headers
+    assert len(list(tmp_path.iterdir())) == 1
+
+
+def test_per_minute_cap_skips_profiling(profiled_client, tmp_path, monkeypatch):
+    monkeypatch.setattr(request_profiler, 'profile_limiter', ProfileLimiter(max_per_minute=2, max_concurrent=1))
+    headers = [profiled_client.get('/trabalho', headers={'X-Profile': 'sample'}).headers for _ in range(3)]
+
+    assert ['X-Profile-Id' in h for h in headers] == [True, True, False]
+    assert headers[2]['X-Profile-Skipped'] == 'rate-limited'
+    assert len(list(tmp_path.iterdir())) == 2
+
+
+def test_limiter_caps_concurrent_profiles():
+    limiter = ProfileLimiter(max_per_minute=10, max_concurrent=2)
+    assert limiter.acquire() and limiter.acquire()
+    assert limiter.acquire() is False
+    limiter.release()
+    assert limiter.acquire()
+
+
+def test_limiter_allows_only_one_cprofile_at_a_time():
+    # Python 3.12+: um único profiler determinístico ativo por processo
+    limiter = ProfileLimiter(max_per_minute=10, max_concurrent=4)
+    assert limiter.acquire('cprofile')
+    assert limiter.acquire('cprofile') is False
+    assert limiter.acquire('sample')
+
+    limiter.release('cprofile')
+    assert limiter.acquire('cprofile')
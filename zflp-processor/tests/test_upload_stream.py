@@ -0,0 +1,112 @@
+import io
+import os
+
+import pytest
+
+from services.upload_stream import UploadRejected, receive_upload
+
+BOUNDARY = 'zflp-test-boundary'
+XLSX_HEAD = b'PK\x03\x04'
+
+
+def multipart(filename, content, field='file'):
+    return (
+        f'--{BOUNDARY}\r\n'
+        f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+        'Content-Type: application/octet-stream\r\n\r\n'
+    ).encode() + content + f'\r\n--{BOUNDARY}--\r\n'.encode()
+
+
+def receive(tmp_path, body, **kwargs):
+    return receive_upload(io.BytesIO(body), BOUNDARY, str(tmp_path), **kwargs)
+
+
+def test_valid_file_is_written(tmp_path):
+    content = XLSX_HEAD + b'x' * 1000
+    file_path, filename = receive(tmp_path, multipart('planilha.xlsx', content))
+    assert filename == 'planilha.xlsx'
+    with open(file_path, 'rb') as f:
+        assert f.read() == content
+
+
+def test_oversized_file_is_413(tmp_path):
+    with pytest.raises(UploadRejected) as error:
+        receive(tmp_path, multipart('planilha.xlsx', XLSX_HEAD + b'x' * 2048), max_bytes=1024)
+    assert error.value.status == 413 and error.value.stage == 'file_size'
+
+
+def test_content_not_matching_extension_is_415(tmp_path):
+    with pytest.raises(UploadRejected) as error:
+        receive(tmp_path, multipart('planilha.xlsx', b'<html>nao sou excel</html>'))
+    assert error.value.status == 415 and error.value.stage == 'file_format'
+
+
+def test_short_file_with_wrong_signature_is_415(tmp_path):
+    with pytest.raises(UploadRejected) as error:
+        receive(tmp_path, multipart('planilha.xls', b'PK'))
+    assert error.value.status == 415
+
+
+def test_bad_extension_is_rejected_before_reading(tmp_path):
+    with pytest.raises(UploadRejected) as error:
+        receive(tmp_path, multipart('planilha.csv', b'a;b\n1;2\n'))
+    assert error.value.stage == 'file_format' and error.value.status == 200
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.mark.parametrize('body', [
+    multipart('planilha.xlsx', XLSX_HEAD, field='outro'),
+    multipart('', XLSX_HEAD),
+    multipart('planilha.xlsx', b'')
+])
+def test_missing_or_empty_file_is_rejected(tmp_path, body):
+    with pytest.raises(UploadRejected) as error:
+        receive(tmp_path, body)
+    assert error.value.stage == 'file_validation'
+
+
+def upload(client, body):
+    return client.post('/api/upload', data=body, content_type=f'multipart/form-data; boundary={BOUNDARY}')
+
+
+@pytest.fixture
+def temp_dir(tmp_path, monkeypatch):
+    import routes.upload
+    directory = tmp_path / 'upload'
+    directory.mkdir()
+    monkeypatch.setattr(routes.upload.tempfile, 'mkdtemp', lambda: str(directory))
+    return directory
+
+
+def test_route_maps_rejection_status_and_cleans_up(client, temp_dir):
+    response = upload(client, multipart('planilha.xlsx', b'<html></html>'))
+    assert response.status_code == 415
+    assert response.json['stage'] == 'file_format'
+    assert not temp_dir.exists()
+
+
+def test_route_cleans_up_when_receiving_fails(client, temp_dir, monkeypatch):
+    import routes.upload
+
+    def disk_full(stream, boundary, dest_dir):
+        # Falha de I/O no meio da gravação: não é um UploadRejected
+        (temp_dir / 'planilha.xlsx').write_bytes(XLSX_HEAD)
+        raise OSError('disco cheio')
+
+    monkeypatch.setattr(routes.upload, 'receive_upload', disk_full)
+    response = upload(client, multipart('planilha.xlsx', XLSX_HEAD + b'x' * 100))
+    assert response.status_code == 500
+    assert response.json['stage'] == 'server_error'
+    assert not temp_dir.exists()
+
+
+def test_route_cleans_up_when_processing_fails(client, temp_dir, monkeypatch):
+    import routes.upload
+
+    def broken(*args, **kwargs):
+        raise RuntimeError('pool indisponível')
+
+    monkeypatch.setattr(routes.upload, 'run_cpu_bound', broken)
+    response = upload(client, multipart('planilha.xlsx', XLSX_HEAD + b'x' * 100))
+    assert response.status_code == 500
+    assert not temp_dir.exists()
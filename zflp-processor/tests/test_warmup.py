@@ -0,0 +1,73 @@
+import threading
+import time
+
+import pytest
+
+import main
+import services.warmup
+from services.warmup import WarmupState
+
+
+def broken_step():
+    raise RuntimeError('sem fontes')
+
+
+def wait_until_ready(state, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not state.ready and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return state.ready
+
+
+@pytest.fixture
+def warmup_enabled(monkeypatch):
+    monkeypatch.setattr(services.warmup, 'WARMUP_ENABLED', True)
+
+
+def test_run_records_steps_and_degrades_on_failure(warmup_enabled):
+    calls = []
+    state = WarmupState(steps=(('primeira', lambda: calls.append(1)), ('quebrada', broken_step)))
+    assert state.snapshot()['status'] == 'pending' and not state.ready
+
+    state.run()
+    state.run()
+    snapshot = state.snapshot()
+    assert calls == [1]
+    assert snapshot['status'] == 'degraded' and snapshot['ready'] is True
+    assert [(step['name'], step['status']) for step in snapshot['steps']] == [('primeira', 'ok'), ('quebrada', 'failed')]
+    assert snapshot['steps'][1]['error'] == 'sem fontes'
+
+
+def test_disabled_warmup_is_ready_immediately(monkeypatch):
+    monkeypatch.setattr(services.warmup, 'WARMUP_ENABLED', False)
+    state = WarmupState(steps=(('quebrada', broken_step),))
+    state.run()
+    assert state.snapshot() == dict(state.snapshot(), status='ready', steps=[])
+
+
+def test_start_background_runs_only_once(warmup_enabled):
+    calls = []
+    state = WarmupState(steps=(('conta', lambda: calls.append(1)),))
+    thread = state.start_background()
+    assert state.start_background() is None
+    thread.join(5)
+    assert state.start_background() is None
+    assert calls == [1] and state.status == 'ready'
+
+
+def test_ready_starts_warmup_lazily_outside_gunicorn(client, monkeypatch, warmup_enabled):
+    gate = threading.Event()
+    state = WarmupState(steps=(('bloqueada', lambda: gate.wait(5)), ('quebrada', broken_step)))
+    monkeypatch.setattr(main, 'warmup_state', state)
+
+    # Primeira requisição dispara o warm-up; enquanto ele roda, /ready é 503
+    response = client.get('/ready')
+    assert response.status_code == 503
+    assert response.json['status'] in ('pending', 'warming')
+
+    gate.set()
+    assert wait_until_ready(state)
+    response = client.get('/ready')
+    assert response.status_code == 200
+    assert response.json['status'] == 'degraded'
+    assert [step['name'] for step in response.json['steps']] == ['bloqueada', 'quebrada']